@@ -1,130 +1,231 @@
-import requests
 import os
 import pandas as pd
-import sqlite3
-import shutil
-import matplotlib.pyplot as plt
-from datetime import datetime
+import sys
 import argparse
-
-# Configurar argparse para manejar los argumentos de línea de comandos
-parser = argparse.ArgumentParser(description='Script para procesar datos de tipo de cambio del dólar del BCRA.')
-parser.add_argument('date_from', type=str, help='Fecha de inicio para el gráfico (YYYY-MM-DD)')
-parser.add_argument('date_until', type=str, help='Fecha de fin para el gráfico (YYYY-MM-DD)')
-
-args = parser.parse_args()
-
-# Asignar los argumentos a variables
-date_from = args.date_from
-date_until = args.date_until
-
-# Crear la subcarpeta "DATA_dolar" si no existe
-folder_path = 'DATA_dolar'
-if not os.path.exists(folder_path):
-    os.makedirs(folder_path)
-
-# Definir la ruta completa del archivo dentro de la subcarpeta
-file_path = os.path.join(folder_path, 'DATA_BCRA_dolar.xls')
+from fetch_cache import fetch, mark_processed
+from database import DB_PATH, bump_generation, get_connection
+from derived import refresh_derived
+from instrumentation import Run, fetch_metrics, load_metrics, parse_metrics
+from queries import fetch_all, read_frame
+from render import DEFAULT_DPI, FORMATS, get_pyplot, is_fresh, output_path, render_key, save_figure
 
 # URL del archivo
-url = 'https://www.bcra.gob.ar/pdfs/publicacionesestadisticas/com3500.xls'
-
-# Descargar el archivo sin verificar el SSL
-response = requests.get(url, verify=False)
-
-# Guardar el contenido del archivo en la subcarpeta
-with open(file_path, 'wb') as file:
-    file.write(response.content)
-
-print(f"Archivo descargado con éxito en {file_path}")
-
-# Leer el archivo Excel y extraer solo las columnas C y D, eliminando las primeras 4 filas
-df = pd.read_excel(file_path, usecols="C:D", names=["ID_tie_date", "F_bcra_dolar"], skiprows=4)
-
-# Convertir la columna ID_tie_date a formato de fecha y F_bcra_dolar a float
-df['ID_tie_date'] = pd.to_datetime(df['ID_tie_date'], errors='coerce').dt.date
-df['F_bcra_dolar'] = pd.to_numeric(df['F_bcra_dolar'], errors='coerce')
-
-# Conectar a la base de datos SQLite
-conn = sqlite3.connect('databases/social_indicators.db')
-cursor = conn.cursor()
-
-# Crear la tabla FT_BCRA_dolar si no existe
-cursor.execute('''
-CREATE TABLE IF NOT EXISTS FT_BCRA_dolar (
-    id INTEGER PRIMARY KEY AUTOINCREMENT,
-    ID_tie_date DATE,
-    F_bcra_dolar FLOAT
-)
-''')
-
-# Truncar la tabla FT_BCRA_dolar antes de insertar nuevos datos
-cursor.execute('DELETE FROM FT_BCRA_dolar')
-
-# Insertar los datos en la tabla FT_BCRA_dolar
-for row in df.itertuples(index=False):
-    cursor.execute('INSERT INTO FT_BCRA_dolar (ID_tie_date, F_bcra_dolar) VALUES (?, ?)', (row.ID_tie_date, row.F_bcra_dolar))
-
-# Confirmar los cambios y cerrar la conexión
-conn.commit()
-conn.close()
-
-print("Datos insertados con éxito en la tabla FT_BCRA_dolar")
-
-# Eliminar la carpeta DATA_dolar y su contenido si existe
-if os.path.exists(folder_path):
-    try:
-        shutil.rmtree(folder_path)
-        print(f"Carpeta {folder_path} eliminada con éxito")
-    except PermissionError:
-        print(f"No se pudo eliminar la carpeta {folder_path} debido a un error de permisos")
-
-# Filtrar el DataFrame según el rango de fechas proporcionado para el gráfico
-df_filtered = df[(df['ID_tie_date'] >= pd.to_datetime(date_from).date()) & (df['ID_tie_date'] <= pd.to_datetime(date_until).date())]
-
-# Graficar la evolución diaria del tipo de cambio del dólar
-plt.figure(figsize=(10, 6))
-plt.plot(df_filtered['ID_tie_date'], df_filtered['F_bcra_dolar'], marker='x', markersize=3, linestyle='-', color='lightblue', linewidth=1, label='Tipo de Cambio del Dólar')
-
-# Añadir línea vertical para la fecha seleccionada en el primer parámetro
-selected_date = pd.to_datetime(date_from).date()
-plt.axvline(x=selected_date, color='red', linestyle='--', linewidth=1, label='Fecha de Inicio Seleccionada')
-
-# Añadir anotaciones para el valor máximo, mínimo y último valor
-max_value = df_filtered['F_bcra_dolar'].max()
-min_value = df_filtered['F_bcra_dolar'].min()
-last_value = df_filtered['F_bcra_dolar'].iloc[-1]
-last_date = df_filtered['ID_tie_date'].iloc[-1]
-
-plt.scatter(df_filtered['ID_tie_date'][df_filtered['F_bcra_dolar'] == max_value], max_value, color='green', zorder=5)
-plt.scatter(df_filtered['ID_tie_date'][df_filtered['F_bcra_dolar'] == min_value], min_value, color='red', zorder=5)
-plt.scatter(last_date, last_value, color='blue', zorder=5)
-
-plt.text(df_filtered['ID_tie_date'][df_filtered['F_bcra_dolar'] == max_value].values[0], max_value, f'Max: {max_value:.2f}', fontsize=10, verticalalignment='top', color='green')
-plt.text(df_filtered['ID_tie_date'][df_filtered['F_bcra_dolar'] == min_value].values[0], min_value, f'Min: {min_value:.2f}', fontsize=10, verticalalignment='top', color='red')
-plt.text(last_date, last_value, f'Last: {last_value:.2f}', fontsize=10, verticalalignment='bottom', color='blue')
-
-# Añadir anotaciones para cada punto si hay menos de 15 valores
-if len(df_filtered) < 15:
-    for i, row in df_filtered.iterrows():
-        plt.annotate(f'{row["F_bcra_dolar"]:.2f}', (row['ID_tie_date'], row['F_bcra_dolar']), textcoords="offset points", xytext=(0,10), ha='center')
-
-plt.xlabel('Fecha', fontsize=12)
-plt.ylabel('Tipo de Cambio del Dólar', fontsize=12)
-plt.title('Evolución Diaria del Tipo de Cambio del Dólar', fontsize=14, fontweight='bold')
-plt.legend(fontsize=12)
-plt.grid(True, linestyle='--', alpha=0.6)
-
-# Rotar las fechas en el eje x 90 grados
-plt.xticks(rotation=90)
-
-# Crear la carpeta images si no existe
-image_folder = 'images'
-if not os.path.exists(image_folder):
-    os.makedirs(image_folder)
-
-# Guardar el gráfico como imagen en PNG
-image_path = os.path.join(image_folder, 'dollar_graph.png')
-plt.savefig(image_path, format='png', dpi=300, bbox_inches='tight')
-
-print(f"El gráfico se ha guardado en {image_path}")
\ No newline at end of file
+URL = 'https://www.bcra.gob.ar/pdfs/publicacionesestadisticas/com3500.xls'
+
+# Ruta del gráfico
+IMAGE_PATH = os.path.join('images', 'dollar_graph.png')
+
+
+def fetch_data(url=URL):
+    """Descarga el archivo con petición condicional contra el caché local (SSL verificado con http_client.CA_BUNDLE)."""
+    return fetch(url)
+
+
+def parse_data(file_path):
+    """Lee el Excel del BCRA y devuelve un DataFrame con ID_tie_date y F_bcra_dolar."""
+    # Leer el archivo Excel y extraer solo las columnas C y D, eliminando las primeras 4 filas
+    df = pd.read_excel(file_path, usecols="C:D", names=["ID_tie_date", "F_bcra_dolar"], skiprows=4)
+
+    # Convertir la columna ID_tie_date a formato de fecha y F_bcra_dolar a float
+    df['ID_tie_date'] = pd.to_datetime(df['ID_tie_date'], errors='coerce').dt.date
+    df['F_bcra_dolar'] = pd.to_numeric(df['F_bcra_dolar'], errors='coerce')
+    return df
+
+
+def load_data(df, db_path=DB_PATH):
+    """Carga incremental de FT_BCRA_dolar.
+
+    Agrega solo las fechas posteriores a la última guardada y, para las ya guardadas,
+    reconcilia mes a mes contra el archivo: solo se reescriben los meses revisados y,
+    dentro de ellos, las fechas cuyo valor cambió o que ya no figuran en el archivo.
+    """
+    # Descartar filas sin fecha o sin valor (encabezados y pies del Excel)
+    df = df.dropna(subset=['ID_tie_date', 'F_bcra_dolar'])
+    # Una fila por fecha: si el archivo repite una fecha vale la última, como hacía la recarga completa
+    rows = list(dict(zip((d.isoformat() for d in df['ID_tie_date']), df['F_bcra_dolar'].astype(float))).items())
+
+    # Conexión compartida del hilo (WAL: la API sigue leyendo mientras se actualiza la serie)
+    conn = get_connection(db_path)
+
+    with conn:
+        last_date = fetch_all(conn, 'exchange_rate.last_date')[0][0]
+
+        # Fechas nuevas: un único executemany por lotes
+        new_rows = [row for row in rows if last_date is None or row[0] > last_date]
+        conn.executemany('INSERT INTO FT_BCRA_dolar (ID_tie_date, F_bcra_dolar) VALUES (?, ?)', new_rows)
+
+        # Reconciliación: los meses ya guardados cuyo conteo o suma difieren fueron revisados aguas arriba
+        revised_months = []
+        updated = deleted = 0
+        if last_date is not None:
+            conn.execute('DROP TABLE IF EXISTS temp.stage_bcra_dolar')
+            conn.execute('CREATE TEMP TABLE stage_bcra_dolar (ID_tie_date DATE PRIMARY KEY, F_bcra_dolar FLOAT)')
+            conn.executemany('INSERT OR REPLACE INTO temp.stage_bcra_dolar VALUES (?, ?)',
+                             [row for row in rows if row[0] <= last_date])
+            revised_months = [month for (month,) in conn.execute('''
+            SELECT month FROM (
+                SELECT substr(ID_tie_date, 1, 7) AS month, COUNT(*) AS n, ROUND(SUM(F_bcra_dolar), 6) AS total
+                FROM temp.stage_bcra_dolar GROUP BY month
+                EXCEPT
+                SELECT substr(ID_tie_date, 1, 7) AS month, COUNT(*) AS n, ROUND(SUM(F_bcra_dolar), 6) AS total
+                FROM FT_BCRA_dolar WHERE ID_tie_date <= ? GROUP BY month
+            )
+            ''', (last_date,))]
+
+            for month in revised_months:
+                cursor = conn.execute('''
+                INSERT INTO FT_BCRA_dolar (ID_tie_date, F_bcra_dolar)
+                SELECT ID_tie_date, F_bcra_dolar FROM temp.stage_bcra_dolar
+                WHERE ID_tie_date >= ? AND ID_tie_date < ?
+                ON CONFLICT (ID_tie_date) DO UPDATE SET F_bcra_dolar = excluded.F_bcra_dolar
+                WHERE F_bcra_dolar IS NOT excluded.F_bcra_dolar
+                ''', (f'{month}-01', f'{month}-32'))
+                updated += cursor.rowcount
+                # Fechas que el BCRA quitó del mes: sin esto el mes se vería revisado en cada ejecución
+                cursor = conn.execute('''
+                DELETE FROM FT_BCRA_dolar
+                WHERE ID_tie_date >= ? AND ID_tie_date < ?
+                  AND ID_tie_date NOT IN (SELECT ID_tie_date FROM temp.stage_bcra_dolar)
+                ''', (f'{month}-01', f'{month}-32'))
+                deleted += cursor.rowcount
+            conn.execute('DROP TABLE temp.stage_bcra_dolar')
+
+        if new_rows or updated or deleted:
+            bump_generation(conn, 'FT_BCRA_dolar')
+
+        # Meses con fechas nuevas o revisadas: derived.py recalcula solo esos
+        touched_months = {row[0][:7] for row in new_rows} | set(revised_months)
+        conn.executemany("INSERT OR IGNORE INTO derived_pending (source, Periodo) VALUES ('FT_BCRA_dolar', ?)",
+                         [(int(month.replace('-', '')),) for month in sorted(touched_months)])
+
+    # Agregados mensuales y dólar real de los meses encolados
+    refresh_derived(conn)
+
+    if revised_months:
+        print(f"Meses revisados por el BCRA: {', '.join(revised_months)}")
+    print(f"FT_BCRA_dolar: {len(new_rows)} fechas nuevas, {updated} valores actualizados, {deleted} fechas quitadas")
+    return {'inserted': len(new_rows), 'updated': updated, 'deleted': deleted, 'revised_months': revised_months}
+
+
+def query_data(date_from, date_until, db_path=DB_PATH):
+    """Cotizaciones guardadas entre las dos fechas, con las mismas columnas que parse_data."""
+    df = read_frame(get_connection(db_path), 'exchange_rate.series', {'date_from': date_from, 'date_to': date_until})
+    df['ID_tie_date'] = pd.to_datetime(df['ID_tie_date']).dt.date
+    return df
+
+
+def draw_figure(df_filtered, date_from):
+    """Dibuja el tipo de cambio diario de `df_filtered` en la figura actual de pyplot, sin guardarla."""
+    # matplotlib (backend Agg) se importa recién acá para que las cargas sin gráfico no paguen su costo
+    plt = get_pyplot()
+
+    # Graficar la evolución diaria del tipo de cambio del dólar
+    plt.figure(figsize=(10, 6))
+    plt.plot(df_filtered['ID_tie_date'], df_filtered['F_bcra_dolar'], marker='x', markersize=3, linestyle='-', color='lightblue', linewidth=1, label='Tipo de Cambio del Dólar')
+
+    # Añadir línea vertical para la fecha seleccionada en el primer parámetro
+    selected_date = pd.to_datetime(date_from).date()
+    plt.axvline(x=selected_date, color='red', linestyle='--', linewidth=1, label='Fecha de Inicio Seleccionada')
+
+    # Añadir anotaciones para el valor máximo, mínimo y último valor
+    max_value = df_filtered['F_bcra_dolar'].max()
+    min_value = df_filtered['F_bcra_dolar'].min()
+    last_value = df_filtered['F_bcra_dolar'].iloc[-1]
+    last_date = df_filtered['ID_tie_date'].iloc[-1]
+
+    plt.scatter(df_filtered['ID_tie_date'][df_filtered['F_bcra_dolar'] == max_value], max_value, color='green', zorder=5)
+    plt.scatter(df_filtered['ID_tie_date'][df_filtered['F_bcra_dolar'] == min_value], min_value, color='red', zorder=5)
+    plt.scatter(last_date, last_value, color='blue', zorder=5)
+
+    plt.text(df_filtered['ID_tie_date'][df_filtered['F_bcra_dolar'] == max_value].values[0], max_value, f'Max: {max_value:.2f}', fontsize=10, verticalalignment='top', color='green')
+    plt.text(df_filtered['ID_tie_date'][df_filtered['F_bcra_dolar'] == min_value].values[0], min_value, f'Min: {min_value:.2f}', fontsize=10, verticalalignment='top', color='red')
+    plt.text(last_date, last_value, f'Last: {last_value:.2f}', fontsize=10, verticalalignment='bottom', color='blue')
+
+    # Añadir anotaciones para cada punto si hay menos de 15 valores
+    if len(df_filtered) < 15:
+        for i, row in df_filtered.iterrows():
+            plt.annotate(f'{row["F_bcra_dolar"]:.2f}', (row['ID_tie_date'], row['F_bcra_dolar']), textcoords="offset points", xytext=(0,10), ha='center')
+
+    plt.xlabel('Fecha', fontsize=12)
+    plt.ylabel('Tipo de Cambio del Dólar', fontsize=12)
+    plt.title('Evolución Diaria del Tipo de Cambio del Dólar', fontsize=14, fontweight='bold')
+    plt.legend(fontsize=12)
+    plt.grid(True, linestyle='--', alpha=0.6)
+
+    # Rotar las fechas en el eje x 90 grados
+    plt.xticks(rotation=90)
+
+    return plt
+
+
+def plot_data(df, date_from, date_until, image_path=IMAGE_PATH, fmt=None, dpi=DEFAULT_DPI):
+    """Grafica la evolución diaria del tipo de cambio entre `date_from` y `date_until`.
+
+    No vuelve a dibujar si la imagen ya existe para los mismos datos y parámetros.
+    """
+    # Filtrar el DataFrame según el rango de fechas proporcionado para el gráfico
+    df_filtered = df[(df['ID_tie_date'] >= pd.to_datetime(date_from).date()) & (df['ID_tie_date'] <= pd.to_datetime(date_until).date())]
+    if df_filtered.empty:
+        print("No se encontraron datos para los filtros aplicados.")
+        return None
+
+    image_path = output_path(image_path, fmt)
+    key = render_key(df_filtered, {'chart': 'dollar', 'date_from': date_from, 'date_until': date_until, 'dpi': dpi})
+    if is_fresh(image_path, key):
+        print(f"El gráfico {image_path} ya está actualizado")
+        return image_path
+
+    plt = draw_figure(df_filtered, date_from)
+
+    # Guardar el gráfico (PNG, WebP o SVG) y registrar su huella
+    save_figure(plt, image_path, key, dpi)
+
+    print(f"El gráfico se ha guardado en {image_path}")
+    return image_path
+
+
+def main(argv=None):
+    # Configurar argparse para manejar los argumentos de línea de comandos
+    parser = argparse.ArgumentParser(description='Script para procesar datos de tipo de cambio del dólar del BCRA.')
+    parser.add_argument('date_from', type=str, help='Fecha de inicio para el gráfico (YYYY-MM-DD)')
+    parser.add_argument('date_until', type=str, help='Fecha de fin para el gráfico (YYYY-MM-DD)')
+    parser.add_argument('--force', action='store_true', help='Procesar aunque el archivo no haya cambiado')
+    parser.add_argument('--format', choices=FORMATS, default=None, help='Formato de la imagen (por defecto png)')
+    parser.add_argument('--dpi', type=int, default=DEFAULT_DPI, help='Resolución de la imagen')
+    args = parser.parse_args(argv)
+
+    # Tiempos, bytes y filas de cada etapa quedan en pipeline_runs
+    with Run('BCRA_exchangerate') as run:
+        with run.stage('fetch') as stage:
+            resultado = fetch_data()
+            stage.update(fetch_metrics(resultado))
+        if not resultado.ok:
+            run.status = 'error'
+            print(f"Error al descargar el archivo: HTTP {resultado.status_code}")
+            return 1
+
+        # Sin cambios se omiten el parseo y la carga; el gráfico se dibuja igual desde la base
+        # (plot_data no vuelve a dibujar si los datos y los parámetros son los mismos)
+        procesar = resultado.changed or args.force
+        if procesar:
+            print(f"Archivo descargado con éxito en {resultado.path}")
+            with run.stage('parse') as stage:
+                df = parse_data(resultado.path)
+                stage.update(parse_metrics(df))
+            with run.stage('load') as stage:
+                stage.update(load_metrics(load_data(df)))
+        else:
+            print("El archivo del BCRA no cambió desde la última ejecución; se omiten el parseo y la carga")
+        with run.stage('query'):
+            df = query_data(args.date_from, args.date_until)
+        with run.stage('render'):
+            plot_data(df, args.date_from, args.date_until, fmt=args.format, dpi=args.dpi)
+
+    if procesar:
+        # Registrar el contenido como procesado para saltear la próxima ejecución si no cambia
+        mark_processed(resultado)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
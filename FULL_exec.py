@@ -1,39 +1,161 @@
-import subprocess
+import argparse
+import sys
 from datetime import datetime
+from functools import partial
 
-# Function to execute a script with given parameters and a timeout
-def execute_script(script_name, params, timeout=1200):  # Increased timeout to 1200 seconds (20 minutes)
-    command = ['python', script_name] + params
+import BCRA_exchangerate
+import INDEC_employment
+import INDEC_inflation
+from fetch_cache import mark_processed
+from instrumentation import Run, fetch_metrics, load_metrics, parse_metrics
+from pipeline import Task, run_dag
+
+class FetchError(Exception):
+    pass
+
+# Stage helpers: module-level so the render stages can be pickled into the process pool
+def fetch_stage(fetch_data):
+    result = fetch_data()
+    if not result.ok:
+        raise FetchError(f"Download of {result.url} failed with HTTP {result.status_code}")
+    return result
+
+def parse_stage(parse_data, force, result):
+    # None tells the load stage that the source did not change
+    if not result.changed and not force:
+        print(f"{result.url} has not changed since the last run, skipping parse and load.")
+        return None
+    return parse_data(result.path)
+
+def apply_stage(func, extra_args, value):
+    return None if value is None else func(value, *extra_args)
+
+def after_stage(func, extra_args, *previous):
+    # Runs once `previous` finished, even if they were skipped (None): the query reads the DB, so the
+    # render still follows new parameters when the source did not change (plot_data skips identical charts)
+    return func(*extra_args)
+
+def mark_stage(result, *stages):
+    if all(stage is not None for stage in stages):
+        mark_processed(result)
+    return result.sha256
+
+# Validate the parameters up front, before any pipeline stage runs
+def validate_period(value, name):
+    try:
+        datetime.strptime(value, '%Y%m')
+    except ValueError:
+        raise ValueError(f"{name} must be a period in the format YYYYMM, got {value!r}")
+
+def validate_date(value, name):
     try:
-        result = subprocess.run(command, capture_output=True, text=True, timeout=timeout)
-        if result.returncode == 0:
-            print(f"{script_name} executed successfully.")
-            print(result.stdout)
-        else:
-            print(f"Error executing {script_name}: {result.stderr}")
-    except subprocess.TimeoutExpired:
-        print(f"Error: {script_name} timed out after {timeout} seconds.")
-
-# Parameters for INDEC_employment.py
-employment_params = ['Argentina']
-
-# Parameters for INDEC_inflation.py
-current_year = datetime.now().year
-current_month = datetime.now().month
-last_year = current_year - 1
-periodo_desde = f"{last_year}01"
-periodo_hasta = f"{current_year}{current_month:02d}"
-num_periodos_proyeccion = '1'  # Example value, adjust as needed
-inflation_params = [periodo_desde, periodo_hasta, num_periodos_proyeccion]
-
-# Calculate date_from and date_until for BCRA_exchangerate.py
-date_from = f"{last_year}-01-01"
-date_until = datetime.now().strftime("%Y-%m-%d")
-bcra_params = [date_from, date_until]
-
-# Execute INDEC_employment.py with an increased timeout
-execute_script('INDEC_employment.py', employment_params, timeout=1200)
-# Execute INDEC_inflation.py with an increased timeout
-execute_script('INDEC_inflation.py', inflation_params, timeout=1200)
-# Execute BCRA_exchangerate.py with an increased timeout
-execute_script('BCRA_exchangerate.py', bcra_params, timeout=1200)
\ No newline at end of file
+        return datetime.strptime(value, '%Y-%m-%d')
+    except ValueError:
+        raise ValueError(f"{name} must be a date in the format YYYY-MM-DD, got {value!r}")
+
+def validate_params(employment_params, inflation_params, bcra_params):
+    if len(employment_params) != 3:
+        raise ValueError("INDEC_employment.py needs highlight_country, year_from and year_until")
+    highlight_country, year_from, year_until = employment_params
+    if not highlight_country:
+        raise ValueError("highlight_country must not be empty")
+    if not (year_from.isdigit() and year_until.isdigit()) or int(year_from) > int(year_until):
+        raise ValueError(f"Invalid year range for INDEC_employment.py: {year_from}-{year_until}")
+
+    if len(inflation_params) != 3:
+        raise ValueError("INDEC_inflation.py needs periodo_desde, periodo_hasta and num_periodos_proyeccion")
+    periodo_desde, periodo_hasta, num_periodos_proyeccion = inflation_params
+    validate_period(periodo_desde, 'periodo_desde')
+    validate_period(periodo_hasta, 'periodo_hasta')
+    if periodo_desde > periodo_hasta:
+        raise ValueError(f"periodo_desde {periodo_desde} is after periodo_hasta {periodo_hasta}")
+    if not num_periodos_proyeccion.isdigit() or int(num_periodos_proyeccion) < 1:
+        raise ValueError("num_periodos_proyeccion must be a positive integer")
+
+    if len(bcra_params) != 2:
+        raise ValueError("BCRA_exchangerate.py needs date_from and date_until")
+    if validate_date(bcra_params[0], 'date_from') > validate_date(bcra_params[1], 'date_until'):
+        raise ValueError(f"date_from {bcra_params[0]} is after date_until {bcra_params[1]}")
+
+def build_tasks(employment_params, inflation_params, bcra_params, force=False):
+    # One fetch -> parse -> load -> render branch per indicator; independent branches run concurrently
+    highlight_country, year_from, year_until = employment_params
+    periodo_desde, periodo_hasta, num_periodos_proyeccion = inflation_params
+    date_from, date_until = bcra_params
+    return [
+        Task('employment.fetch', partial(fetch_stage, INDEC_employment.fetch_data), measure=fetch_metrics),
+        Task('employment.parse', partial(parse_stage, INDEC_employment.parse_data, force), deps=['employment.fetch'],
+             measure=parse_metrics),
+        Task('employment.load', partial(apply_stage, INDEC_employment.load_data, ()), deps=['employment.parse'],
+             measure=load_metrics),
+        # The chart's cross-country statistics are the rollups written by the load
+        Task('employment.query', partial(after_stage, INDEC_employment.query_data, (int(year_from), int(year_until))),
+             deps=['employment.load']),
+        Task('employment.render', partial(apply_stage, INDEC_employment.plot_data, (highlight_country, int(year_from), int(year_until))),
+             deps=['employment.query'], pool='process'),
+        Task('employment.mark', mark_stage, deps=['employment.fetch', 'employment.load', 'employment.render']),
+
+        Task('inflation.fetch', partial(fetch_stage, INDEC_inflation.fetch_data), measure=fetch_metrics),
+        Task('inflation.parse', partial(parse_stage, INDEC_inflation.parse_data, force), deps=['inflation.fetch'],
+             measure=parse_metrics),
+        Task('inflation.load', partial(apply_stage, INDEC_inflation.load_data, ()), deps=['inflation.parse'],
+             measure=load_metrics),
+        Task('inflation.query', partial(after_stage, INDEC_inflation.query_data, (periodo_desde, periodo_hasta)), deps=['inflation.load']),
+        Task('inflation.render', partial(apply_stage, INDEC_inflation.plot_data, (int(num_periodos_proyeccion),)),
+             deps=['inflation.query'], pool='process'),
+        Task('inflation.mark', mark_stage, deps=['inflation.fetch', 'inflation.load', 'inflation.render']),
+
+        Task('exchange_rate.fetch', partial(fetch_stage, BCRA_exchangerate.fetch_data), measure=fetch_metrics),
+        Task('exchange_rate.parse', partial(parse_stage, BCRA_exchangerate.parse_data, force), deps=['exchange_rate.fetch'],
+             measure=parse_metrics),
+        Task('exchange_rate.load', partial(apply_stage, BCRA_exchangerate.load_data, ()), deps=['exchange_rate.parse'],
+             measure=load_metrics),
+        Task('exchange_rate.query', partial(after_stage, BCRA_exchangerate.query_data, (date_from, date_until)),
+             deps=['exchange_rate.load']),
+        Task('exchange_rate.render', partial(apply_stage, BCRA_exchangerate.plot_data, (date_from, date_until)),
+             deps=['exchange_rate.query'], pool='process'),
+        Task('exchange_rate.mark', mark_stage, deps=['exchange_rate.fetch', 'exchange_rate.load', 'exchange_rate.render']),
+    ]
+
+def print_timings(timings):
+    for record in timings:
+        line = f"{record['task']:<22} attempt {record['attempt']}  {record['status']:<8} {record['seconds']:8.2f}s"
+        counts = [f"{field}={record[field]}" for field in ('bytes', 'rows_parsed', 'rows_written') if field in record]
+        print(f"{line}  {' '.join(counts)}" if counts else line)
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Run the employment, inflation and exchange rate pipelines.')
+    parser.add_argument('--force', action='store_true', help='Process every source even if it has not changed')
+    args = parser.parse_args()
+
+    current_year = datetime.now().year
+    current_month = datetime.now().month
+    last_year = current_year - 1
+
+    # Parameters for INDEC_employment.py
+    employment_params = ['Argentina', str(current_year - 15), str(current_year)]
+
+    # Parameters for INDEC_inflation.py
+    periodo_desde = f"{last_year}01"
+    periodo_hasta = f"{current_year}{current_month:02d}"
+    num_periodos_proyeccion = '1'  # Example value, adjust as needed
+    inflation_params = [periodo_desde, periodo_hasta, num_periodos_proyeccion]
+
+    # Calculate date_from and date_until for BCRA_exchangerate.py
+    date_from = f"{last_year}-01-01"
+    date_until = datetime.now().strftime("%Y-%m-%d")
+    bcra_params = [date_from, date_until]
+
+    validate_params(employment_params, inflation_params, bcra_params)
+
+    # Tiempos, bytes y filas de cada etapa quedan en pipeline_runs (expuestos en /metrics de app.py)
+    with Run('FULL_exec') as run:
+        results, timings, failures = run_dag(build_tasks(employment_params, inflation_params, bcra_params, force=args.force))
+        for record in timings:
+            run.add(record)
+        if failures:
+            run.status = 'error'
+    print_timings(timings)
+    for name, error in failures.items():
+        print(f"Error: {name} failed: {error}")
+    sys.exit(1 if failures else 0)
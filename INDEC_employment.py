@@ -1,227 +1,303 @@
-import requests
-import zipfile
-import io
+import sys
 import os
-import pandas as pd
-import matplotlib.pyplot as plt
-import sqlite3
-import shutil
+import numpy as np
 import argparse
-
-# Configurar argparse para manejar los argumentos de línea de comandos
-parser = argparse.ArgumentParser(description='Script to analyze employment data and highlight a specific country.')
-parser.add_argument('highlight_country', type=str, help='Country to highlight in the graph')
-parser.add_argument('year_from', type=int, help='Start year for the graph (YYYY)')
-parser.add_argument('year_until', type=int, help='End year for the graph (YYYY)')
-args = parser.parse_args()
-
-# Selección de país a analizar y rango de años
-highlight_country = args.highlight_country
-year_from = args.year_from
-year_until = args.year_until
-
-# Puedes usar cualquier estilo disponible en tu instalación de Matplotlib
-plt.style.use('ggplot')  # O elimina esta línea si prefieres el estilo por defecto
-
-# URL del archivo CSV comprimido
-url = 'https://api.worldbank.org/v2/es/indicator/SL.UEM.TOTL.ZS?downloadformat=csv&_gl=1*1amqro9*_gcl_au*MTU3Njg1MzAxOS4xNzI2MTgzMTYy'
-
-# Descargar el archivo ZIP
-response = requests.get(url)
-
-# Verificar si la descarga fue exitosa
-if response.status_code == 200:
-    # Obtener el directorio donde se encuentra el script
-    script_dir = os.path.dirname(os.path.abspath(__file__))
-
-    # Crear un directorio temporal en la misma ubicación del script
-    temp_dir = os.path.join(script_dir, 'DATA_empleo')
-    if not os.path.exists(temp_dir):
-        os.makedirs(temp_dir)
-
-    # Extraer el contenido del ZIP
-    with zipfile.ZipFile(io.BytesIO(response.content)) as z:
-        for file_name in z.namelist():
-            # Renombrar los archivos para que empiecen con DATA_empleo
-            new_file_name = f"DATA_empleo_{file_name}"
-            if os.path.exists(os.path.join(temp_dir, new_file_name)):
-                # Si el archivo ya existe, lo eliminamos
-                os.remove(os.path.join(temp_dir, new_file_name))
-            
-            # Extraer y renombrar el archivo
-            z.extract(file_name, temp_dir)
-            os.rename(os.path.join(temp_dir, file_name), os.path.join(temp_dir, new_file_name))
-
-    # Eliminar los archivos que contienen "Metadata"
-    for file in os.listdir(temp_dir):
-        if "Metadata" in file:
-            os.remove(os.path.join(temp_dir, file))
-
-    # Encontrar el archivo CSV que se extrajo, ignorando los archivos que contienen "Metadata"
-    csv_file = [file for file in os.listdir(temp_dir) if file.startswith('DATA_empleo') and file.endswith('.csv') and 'Metadata' not in file][0]
-
-    # Cargar el archivo CSV en un DataFrame
-    df = pd.read_csv(os.path.join(temp_dir, csv_file), skiprows=4)
-
-    # Conectar a la base de datos SQLite
-    db_path = os.path.join('databases', 'social_indicators.db')
-    conn = sqlite3.connect(db_path)
-    cursor = conn.cursor()
-
-    # Crear la tabla FT_world_employment si no existe
-    cursor.execute('''
-    CREATE TABLE IF NOT EXISTS FT_world_employment (
-        Country_Name TEXT,
-        Country_Code TEXT,
-        Indicator_Name TEXT,
-        Indicator_Code TEXT,
-        Year INTEGER,
-        Value REAL
-    )
-    ''')
-
-    # Insertar los datos del DataFrame en la tabla FT_world_employment
-    for index, row in df.iterrows():
-        for year in range(1960, 2022):
-            if not pd.isna(row[str(year)]):
-                cursor.execute('''
-                INSERT INTO FT_world_employment (Country_Name, Country_Code, Indicator_Name, Indicator_Code, Year, Value)
-                VALUES (?, ?, ?, ?, ?, ?)
-                ''', (row['Country Name'], row['Country Code'], row['Indicator Name'], row['Indicator Code'], year, row[str(year)]))
-
-    # Confirmar la inserción
-    conn.commit()
-
-    # Cerrar la conexión a la base de datos
-    conn.close()
-
-    # Eliminar la carpeta DATA_empleo y su contenido si existe
-    if os.path.exists(temp_dir):
-        shutil.rmtree(temp_dir)
-        print(f"Carpeta {temp_dir} eliminada con éxito")
-
-    # Limpiar las columnas, eliminando las innecesarias y las que no contienen valores numéricos
-    df_years = df.iloc[:, 4:-1]
-
-    # Eliminar columnas con todos los valores NaN
-    df_years_clean = df_years.dropna(axis=1, how='all')
-
-    # Convertir los índices (años) a enteros y los valores a numéricos
-    df_clean = df_years_clean.T.dropna(how='all')
-    df_clean.columns = df['Country Name']
-
-    # Filtrar los datos según el rango de años proporcionado
-    df_clean = df_clean.loc[str(year_from):str(year_until)]
-
-    # Asegurarse de que los índices sean enteros
-    df_clean.index = df_clean.index.astype(int)
-
-    # Calcular el promedio global anual (promedio por año)
-    global_average = df_clean.mean(axis=1)
-
-    # Identificar el país con el índice de desempleo más alto en el último período
-    last_year = df_clean.index[-1]
-    max_unemployment_country = df_clean.loc[last_year].idxmax()
-    max_unemployment_value = df_clean.loc[last_year].max()
-
-    # Identificar el país con el índice de desempleo más bajo en el último período
-    min_unemployment_country = df_clean.loc[last_year].idxmin()
-    min_unemployment_value = df_clean.loc[last_year].min()
-
-    # Crear el gráfico de la evolución anual del desempleo para todos los países
-    plt.figure(figsize=(14, 8))
-
-    # Graficar todos los países con líneas grises y sutiles
-    for country in df_clean.columns:
-        plt.plot(df_clean.index, df_clean[country], color='lightgray', alpha=0.3, linewidth=0.5)
-
-    # Resaltar la línea de Resaltado con marcadores y línea más gruesa
-    if highlight_country in df_clean.columns:
-        years = df_clean.index
-        unemployment_rate_arg = df_clean[highlight_country]
-        plt.plot(years, unemployment_rate_arg, marker="x", color='#74acdf', label=highlight_country, linewidth=1.5, markersize=4)
-
-        # Mostrar los valores para Resaltado sobre cada punto
-        for i, year in enumerate(years):
-            plt.annotate(f'{unemployment_rate_arg.iloc[i]:.1f}', 
-                         (year, unemployment_rate_arg.iloc[i]), 
-                         textcoords="offset points", 
-                         xytext=(0, 10),  # Desplazar el texto 10 puntos hacia arriba
-                         ha='center', fontsize=9, color='#0e2246')
-
-    # Resaltar el país con el índice de desempleo más alto en el último período
-    if max_unemployment_country in df_clean.columns:
-        max_unemployment_rate = df_clean[max_unemployment_country]
-        plt.plot(df_clean.index, max_unemployment_rate, marker="o", color='red', label=f'Peor Desempleo: {max_unemployment_country}', linewidth=2, markersize=6)
-
-        # Mostrar los valores para el país con el peor desempleo sobre cada punto
-        for i, year in enumerate(years):
-            plt.annotate(f'{max_unemployment_rate.iloc[i]:.1f}', 
-                         (year, max_unemployment_rate.iloc[i]), 
-                         textcoords="offset points", 
-                         xytext=(0, 10),  # Desplazar el texto 10 puntos hacia arriba
-                         ha='center', fontsize=9, color='red')
-
-    # Resaltar el país con el índice de desempleo más bajo en el último período
-    if min_unemployment_country in df_clean.columns:
-        min_unemployment_rate = df_clean[min_unemployment_country]
-        plt.plot(df_clean.index, min_unemployment_rate, marker="o", color='green', label=f'Mejor Desempleo: {min_unemployment_country}', linewidth=2, markersize=6)
-
-        # Mostrar los valores para el país con el mejor desempleo sobre cada punto
-        for i, year in enumerate(years):
-            plt.annotate(f'{min_unemployment_rate.iloc[i]:.1f}', 
-                         (year, min_unemployment_rate.iloc[i]), 
+from snapshot import read_snapshot, refresh_snapshot
+from worldbank import indicator_rollups, indicator_url, load_indicators, read_indicator_zip, year_columns
+from queries import read_frame
+from fetch_cache import fetch, mark_processed
+from instrumentation import Run, fetch_metrics, load_metrics, parse_metrics
+from database import DB_PATH, get_connection
+from render import DEFAULT_DPI, FORMATS, get_pyplot, is_fresh, output_path, render_key, save_figure
+
+# Indicador de desempleo del Banco Mundial y URL del archivo CSV comprimido
+INDICATOR = 'SL.UEM.TOTL.ZS'
+URL = indicator_url(INDICATOR)
+
+# Ruta del gráfico
+IMAGE_PATH = os.path.join('images', 'employment_graph.png')
+
+# Columnas de la consulta 'employment.chart' (y de la instantánea de FT_world_indicator)
+CHART_COLUMNS = ['Country_Code', 'Country_Name', 'Is_Aggregate', 'Year', 'Value']
+
+
+def fetch_data(url=URL):
+    """Descarga el archivo ZIP con petición condicional contra el caché local."""
+    return fetch(url)
+
+
+def parse_data(zip_path):
+    """Lee el CSV de datos del ZIP del Banco Mundial (sin archivos temporales) como DataFrame ancho."""
+    return read_indicator_zip(zip_path)
+
+
+def load_data(df, db_path=DB_PATH):
+    """Inserta la serie en formato largo en FT_world_indicator (FT_world_employment es una vista)."""
+    # Conexión compartida del hilo; el esquema lo crean las migraciones de database.py
+    conn = get_connection(db_path)
+
+    # Insertar los datos en formato largo con un único executemany (todas las columnas de años del CSV)
+    filas_insertadas = load_indicators(conn, df)
+    print(f"{filas_insertadas} filas insertadas en FT_world_indicator")
+
+    # Instantánea Parquet para las lecturas anchas (API y gráficos)
+    refresh_snapshot(conn, 'FT_world_indicator')
+    return filas_insertadas
+
+
+def query_data(year_from, year_until, db_path=DB_PATH):
+    """Series de desempleo de todos los países entre los dos años, desde la base.
+
+    Mismo formato ancho que el CSV del Banco Mundial ('Country Code', 'Country Name' y una
+    columna por año), más Is_Aggregate: sirve para dibujar sin volver a parsear el ZIP.
+    """
+    conn = get_connection(db_path)
+
+    # Todos los países: la instantánea Parquet (partición del indicador) si está al día
+    frame = read_snapshot(conn, 'FT_world_indicator', columns=CHART_COLUMNS, filters=[
+        ('Indicator_Code', '=', INDICATOR),
+        ('Year', '>=', int(year_from)),
+        ('Year', '<=', int(year_until)),
+    ])
+    if frame is None:
+        frame = read_frame(conn, 'employment.chart', {
+            'indicator': INDICATOR, 'year_from': int(year_from), 'year_to': int(year_until),
+        })
+    countries = frame.drop_duplicates('Country_Code').set_index('Country_Code')
+    df = frame.pivot(index='Country_Code', columns='Year', values='Value')
+    df.columns = df.columns.astype(str)
+    df.insert(0, 'Country Name', countries.loc[df.index, 'Country_Name'].to_numpy())
+    df.insert(1, 'Is_Aggregate', countries.loc[df.index, 'Is_Aggregate'].to_numpy())
+    return df.rename_axis(index='Country Code', columns=None).reset_index()
+
+
+def read_rollups(year_from, year_until, db_path=DB_PATH):
+    """Promedio y peor y mejor país de cada año (FT_world_indicator_rollup, solo países reales)."""
+    return read_frame(get_connection(db_path), 'employment.global', {
+        'indicator': INDICATOR, 'year_from': int(year_from), 'year_to': int(year_until),
+    })
+
+
+def frame_rollups(df):
+    """Mismas columnas que read_rollups, calculadas desde el DataFrame ancho de query_data.
+
+    Respaldo para bases sin FT_world_indicator_rollup (p. ej. migradas sin volver a cargar el ZIP).
+    """
+    if 'Is_Aggregate' in df:
+        df = df[~df['Is_Aggregate'].fillna(False).astype(bool)]
+    long_df = df.melt(id_vars=['Country Code'], value_vars=year_columns(df), var_name='Year', value_name='Value')
+    long_df = long_df.dropna(subset=['Value']).rename(columns={'Country Code': 'Country_Code'})
+    long_df['Year'] = long_df['Year'].astype(int)
+    long_df['Indicator_Code'] = INDICATOR
+    rollups = indicator_rollups(long_df).drop(columns='Indicator_Code')
+    names = df.set_index('Country Code')['Country Name']
+    rollups['Min_Country_Name'] = rollups['Min_Country'].map(names)
+    rollups['Max_Country_Name'] = rollups['Max_Country'].map(names)
+    return rollups
+
+
+def draw_figure(df, highlight_country, year_from, year_until, rollups):
+    """Dibuja el gráfico de desempleo en la figura actual de pyplot, sin guardarla (ver plot_data y charts.py).
+
+    Las estadísticas entre países salen de `rollups` (read_rollups); de `df` solo se dibujan las series.
+    Si `rollups` viene vacío se calculan desde `df` (frame_rollups).
+    """
+    if rollups.empty:
+        rollups = frame_rollups(df)
+    rollups = rollups.set_index('Year').loc[year_from:year_until]
+    if rollups.empty:
+        raise ValueError(f"No hay datos de países entre {year_from} y {year_until} para el promedio y el peor y mejor país")
+
+    # matplotlib (backend Agg) se importa recién acá para que las cargas sin gráfico no paguen su costo
+    plt = get_pyplot()
+    from matplotlib.collections import LineCollection
+
+    # Puedes usar cualquier estilo disponible en tu instalación de Matplotlib
+    with plt.style.context('ggplot'):  # O elimina esta línea si prefieres el estilo por defecto
+        # Las líneas grises son países: los agregados regionales ("Mundo", "Zona del euro") solo si se resaltan
+        if 'Is_Aggregate' in df:
+            df = df[~df['Is_Aggregate'].fillna(False).astype(bool) | (df['Country Name'] == highlight_country)]
+
+        # Quedarse solo con las columnas de años
+        df_years = df[year_columns(df)]
+
+        # Eliminar columnas con todos los valores NaN
+        df_years_clean = df_years.dropna(axis=1, how='all')
+
+        # Convertir los índices (años) a enteros y los valores a numéricos
+        df_clean = df_years_clean.T.dropna(how='all')
+        df_clean.columns = df['Country Name']
+
+        # Filtrar los datos según el rango de años proporcionado
+        df_clean = df_clean.loc[str(year_from):str(year_until)]
+
+        # Asegurarse de que los índices sean enteros
+        df_clean.index = df_clean.index.astype(int)
+
+        # Promedio global anual y países con el desempleo más alto y más bajo en el último período,
+        # precalculados en la carga sobre los países reales (worldbank.refresh_rollups)
+        global_average = rollups['Mean']
+        max_unemployment_country = rollups['Max_Country_Name'].iloc[-1]
+        min_unemployment_country = rollups['Min_Country_Name'].iloc[-1]
+
+        # Crear el gráfico de la evolución anual del desempleo para todos los países
+        plt.figure(figsize=(14, 8))
+
+        # Graficar todos los países con líneas grises y sutiles, en un único LineCollection (los NaN cortan la línea)
+        years_array = df_clean.index.to_numpy(dtype=float)
+        segments = [np.column_stack([years_array, df_clean.iloc[:, i].to_numpy(dtype=float)]) for i in range(df_clean.shape[1])]
+        plt.gca().add_collection(LineCollection(segments, colors='lightgray', alpha=0.3, linewidths=0.5))
+        plt.gca().autoscale_view()
+
+        # Resaltar la línea de Resaltado con marcadores y línea más gruesa
+        if highlight_country in df_clean.columns:
+            years = df_clean.index
+            unemployment_rate_arg = df_clean[highlight_country]
+            plt.plot(years, unemployment_rate_arg, marker="x", color='#74acdf', label=highlight_country, linewidth=1.5, markersize=4)
+
+            # Mostrar los valores para Resaltado sobre cada punto
+            for i, year in enumerate(years):
+                plt.annotate(f'{unemployment_rate_arg.iloc[i]:.1f}', 
+                             (year, unemployment_rate_arg.iloc[i]), 
+                             textcoords="offset points", 
+                             xytext=(0, 10),  # Desplazar el texto 10 puntos hacia arriba
+                             ha='center', fontsize=9, color='#0e2246')
+
+        # Resaltar el país con el índice de desempleo más alto en el último período
+        if max_unemployment_country in df_clean.columns:
+            max_unemployment_rate = df_clean[max_unemployment_country]
+            plt.plot(df_clean.index, max_unemployment_rate, marker="o", color='red', label=f'Peor Desempleo: {max_unemployment_country}', linewidth=2, markersize=6)
+
+            # Mostrar los valores para el país con el peor desempleo sobre cada punto
+            for i, year in enumerate(df_clean.index):
+                plt.annotate(f'{max_unemployment_rate.iloc[i]:.1f}', 
+                             (year, max_unemployment_rate.iloc[i]), 
+                             textcoords="offset points", 
+                             xytext=(0, 10),  # Desplazar el texto 10 puntos hacia arriba
+                             ha='center', fontsize=9, color='red')
+
+        # Resaltar el país con el índice de desempleo más bajo en el último período
+        if min_unemployment_country in df_clean.columns:
+            min_unemployment_rate = df_clean[min_unemployment_country]
+            plt.plot(df_clean.index, min_unemployment_rate, marker="o", color='green', label=f'Mejor Desempleo: {min_unemployment_country}', linewidth=2, markersize=6)
+
+            # Mostrar los valores para el país con el mejor desempleo sobre cada punto
+            for i, year in enumerate(df_clean.index):
+                plt.annotate(f'{min_unemployment_rate.iloc[i]:.1f}', 
+                             (year, min_unemployment_rate.iloc[i]), 
+                             textcoords="offset points", 
+                             xytext=(0, 10),  # Desplazar el texto 10 puntos hacia arriba
+                             ha='center', fontsize=9, color='green')
+
+        # Graficar el promedio global anual con una línea punteada
+        plt.plot(df_clean.index, global_average, color='slategray', linestyle='--', label='Promedio Global', linewidth=1.2)
+
+        # Mostrar los valores para el promedio global sobre cada punto
+        for i, year in enumerate(global_average.index):
+            plt.annotate(f'{global_average.iloc[i]:.1f}', 
+                         (year, global_average.iloc[i]), 
                          textcoords="offset points", 
-                         xytext=(0, 10),  # Desplazar el texto 10 puntos hacia arriba
-                         ha='center', fontsize=9, color='green')
-
-    # Graficar el promedio global anual con una línea punteada
-    plt.plot(df_clean.index, global_average, color='slategray', linestyle='--', label='Promedio Global', linewidth=1.2)
-
-    # Mostrar los valores para el promedio global sobre cada punto
-    for i, year in enumerate(global_average.index):
-        plt.annotate(f'{global_average.iloc[i]:.1f}', 
-                     (year, global_average.iloc[i]), 
-                     textcoords="offset points", 
-                     xytext=(0, -10),  # Desplazar el texto 10 puntos hacia abajo
-                     ha='center', fontsize=9, color='slategray')
-
-    # Personalizar el gráfico
-    plt.title(f'Evolución del Desempleo en Todos los Países (%) \n(Resaltado: {highlight_country}, Peor Desempleo: {max_unemployment_country}, Mejor Desempleo: {min_unemployment_country} y Promedio Global)', fontsize=18, fontweight='bold')
-    plt.xlabel('Año', fontsize=14)
-    plt.ylabel('Tasa de Desempleo (%)', fontsize=14)
+                         xytext=(0, -10),  # Desplazar el texto 10 puntos hacia abajo
+                         ha='center', fontsize=9, color='slategray')
+
+        # Personalizar el gráfico
+        plt.title(f'Evolución del Desempleo en Todos los Países (%) \n(Resaltado: {highlight_country}, Peor Desempleo: {max_unemployment_country}, Mejor Desempleo: {min_unemployment_country} y Promedio Global)', fontsize=18, fontweight='bold')
+        plt.xlabel('Año', fontsize=14)
+        plt.ylabel('Tasa de Desempleo (%)', fontsize=14)
     
-    # Personalizar la cuadrícula
-    plt.grid(True, which='both', linestyle=':', linewidth=0.3, alpha=0.7, color="#97c2dc")
+        # Personalizar la cuadrícula
+        plt.grid(True, which='both', linestyle=':', linewidth=0.3, alpha=0.7, color="#97c2dc")
 
-    # Aumentar el tamaño de los ticks
-    plt.xticks(rotation=90, fontsize=12)
-    plt.yticks(fontsize=12)
+        # Aumentar el tamaño de los ticks
+        plt.xticks(rotation=90, fontsize=12)
+        plt.yticks(fontsize=12)
 
-    # Añadir sombra al gráfico
-    plt.gca().patch.set_alpha(0.1)
+        # Añadir sombra al gráfico
+        plt.gca().patch.set_alpha(0.1)
 
-    # Mostrar la leyenda
-    plt.legend(fontsize=12)
+        # Mostrar la leyenda
+        plt.legend(fontsize=12)
 
-    # Ajustar el diseño del gráfico
-    plt.tight_layout()
-    
-    # Definir la ruta donde se guardará la imagen
-    image_path = 'images/employment_graph.png'
+        # Ajustar el diseño del gráfico
+        plt.tight_layout()
+
+    return plt
 
-    # Crear la carpeta static si no existe
-    if not os.path.exists('images'):
-        os.makedirs('images')
 
-    # Guardar el gráfico como imagen en PNG, reemplazando si ya existe
-    plt.savefig(image_path, format='png', dpi=300, bbox_inches='tight')
+def plot_data(df, highlight_country, year_from, year_until, image_path=IMAGE_PATH, fmt=None, dpi=DEFAULT_DPI,
+              db_path=DB_PATH):
+    """Grafica el desempleo de todos los países resaltando `highlight_country`, el peor, el mejor y el promedio.
+
+    El promedio y el peor y el mejor país se leen de la base: llamar después de load_data.
+    No vuelve a dibujar si la imagen ya existe para los mismos datos y parámetros.
+    """
+    if df.empty:
+        print("No se encontraron datos para los filtros aplicados.")
+        return None
+
+    image_path = output_path(image_path, fmt)
+    rollups = read_rollups(year_from, year_until, db_path)
+    key = render_key([df, rollups], {'chart': 'employment', 'highlight_country': highlight_country,
+                                     'year_from': year_from, 'year_until': year_until, 'dpi': dpi})
+    if is_fresh(image_path, key):
+        print(f"El gráfico {image_path} ya está actualizado")
+        return image_path
+
+    plt = draw_figure(df, highlight_country, year_from, year_until, rollups)
+
+    # Guardar el gráfico (PNG, WebP o SVG), reemplazando si ya existe, y registrar su huella
+    save_figure(plt, image_path, key, dpi)
 
     # Mostrar un mensaje de confirmación
     print(f"El gráfico se ha guardado en {image_path}")
-    
-    # Mostrar el gráfico
-    '''plt.show()'''
 
-else:
-    print("Error al descargar el archivo.")
\ No newline at end of file
+    return image_path
+
+
+def main(argv=None):
+    # Configurar argparse para manejar los argumentos de línea de comandos
+    parser = argparse.ArgumentParser(description='Script to analyze employment data and highlight a specific country.')
+    parser.add_argument('highlight_country', type=str, help='Country to highlight in the graph')
+    parser.add_argument('year_from', type=int, help='Start year for the graph (YYYY)')
+    parser.add_argument('year_until', type=int, help='End year for the graph (YYYY)')
+    parser.add_argument('--force', action='store_true', help='Process even if the source file has not changed')
+    parser.add_argument('--format', choices=FORMATS, default=None, help='Image format (png by default)')
+    parser.add_argument('--dpi', type=int, default=DEFAULT_DPI, help='Image resolution')
+    args = parser.parse_args(argv)
+
+    # Tiempos, bytes y filas de cada etapa quedan en pipeline_runs
+    with Run('INDEC_employment') as run:
+        with run.stage('fetch') as stage:
+            resultado = fetch_data()
+            stage.update(fetch_metrics(resultado))
+
+        # Verificar si la descarga fue exitosa
+        if not resultado.ok:
+            run.status = 'error'
+            print("Error al descargar el archivo.")
+            return 1
+
+        # Sin cambios se omiten el parseo y la carga; el gráfico se dibuja igual desde la base
+        # (plot_data no vuelve a dibujar si los datos y los parámetros son los mismos)
+        procesar = resultado.changed or args.force
+        if procesar:
+            with run.stage('parse') as stage:
+                df = parse_data(resultado.path)
+                stage.update(parse_metrics(df))
+            with run.stage('load') as stage:
+                stage.update(load_metrics(load_data(df)))
+        else:
+            print("El archivo del Banco Mundial no cambió desde la última ejecución; se omiten el parseo y la carga")
+        with run.stage('query'):
+            df = query_data(args.year_from, args.year_until)
+        with run.stage('render'):
+            plot_data(df, args.highlight_country, args.year_from, args.year_until, fmt=args.format, dpi=args.dpi)
+
+    if procesar:
+        # Registrar el contenido como procesado para saltear la próxima ejecución si no cambia
+        mark_processed(resultado)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
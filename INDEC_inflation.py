@@ -1,110 +1,90 @@
-import requests
+import sys
 import os
 import pandas as pd
-import matplotlib.pyplot as plt
-import numpy as np
-import sqlite3
 from io import StringIO
-import shutil
 import argparse
+from indec import IPC_DTYPES, upsert_ipc
+from projection import DEFAULT_LEVEL, forecast, next_periods
+from queries import read_frame
+from fetch_cache import fetch, mark_processed
+from database import DB_PATH, get_connection
+from derived import refresh_derived
+from instrumentation import Run, fetch_metrics, load_metrics, parse_metrics
+from render import DEFAULT_DPI, FORMATS, get_pyplot, is_fresh, output_path, render_key, save_figure
 
-# Configurar argparse para manejar los argumentos de línea de comandos
-parser = argparse.ArgumentParser(description='Script to analyze inflation data and project future periods.')
-parser.add_argument('periodo_desde', type=str, help='Start period in the format YYYYMM')
-parser.add_argument('periodo_hasta', type=str, help='End period in the format YYYYMM')
-parser.add_argument('num_periodos_proyeccion', type=int, help='Number of periods to project forward')
-args = parser.parse_args()
+# URL del archivo CSV
+URL = 'https://www.indec.gob.ar/ftp/cuadros/economia/serie_ipc_divisiones.csv'
 
-# Asignar los argumentos a variables
-periodo_desde = args.periodo_desde
-periodo_hasta = args.periodo_hasta
-num_periodos_proyeccion = args.num_periodos_proyeccion
+# Ruta del gráfico
+IMAGE_PATH = os.path.join('images', 'inflation_graph.png')
 
-# URL del archivo CSV
-url = 'https://www.indec.gob.ar/ftp/cuadros/economia/serie_ipc_divisiones.csv'
 
-# Descargar el archivo CSV
-response = requests.get(url)
-csv_content = response.content.decode('latin1')
+def fetch_data(url=URL):
+    """Descarga el archivo CSV con petición condicional contra el caché local."""
+    return fetch(url)
 
-# Leer el contenido del CSV directamente en un DataFrame
-df = pd.read_csv(StringIO(csv_content), encoding='latin1', delimiter=';')
 
-# Conectar a la base de datos SQLite en la carpeta databases
-db_path = os.path.join('databases', 'social_indicators.db')
-conn = sqlite3.connect(db_path)
-cursor = conn.cursor()
+def parse_data(file_path):
+    """Lee el CSV de INDEC (latin1, separado por ';') con los valores ya numéricos."""
+    with open(file_path, 'rb') as file:
+        csv_content = file.read().decode('latin1')
 
-# Insertar los datos del DataFrame en la tabla FT_indec_ipc
-df.to_sql('FT_indec_ipc', conn, if_exists='append', index=False)
+    # La coma decimal se convierte al parsear; Periodo queda como entero YYYYMM y "NA" como NaN
+    return pd.read_csv(StringIO(csv_content), delimiter=';', decimal=',', dtype=IPC_DTYPES)
 
-# Confirmar la inserción
-conn.commit()
 
-# Eliminar la carpeta DATA_ipc y su contenido si existe
-folder_path = 'DATA_ipc'
-if os.path.exists(folder_path):
-    shutil.rmtree(folder_path)
+def load_data(df, db_path=DB_PATH):
+    """Inserta solo los períodos nuevos o revisados en la tabla FT_indec_ipc."""
+    conn = get_connection(db_path)
+    resultado = upsert_ipc(conn, df)
+    print(f"FT_indec_ipc: {resultado['inserted']} filas insertadas, {resultado['updated']} actualizadas, {resultado['unchanged']} sin cambios")
 
-# Consultar los datos desde la base de datos
-query = f"""
-SELECT Periodo, Descripcion, Region, v_m_IPC
-FROM FT_indec_ipc
-WHERE Descripcion = 'NIVEL GENERAL'
-AND Region = 'Nacional'
-AND Periodo >= '{periodo_desde}'
-AND Periodo <= '{periodo_hasta}'
-"""
-df_filtered = pd.read_sql_query(query, conn)
+    # Variaciones interanual y acumulada (y dólar real) de los períodos encolados
+    refresh_derived(conn)
+    return resultado
 
-# Cerrar la conexión a la base de datos
-conn.close()
 
-# Asegurarse de que la columna "Periodo" esté en formato de texto
-df_filtered['Periodo'] = df_filtered['Periodo'].astype(str)
+def query_data(periodo_desde, periodo_hasta, db_path=DB_PATH):
+    """Devuelve la variación mensual del NIVEL GENERAL Nacional entre los dos períodos."""
+    # Una sola serie: la búsqueda por índice en SQLite es más rápida que abrir la instantánea Parquet
+    df_filtered = read_frame(get_connection(db_path), 'inflation.series', {
+        'division': 'NIVEL GENERAL',
+        'region': 'Nacional',
+        'period_from': int(periodo_desde),
+        'period_to': int(periodo_hasta),
+    })
 
-# Ordenar el DataFrame por "Periodo"
-df_filtered = df_filtered.sort_values(by='Periodo')
+    # Asegurarse de que la columna "Periodo" esté en formato de texto
+    df_filtered['Periodo'] = df_filtered['Periodo'].astype(str)
 
-# Convertir la columna 'v_m_IPC' a numérico, manejando las comas como decimales y NaNs
-df_filtered['v_m_IPC'] = df_filtered['v_m_IPC'].str.replace(',', '.').astype(float)
+    # Ordenar el DataFrame por "Periodo"
+    return df_filtered.sort_values(by='Periodo', ignore_index=True)
 
-# Mostrar las primeras filas después del filtrado y conversión para verificación
-print(df_filtered.head())
 
-# Verificar si el DataFrame tiene datos
-if not df_filtered.empty:
+def draw_figure(df_filtered, num_periodos_proyeccion):
+    """Dibuja la variación mensual del IPC y su proyección en la figura actual de pyplot, sin guardarla."""
+    # matplotlib (backend Agg) se importa recién acá para que las cargas sin gráfico no paguen su costo
+    plt = get_pyplot()
+
     # Cálculo de estadísticas
     promedio_total = df_filtered['v_m_IPC'].mean()
     minimo_total = df_filtered['v_m_IPC'].min()
     maximo_total = df_filtered['v_m_IPC'].max()
 
-    # Generar una proyección sencilla basada en la tendencia de los últimos 6 períodos
-    ultimos_periodos = df_filtered['v_m_IPC'].tail(6)
-    pendiente = np.polyfit(range(6), ultimos_periodos, 1)[0]  # Calcula la pendiente de los últimos 6 períodos
-    proyeccion = [ultimos_periodos.iloc[-1] + pendiente * i for i in range(1, num_periodos_proyeccion + 1)]  # Proyección de los próximos N períodos
+    # Proyección por tendencia lineal de los últimos 6 períodos, con su intervalo de predicción (projection.py)
+    proyeccion = forecast(df_filtered['v_m_IPC'].to_numpy()[None, :], num_periodos_proyeccion, models=['linear'])['linear']
 
     # Crear los próximos N períodos según la cantidad que el usuario haya solicitado
-    ult_periodo = df_filtered['Periodo'].iloc[-1]
-    anio = int(ult_periodo[:4])
-    mes = int(ult_periodo[4:])
-
-    proximos_periodos = []
-    for i in range(1, num_periodos_proyeccion + 1):
-        mes += 1
-        if mes > 12:
-            mes = 1
-            anio += 1
-        proximos_periodos.append(f'{anio}{mes:02d}')
+    proximos_periodos = [str(periodo) for periodo in next_periods(df_filtered['Periodo'].iloc[-1], num_periodos_proyeccion)]
 
     # Añadir la proyección al DataFrame original para graficar
     df_proyeccion = pd.DataFrame({
         'Periodo': proximos_periodos,
-        'v_m_IPC': proyeccion
+        'v_m_IPC': proyeccion.mean[0],
+        'inferior': proyeccion.lower[0],
+        'superior': proyeccion.upper[0],
     })
 
-    df_total = pd.concat([df_filtered, df_proyeccion])
-
     # Graficar la variación mensual del IPC (v_m_IPC) en el eje Y y el periodo en el eje X
     plt.figure(figsize=(10, 6))
 
@@ -113,12 +93,14 @@ if not df_filtered.empty:
 
     # Graficar la proyección con línea punteada y color diferente
     plt.plot(df_proyeccion['Periodo'], df_proyeccion['v_m_IPC'], marker='x', color='lightslategray', linestyle='--', linewidth=1, label='Proyección')
+    plt.fill_between(df_proyeccion['Periodo'], df_proyeccion['inferior'], df_proyeccion['superior'], color='lightslategray', alpha=0.15,
+                     label=f'Intervalo {DEFAULT_LEVEL:.0%}')
 
     # Agregar sombreado al área bajo la curva
     plt.fill_between(df_filtered['Periodo'], df_filtered['v_m_IPC'], color='#aec7e8', alpha=0.3)
 
     # Título con más detalle y fuente más grande
-    plt.title(f'Variación Mensual del IPC', fontsize=14, fontweight='bold')
+    plt.title('Variación Mensual del IPC', fontsize=14, fontweight='bold')
 
     # Etiquetas de los ejes
     plt.xlabel('Periodo', fontsize=12)
@@ -153,15 +135,30 @@ if not df_filtered.empty:
     # Añadir leyenda
     plt.legend()
 
-    # Definir la ruta donde se guardará la imagen
-    image_path = 'images/inflation_graph.png'
+    return plt
+
+
+def plot_data(df_filtered, num_periodos_proyeccion, image_path=IMAGE_PATH, fmt=None, dpi=DEFAULT_DPI):
+    """Grafica la variación mensual del IPC y su proyección a `num_periodos_proyeccion` períodos.
+
+    No vuelve a dibujar si la imagen ya existe para los mismos datos y parámetros.
+    """
+    # Verificar si el DataFrame tiene datos
+    if df_filtered.empty:
+        print("No se encontraron datos para los filtros aplicados.")
+        return None
+
+    image_path = output_path(image_path, fmt)
+    key = render_key(df_filtered, {'chart': 'inflation', 'num_periodos_proyeccion': num_periodos_proyeccion, 'model': 'linear',
+                                  'level': DEFAULT_LEVEL, 'dpi': dpi})
+    if is_fresh(image_path, key):
+        print(f"El gráfico {image_path} ya está actualizado")
+        return image_path
 
-    # Crear la carpeta static si no existe
-    if not os.path.exists('images'):
-        os.makedirs('images')
+    plt = draw_figure(df_filtered, num_periodos_proyeccion)
 
-    # Guardar el gráfico como imagen en PNG, reemplazando si ya existe
-    plt.savefig(image_path, format='png', dpi=300, bbox_inches='tight')
+    # Guardar el gráfico (PNG, WebP o SVG), reemplazando si ya existe, y registrar su huella
+    save_figure(plt, image_path, key, dpi)
 
     # Mostrar un mensaje de confirmación
     print(f"El gráfico se ha guardado en {image_path}")
@@ -169,5 +166,51 @@ if not df_filtered.empty:
     # Mostrar el gráfico
     '''plt.show()'''
 
-else:
-    print("No se encontraron datos para los filtros aplicados.")
\ No newline at end of file
+    return image_path
+
+
+def main(argv=None):
+    # Configurar argparse para manejar los argumentos de línea de comandos
+    parser = argparse.ArgumentParser(description='Script to analyze inflation data and project future periods.')
+    parser.add_argument('periodo_desde', type=str, help='Start period in the format YYYYMM')
+    parser.add_argument('periodo_hasta', type=str, help='End period in the format YYYYMM')
+    parser.add_argument('num_periodos_proyeccion', type=int, help='Number of periods to project forward')
+    parser.add_argument('--force', action='store_true', help='Process even if the source file has not changed')
+    parser.add_argument('--format', choices=FORMATS, default=None, help='Image format (png by default)')
+    parser.add_argument('--dpi', type=int, default=DEFAULT_DPI, help='Image resolution')
+    args = parser.parse_args(argv)
+
+    # Tiempos, bytes y filas de cada etapa quedan en pipeline_runs
+    with Run('INDEC_inflation') as run:
+        with run.stage('fetch') as stage:
+            resultado = fetch_data()
+            stage.update(fetch_metrics(resultado))
+        if not resultado.ok:
+            run.status = 'error'
+            print(f"Error al descargar el archivo: HTTP {resultado.status_code}")
+            return 1
+
+        # Sin cambios se omiten el parseo y la carga; el gráfico se dibuja igual desde la base
+        # (plot_data no vuelve a dibujar si los datos y los parámetros son los mismos)
+        procesar = resultado.changed or args.force
+        if procesar:
+            with run.stage('parse') as stage:
+                df = parse_data(resultado.path)
+                stage.update(parse_metrics(df))
+            with run.stage('load') as stage:
+                stage.update(load_metrics(load_data(df)))
+        else:
+            print("La serie de IPC no cambió desde la última ejecución; se omiten el parseo y la carga")
+        with run.stage('query'):
+            df_filtered = query_data(args.periodo_desde, args.periodo_hasta)
+        with run.stage('render'):
+            image_path = plot_data(df_filtered, args.num_periodos_proyeccion, fmt=args.format, dpi=args.dpi)
+
+    if procesar and image_path is not None:
+        # Registrar el contenido como procesado para saltear la próxima ejecución si no cambia
+        mark_processed(resultado)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
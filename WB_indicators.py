@@ -0,0 +1,47 @@
+import argparse
+import sys
+
+from instrumentation import Run
+from worldbank import DEFAULT_WORKERS, ingest_indicators
+
+# Indicadores del Banco Mundial que se siguen por defecto (desempleo y mercado laboral)
+DEFAULT_CODES = [
+    'SL.UEM.TOTL.ZS',     # Desempleo, total (% de la población activa)
+    'SL.UEM.TOTL.FE.ZS',  # Desempleo, mujeres
+    'SL.UEM.TOTL.MA.ZS',  # Desempleo, varones
+    'SL.UEM.1524.ZS',     # Desempleo juvenil (15-24 años)
+    'SL.TLF.CACT.ZS',     # Tasa de participación en la fuerza laboral
+    'SL.EMP.TOTL.SP.ZS',  # Relación empleo-población
+]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Descarga y carga indicadores del Banco Mundial en FT_world_indicator.')
+    parser.add_argument('codes', nargs='*', default=DEFAULT_CODES, help='Códigos de indicador (p. ej. SL.UEM.TOTL.ZS)')
+    parser.add_argument('--workers', type=int, default=DEFAULT_WORKERS, help='Descargas simultáneas')
+    parser.add_argument('--force', action='store_true', help='Cargar aunque los archivos no hayan cambiado')
+    args = parser.parse_args(argv)
+
+    # Descargas y cargas van en paralelo dentro de ingest_indicators: se registra una sola etapa
+    with Run('WB_indicators') as run:
+        with run.stage('ingest') as stage:
+            summary = ingest_indicators(args.codes, max_workers=args.workers, force=args.force)
+            stage['rows_written'] = sum(rows for rows in summary.values() if isinstance(rows, int))
+
+        errores = 0
+        for code in args.codes:
+            resultado = summary[code]
+            if isinstance(resultado, Exception):
+                errores += 1
+                print(f"{code}: error: {resultado}")
+            elif resultado:
+                print(f"{code}: {resultado} filas cargadas")
+            else:
+                print(f"{code}: sin cambios")
+        if errores:
+            run.status = 'error'
+    return 1 if errores else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1,36 +1,499 @@
-from flask import Flask, jsonify
+from flask import Flask, g, jsonify, request
 from flask_cors import CORS
-import sqlite3
+from database import ConnectionPool, read_generations
+from instrumentation import LatencyHistogram, run_metrics
+import queries
+from queries import fetch_all, json_list
+from snapshot import read_snapshot
+from render import DEFAULT_DPI, DEFAULT_FORMAT, FORMATS, MIMETYPES
+import charts
+from collections import OrderedDict
 from datetime import datetime, timedelta
+from functools import wraps
+import concurrent.futures
+import hashlib
+import logging
+import threading
+import time
 
 app = Flask(__name__)
 CORS(app)  # Enable CORS for all routes
 
+# Connections are reused across requests instead of opening one per call
+pool = ConnectionPool()
+
+# One prepared statement per filter combination of /get_inflation_data, keyed by (region given, division given)
+INFLATION_QUERIES = {
+    (False, False): 'inflation.all',
+    (True, False): 'inflation.by_region',
+    (False, True): 'inflation.by_division',
+    (True, True): 'inflation.by_region_division',
+}
+
+# World Bank indicator loaded by INDEC_employment.py (default for the employment endpoints)
+UNEMPLOYMENT_INDICATOR = 'SL.UEM.TOTL.ZS'
+
+# Column order of /get_employment_data rows, same as the employment.all and employment.by_country queries
+EMPLOYMENT_COLUMNS = ['Country_Code', 'Country_Name', 'Year', 'Value']
+
+DEFAULT_LIMIT = 15
+MAX_LIMIT = 5000
+
+# How often the ingest generation counters are re-read; in between, cached responses skip the DB
+GENERATION_CHECK_SECONDS = 5
+# Fallback expiry for cached responses, even if no generation change was seen
+CACHE_TTL_SECONDS = 300
+# Browser cache lifetime; after it the browser revalidates with If-None-Match
+CLIENT_MAX_AGE_SECONDS = 60
+# Upper bound on distinct cached URLs (query strings are client-controlled)
+CACHE_MAX_ENTRIES = 512
+
+# Rendered chart images kept in memory, bounded by total size; least recently used are evicted first
+CHART_CACHE_MAX_BYTES = 64 * 1024 * 1024
+# How long a request waits for the process pool to render a chart
+CHART_TIMEOUT_SECONDS = 30
+MIN_DPI, MAX_DPI = 50, 300
+MAX_PROJECTION_PERIODS = 24
+
+# Latency of every request, labelled by route (not raw path, to bound the label set), method and status
+request_latency = LatencyHistogram('http_request_duration_seconds', 'API request latency',
+                                   ['endpoint', 'method', 'status'])
+
+class BadRequest(ValueError):
+    pass
+
+@app.before_request
+def start_timer():
+    g.request_started = time.perf_counter()
+
+@app.after_request
+def record_latency(response):
+    started = g.pop('request_started', None)
+    if started is not None:
+        endpoint = request.url_rule.rule if request.url_rule is not None else 'unmatched'
+        request_latency.observe((endpoint, request.method, str(response.status_code)), time.perf_counter() - started)
+    return response
+
+@app.errorhandler(BadRequest)
+def handle_bad_request(error):
+    return jsonify({'error': str(error)}), 400
+
+def parse_date_arg(name, default):
+    value = request.args.get(name)
+    if value is None:
+        return default
+    try:
+        return datetime.strptime(value, '%Y-%m-%d').strftime('%Y-%m-%d')
+    except ValueError:
+        raise BadRequest(f"'{name}' must be a date in the format YYYY-MM-DD")
+
+def parse_limit_arg(default=DEFAULT_LIMIT):
+    value = request.args.get('limit')
+    if value is None:
+        return default
+    if not value.isdigit() or not 1 <= int(value) <= MAX_LIMIT:
+        raise BadRequest(f"'limit' must be an integer between 1 and {MAX_LIMIT}")
+    return int(value)
+
+def parse_offset_arg():
+    value = request.args.get('offset')
+    if value is None:
+        return 0
+    if not value.isdigit():
+        raise BadRequest("'offset' must be a non-negative integer")
+    return int(value)
+
+def parse_period_arg(name, default):
+    value = request.args.get(name)
+    if value is None:
+        return default
+    try:
+        return int(datetime.strptime(value, '%Y%m').strftime('%Y%m'))
+    except ValueError:
+        raise BadRequest(f"'{name}' must be a period in the format YYYYMM")
+
+def parse_month_arg(name, default):
+    value = request.args.get(name)
+    if value is None:
+        return default
+    try:
+        return datetime.strptime(value, '%Y-%m').strftime('%Y-%m')
+    except ValueError:
+        raise BadRequest(f"'{name}' must be a month in the format YYYY-MM")
+
+def parse_year_arg(name, default):
+    value = request.args.get(name)
+    if value is None:
+        return default
+    if not value.isdigit() or len(value) != 4:
+        raise BadRequest(f"'{name}' must be a year in the format YYYY")
+    return int(value)
+
+def parse_int_arg(name, default, low, high):
+    value = request.args.get(name)
+    if value is None:
+        return default
+    if not value.isdigit() or not low <= int(value) <= high:
+        raise BadRequest(f"'{name}' must be an integer between {low} and {high}")
+    return int(value)
+
+def parse_chart_args(chart):
+    # Parameters of each chart; also part of its chart_cache key
+    if chart == 'employment':
+        return {
+            'country': request.args.get('country', 'ARG').upper(),
+            'year_from': parse_year_arg('from', 2005),
+            'year_to': parse_year_arg('to', 9999),
+        }
+    if chart == 'inflation':
+        return {
+            'period_from': parse_period_arg('from', 0),
+            'period_to': parse_period_arg('to', 999999),
+            'horizon': parse_int_arg('horizon', 3, 1, MAX_PROJECTION_PERIODS),
+        }
+    date_90_days_ago = datetime.now() - timedelta(days=90)
+    return {
+        'date_from': parse_date_arg('from', date_90_days_ago.strftime('%Y-%m-%d')),
+        'date_to': parse_date_arg('to', '9999-12-31'),
+    }
+
+def query_rows(name, params):
+    # Named, parameterized statements from queries.py, prepared once per pooled connection
+    with pool.connection() as conn:
+        return fetch_all(conn, name, params)
+
+class ResponseCache:
+    """In-memory cache of serialized responses, keyed by URL and ingest generation."""
+
+    def __init__(self, ttl=CACHE_TTL_SECONDS, generation_check=GENERATION_CHECK_SECONDS, max_entries=CACHE_MAX_ENTRIES):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.generation_check = generation_check
+        self._entries = {}
+        self._generations = {}
+        self._generations_checked = 0.0
+        self._lock = threading.Lock()
+
+    def generations(self, tables):
+        now = time.monotonic()
+        with self._lock:
+            stale = now - self._generations_checked >= self.generation_check
+        if stale:
+            with pool.connection() as conn:
+                generations = read_generations(conn)
+            with self._lock:
+                self._generations = generations
+                self._generations_checked = now
+        with self._lock:
+            return tuple(self._generations.get(table, 0) for table in tables)
+
+    def get(self, key, generation):
+        with self._lock:
+            entry = self._entries.get(key)
+        if entry is None or entry['generation'] != generation or entry['expires'] < time.monotonic():
+            return None
+        return entry
+
+    def put(self, key, generation, body, mimetype):
+        entry = {
+            'generation': generation,
+            'body': body,
+            'mimetype': mimetype,
+            'etag': hashlib.sha1(body).hexdigest(),
+            'expires': time.monotonic() + self.ttl,
+        }
+        with self._lock:
+            self._entries.pop(key, None)
+            if len(self._entries) >= self.max_entries:
+                # Dicts keep insertion order: drop the oldest entry
+                del self._entries[next(iter(self._entries))]
+            self._entries[key] = entry
+        return entry
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._generations_checked = 0.0
+
+response_cache = ResponseCache()
+
+class ChartCache:
+    """LRU cache of rendered chart images, bounded by total bytes.
+
+    Keys include the ingest generation of the chart's source table, so entries for
+    outdated data are never served and simply age out.
+    """
+
+    def __init__(self, max_bytes=CHART_CACHE_MAX_BYTES):
+        self.max_bytes = max_bytes
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self.renders = 0
+        self._entries = OrderedDict()
+        self._pending = {}
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry
+
+    def put(self, key, body, mimetype):
+        entry = {'body': body, 'mimetype': mimetype, 'etag': hashlib.sha1(body).hexdigest()}
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self.size -= len(old['body'])
+            if len(body) > self.max_bytes:
+                return entry
+            while self.size + len(body) > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self.size -= len(evicted['body'])
+            self._entries[key] = entry
+            self.size += len(body)
+        return entry
+
+    def render(self, key, mimetype, submit):
+        """Return the entry for `key`, calling `submit()` for a Future of the image bytes on a miss.
+
+        Concurrent misses for the same key wait on a single render.
+        """
+        entry = self.get(key)
+        if entry is not None:
+            return entry
+        with self._lock:
+            future = self._pending.get(key)
+            if future is None:
+                future = self._pending[key] = submit()
+                self.renders += 1
+                future.add_done_callback(lambda done: self._forget(key, done))
+        return self.put(key, future.result(timeout=CHART_TIMEOUT_SECONDS), mimetype)
+
+    def _forget(self, key, future):
+        with self._lock:
+            if self._pending.get(key) is future:
+                del self._pending[key]
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.size = 0
+
+chart_cache = ChartCache()
+
+def cacheable_response(entry):
+    """Response for a cached body with ETag and Cache-Control, or 304 if the client already has it."""
+    if entry['etag'] in request.if_none_match:
+        response = app.response_class(status=304)
+    else:
+        response = app.response_class(entry['body'], mimetype=entry['mimetype'])
+    response.set_etag(entry['etag'])
+    response.cache_control.public = True
+    response.cache_control.max_age = CLIENT_MAX_AGE_SECONDS
+    return response
+
+def cached_response(*tables):
+    """Serve the view from `response_cache` until one of `tables` is re-ingested.
+
+    Sets ETag and Cache-Control and answers If-None-Match with 304 Not Modified.
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            key = request.full_path
+            generation = response_cache.generations(tables)
+            entry = response_cache.get(key, generation)
+            if entry is None:
+                response = app.make_response(view(*args, **kwargs))
+                if response.status_code != 200:
+                    return response
+                entry = response_cache.put(key, generation, response.get_data(), response.mimetype)
+            return cacheable_response(entry)
+        return wrapper
+    return decorator
+
 @app.route('/get_exchange_rate_data')
+@cached_response('FT_BCRA_dolar')
 def get_exchange_rate_data():
-    conn = sqlite3.connect('databases/social_indicators.db')
-    cursor = conn.cursor()
-
-    # Calculate the date 15 days ago
+    # By default, the last 15 days of exchange rate data
     date_15_days_ago = datetime.now() - timedelta(days=15)
-    date_15_days_ago_str = date_15_days_ago.strftime('%Y-%m-%d')
-
-    # Query the database for the last 15 days of exchange rate data
-    cursor.execute('''
-        SELECT ID_tie_date, F_bcra_dolar
-        FROM FT_BCRA_dolar
-        WHERE ID_tie_date >= ?
-        ORDER BY ID_tie_date DESC
-        LIMIT 15
-    ''', (date_15_days_ago_str,))
+    date_from = parse_date_arg('from', date_15_days_ago.strftime('%Y-%m-%d'))
+    date_to = parse_date_arg('to', '9999-12-31')
+    limit = parse_limit_arg()
 
-    rows = cursor.fetchall()
-    conn.close()
+    # Range scan over the ID_tie_date primary key, read backwards, so no full scan or sort is needed
+    rows = query_rows('exchange_rate.range', {'date_from': date_from, 'date_to': date_to, 'limit': limit})
 
     # Convert the rows to a list of dictionaries
     exchange_rate_data = [{'date': row[0], 'rate': row[1]} for row in rows]
 
     return jsonify(exchange_rate_data)
 
+@app.route('/get_exchange_rate_monthly_data')
+@cached_response('FT_BCRA_dolar_mensual')
+def get_exchange_rate_monthly_data():
+    # Monthly aggregates precomputed by derived.py; the request is a primary key range lookup
+    month_from = parse_month_arg('from', '0000-01')
+    month_to = parse_month_arg('to', '9999-12')
+    rows = query_rows('exchange_rate.monthly', {
+        'period_from': int(month_from.replace('-', '')), 'period_to': int(month_to.replace('-', '')),
+    })
+
+    return jsonify([
+        {'month': row[0], 'mean': row[1], 'min': row[2], 'max': row[3], 'days': row[4], 'close': row[5]}
+        for row in rows
+    ])
+
+@app.route('/get_real_exchange_rate_data')
+@cached_response('FT_dolar_real')
+def get_real_exchange_rate_data():
+    # Monthly mean rate deflated by the national CPI (NIVEL GENERAL, base 100), precomputed by derived.py
+    rows = query_rows('exchange_rate.real', {
+        'period_from': parse_period_arg('from', 0), 'period_to': parse_period_arg('to', 999999),
+    })
+
+    return jsonify([{'period': row[0], 'rate': row[1], 'cpi_index': row[2], 'real_rate': row[3]} for row in rows])
+
+@app.route('/get_inflation_data')
+@cached_response('FT_indec_ipc')
+def get_inflation_data():
+    # Optional filters by region, division (Codigo, e.g. 0 for NIVEL GENERAL) and period range
+    period_from, period_to = parse_period_arg('from', 0), parse_period_arg('to', 999999)
+    regions, divisions = request.args.getlist('region'), request.args.getlist('division')
+
+    # Without a region or division filter the response would be the whole table: it is paginated,
+    # 'limit' rows (MAX_LIMIT by default) from 'offset' on; a short page is the last one
+    paginated = not regions and not divisions
+    limit = parse_limit_arg(MAX_LIMIT) if paginated else None
+    offset = parse_offset_arg() if paginated else None
+
+    # Region and division names resolve through the small dimension tables, then seek the fact key
+    rows = query_rows(INFLATION_QUERIES[bool(regions), bool(divisions)], {
+        'period_from': period_from, 'period_to': period_to,
+        'regions': json_list(regions), 'divisions': json_list(divisions),
+        'limit': limit, 'offset': offset,
+    })
+
+    return jsonify([
+        {'period': row[0], 'division_code': row[1], 'division': row[2], 'region': row[3],
+         'index': row[4], 'monthly_change': row[5], 'yearly_change': row[6]}
+        for row in rows
+    ])
+
+@app.route('/get_inflation_derived_data')
+@cached_response('FT_indec_ipc_derived')
+def get_inflation_derived_data():
+    # Year-on-year and year-to-date changes of one series, precomputed by derived.py
+    rows = query_rows('inflation.derived', {
+        'region': request.args.get('region', 'Nacional'),
+        'division': request.args.get('division', '0'),
+        'period_from': parse_period_arg('from', 0),
+        'period_to': parse_period_arg('to', 999999),
+    })
+
+    return jsonify([
+        {'period': row[0], 'division_code': row[1], 'division': row[2], 'region': row[3],
+         'yearly_change': row[4], 'year_to_date_change': row[5]}
+        for row in rows
+    ])
+
+@app.route('/get_employment_data')
+@cached_response('FT_world_indicator')
+def get_employment_data():
+    # Series for one or more countries (World Bank ISO3 codes); unemployment unless 'indicator' is given
+    countries = request.args.getlist('country')
+    params = {
+        'indicator': request.args.get('indicator', UNEMPLOYMENT_INDICATOR),
+        'year_from': parse_year_arg('from', 0),
+        'year_to': parse_year_arg('to', 9999),
+        'countries': json_list(countries),
+    }
+
+    if countries:
+        # Primary key seek on (Indicator_Code, Country_Code, Year)
+        rows = query_rows('employment.by_country', params)
+    else:
+        # Every country: the indicator's partition of the Parquet snapshot when it is up to date
+        with pool.connection() as conn:
+            df = read_snapshot(conn, 'FT_world_indicator', columns=EMPLOYMENT_COLUMNS, filters=[
+                ('Indicator_Code', '=', params['indicator']),
+                ('Year', '>=', params['year_from']), ('Year', '<=', params['year_to']),
+            ])
+        if df is not None:
+            df = df.sort_values(['Country_Code', 'Year'])
+            rows = list(df.astype(object).where(df.notna(), None).itertuples(index=False, name=None))
+        else:
+            rows = query_rows('employment.all', params)
+
+    return jsonify([{'country_code': row[0], 'country': row[1], 'year': row[2], 'value': row[3]} for row in rows])
+
+@app.route('/get_employment_global_data')
+@cached_response('FT_world_indicator_rollup')
+def get_employment_global_data():
+    # Yearly cross-country statistics over real countries (regional aggregates excluded), precomputed at ingest
+    rows = query_rows('employment.global', {
+        'indicator': request.args.get('indicator', UNEMPLOYMENT_INDICATOR),
+        'year_from': parse_year_arg('from', 0),
+        'year_to': parse_year_arg('to', 9999),
+    })
+
+    return jsonify([
+        {'year': row[0], 'mean': row[1], 'min': row[2], 'max': row[3], 'countries': row[4], 'median': row[5],
+         'p10': row[6], 'p25': row[7], 'p75': row[8], 'p90': row[9],
+         'min_country': row[10], 'min_country_name': row[11], 'max_country': row[12], 'max_country_name': row[13]}
+        for row in rows
+    ])
+
+@app.route('/get_chart/<chart>')
+def get_chart(chart):
+    # Drawn on demand from the DB in charts.py's process pool, so matplotlib never blocks request threads
+    if chart not in charts.CHART_TABLES:
+        raise BadRequest(f"Unknown chart '{chart}' (options: {', '.join(charts.CHART_TABLES)})")
+    fmt = request.args.get('format', DEFAULT_FORMAT)
+    if fmt not in FORMATS:
+        raise BadRequest(f"'format' must be one of: {', '.join(FORMATS)}")
+    dpi = parse_int_arg('dpi', DEFAULT_DPI, MIN_DPI, MAX_DPI)
+    params = parse_chart_args(chart)
+
+    # Same parameters and same data version: the image is served from memory
+    generation = response_cache.generations((charts.CHART_TABLES[chart],))
+    key = (chart, tuple(sorted(params.items())), fmt, dpi, generation)
+    try:
+        entry = chart_cache.render(key, MIMETYPES[fmt], lambda: charts.submit(chart, params, fmt, dpi, pool.db_path))
+    except charts.ChartError as error:
+        return jsonify({'error': str(error)}), 404
+    except concurrent.futures.TimeoutError:
+        return jsonify({'error': 'Chart rendering timed out'}), 503
+    return cacheable_response(entry)
+
+@app.route('/metrics')
+def metrics():
+    # Prometheus text format: API latency histograms plus the latest pipeline run of each script
+    with pool.connection() as conn:
+        lines = run_metrics(conn)
+    lines += request_latency.render()
+    lines += [
+        '# HELP chart_cache_requests_total Chart image cache lookups, by result',
+        '# TYPE chart_cache_requests_total counter',
+        f'chart_cache_requests_total{{result="hit"}} {chart_cache.hits}',
+        f'chart_cache_requests_total{{result="miss"}} {chart_cache.misses}',
+        '# HELP chart_renders_total Charts drawn by the process pool (concurrent misses share one render)',
+        '# TYPE chart_renders_total counter',
+        f'chart_renders_total {chart_cache.renders}',
+        '# HELP chart_cache_bytes Size of the chart images held in memory',
+        '# TYPE chart_cache_bytes gauge',
+        f'chart_cache_bytes {chart_cache.size}',
+    ]
+    return app.response_class('\n'.join(lines) + '\n', mimetype='text/plain; version=0.0.4')
+
 if __name__ == '__main__':
-    app.run(debug=True)
\ No newline at end of file
+    if queries.DEBUG:
+        # QUERY_DEBUG=1: log the plan of every named query on first use
+        logging.basicConfig(level=logging.DEBUG)
+    app.run(debug=True)
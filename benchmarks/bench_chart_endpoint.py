@@ -0,0 +1,98 @@
+"""Gráficos a pedido (/get_chart/<chart>): render en frío, caché LRU y efecto sobre el resto de la API.
+
+Mide, sobre una base ya cargada:
+- cada gráfico en frío (pool de procesos) y repetido (servido desde chart_cache);
+- pedidos concurrentes idénticos, que deben dibujarse una sola vez;
+- la latencia de un endpoint JSON mientras se dibujan gráficos, con el dibujo en los hilos
+  del servidor (como sería sin el pool: matplotlib retiene el GIL) y con el pool de procesos.
+
+Uso: python benchmarks/bench_chart_endpoint.py [ruta_db]
+"""
+import os
+import statistics
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import app
+import charts
+from database import DB_PATH, ConnectionPool
+
+CHARTS = [
+    '/get_chart/employment?country=ARG&from=2005&to=2023',
+    '/get_chart/inflation?from=202301&to=202412&horizon=3',
+    '/get_chart/exchange_rate?from=2024-01-01&to=2024-06-30',
+]
+JSON_ENDPOINT = '/get_exchange_rate_data?from=2024-01-01'
+
+
+def timed_get(client, url):
+    start = time.perf_counter()
+    response = client.get(url)
+    elapsed = time.perf_counter() - start
+    if response.status_code != 200:
+        raise RuntimeError(f'{url} respondió HTTP {response.status_code}: {response.get_data(as_text=True)[:200]}')
+    return elapsed, response
+
+
+def json_latency_while(render):
+    """Mediana y máximo de JSON_ENDPOINT mientras `render` dibuja en otros hilos."""
+    client = app.app.test_client()
+    done = threading.Event()
+    samples = []
+
+    def poll():
+        while not done.is_set():
+            app.response_cache.clear()
+            samples.append(timed_get(client, JSON_ENDPOINT)[0])
+
+    poller = threading.Thread(target=poll)
+    poller.start()
+    try:
+        with ThreadPoolExecutor(max_workers=charts.CHART_WORKERS) as executor:
+            list(executor.map(render, range(charts.CHART_WORKERS * 2)))
+    finally:
+        done.set()
+        poller.join()
+    return statistics.median(samples), max(samples)
+
+
+if __name__ == '__main__':
+    db_path = sys.argv[1] if len(sys.argv) > 1 else DB_PATH
+    app.pool = ConnectionPool(db_path)
+    client = app.app.test_client()
+    try:
+        # Arranque del pool (spawn + importación de matplotlib en cada worker), fuera de las mediciones
+        timed_get(client, CHARTS[2] + '&dpi=51')
+        app.chart_cache.clear()
+
+        print(f"{'gráfico':<58} {'frío':>9} {'caché':>9} {'bytes':>9}")
+        for url in CHARTS:
+            cold, response = timed_get(client, url)
+            warm = statistics.median(timed_get(client, url)[0] for _ in range(20))
+            print(f"{url:<58} {cold * 1000:7.0f}ms {warm * 1000:7.2f}ms {len(response.get_data()):9d}")
+
+        # Pedidos idénticos simultáneos: un solo render
+        app.chart_cache.clear()
+        renders = app.chart_cache.renders
+        url = CHARTS[1] + '&horizon=6'
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            bodies = {response.get_data() for _, response in executor.map(
+                lambda _: timed_get(app.app.test_client(), url), range(8))}
+        print(f"8 pedidos simultáneos iguales: {len(bodies)} imagen distinta, {app.chart_cache.renders - renders} render")
+
+        # Latencia del resto de la API mientras se dibuja
+        base = statistics.median(timed_get(client, JSON_ENDPOINT)[0] for _ in range(50))
+        print(f"\n{JSON_ENDPOINT} sin gráficos en curso: {base * 1000:.2f} ms")
+        in_thread = json_latency_while(lambda i: charts.render_chart(
+            'inflation', {'period_from': 0, 'period_to': 999999, 'horizon': 3 + i}, 'png', 150, os.path.abspath(db_path)))
+        print(f"  con el dibujo en hilos del servidor: mediana {in_thread[0] * 1000:.2f} ms, máximo {in_thread[1] * 1000:.0f} ms")
+        in_pool = json_latency_while(lambda i: timed_get(
+            app.app.test_client(), f'/get_chart/inflation?horizon={12 + i}'))
+        print(f"  con el pool de procesos:             mediana {in_pool[0] * 1000:.2f} ms, máximo {in_pool[1] * 1000:.0f} ms")
+    finally:
+        charts.shutdown()
+        app.pool.close()
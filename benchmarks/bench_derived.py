@@ -0,0 +1,116 @@
+"""Métricas derivadas: recálculo completo vs. incremental, y cálculo por pedido vs. búsqueda.
+
+Carga IPC sintético (7 regiones x 13 divisiones) y dólar diario en una base temporal y mide:
+- refresh_derived con toda la historia encolada contra un período del IPC revisado;
+- la variación interanual de una serie calculada en cada pedido (ventana de 12 meses en
+  pandas sobre V_indec_ipc) contra la lectura de V_indec_ipc_derived;
+- el agregado mensual del dólar con GROUP BY sobre FT_BCRA_dolar contra FT_BCRA_dolar_mensual.
+
+Uso: python benchmarks/bench_derived.py [años] [repeticiones]
+"""
+import os
+import sys
+import tempfile
+import time
+from datetime import date, timedelta
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from database import get_connection
+from derived import refresh_derived
+from indec import upsert_ipc
+from queries import fetch_all
+
+REGIONS = ['Nacional', 'GBA', 'Noreste', 'Noroeste', 'Cuyo', 'Pampeana', 'Patagonia']
+
+
+def synthetic_ipc(years):
+    rng = np.random.default_rng(0)
+    periods = [(2017 + i // 12) * 100 + i % 12 + 1 for i in range(years * 12)]
+    rows = []
+    for region in REGIONS:
+        for code in range(13):
+            monthly = rng.uniform(0.5, 8, len(periods)).round(1)
+            index = 100 * np.cumprod(1 + monthly / 100)
+            for period, change, level in zip(periods, monthly, index):
+                rows.append((str(code), f'División {code}', 'Nivel general' if code == 0 else 'Capítulos',
+                             period, level.round(4), change, None, region))
+    return pd.DataFrame(rows, columns=['Codigo', 'Descripcion', 'Clasificador', 'Periodo',
+                                       'Indice_IPC', 'v_m_IPC', 'v_i_a_IPC', 'Region'])
+
+
+def synthetic_dollar(years):
+    start = date(2017, 1, 1)
+    return [((start + timedelta(days=i)).isoformat(), 15.0 + i * 0.5) for i in range(years * 365)]
+
+
+def per_request_yoy(conn):
+    # Lo que haría la API sin la tabla derivada: leer la serie y componer 12 meses en cada pedido
+    df = pd.read_sql_query('''
+        SELECT Periodo, v_m_IPC FROM V_indec_ipc WHERE Region = 'Nacional' AND Codigo = '0' ORDER BY Periodo
+    ''', conn)
+    growth = np.log1p(df['v_m_IPC'] / 100).rolling(12).sum()
+    return np.expm1(growth) * 100
+
+
+def lookup_yoy(conn):
+    return fetch_all(conn, 'inflation.derived', {'region': 'Nacional', 'division': '0',
+                                                 'period_from': 0, 'period_to': 999999})
+
+
+def per_request_monthly(conn):
+    return conn.execute('''
+        SELECT substr(ID_tie_date, 1, 7) AS month, AVG(F_bcra_dolar), MIN(F_bcra_dolar), MAX(F_bcra_dolar), COUNT(*)
+        FROM FT_BCRA_dolar GROUP BY month ORDER BY month
+    ''').fetchall()
+
+
+def lookup_monthly(conn):
+    return fetch_all(conn, 'exchange_rate.monthly', {'period_from': 0, 'period_to': 999999})
+
+
+def timed(func, *args, repeat=1):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        result = func(*args)
+    return (time.perf_counter() - start) / repeat, result
+
+
+if __name__ == '__main__':
+    years = int(sys.argv[1]) if len(sys.argv) > 1 else 8
+    repeat = int(sys.argv[2]) if len(sys.argv) > 2 else 200
+
+    with tempfile.TemporaryDirectory() as tmp:
+        conn = get_connection(os.path.join(tmp, 'bench.db'))
+        ipc = synthetic_ipc(years)
+        upsert_ipc(conn, ipc)
+        with conn:
+            conn.executemany('INSERT INTO FT_BCRA_dolar (ID_tie_date, F_bcra_dolar) VALUES (?, ?)', synthetic_dollar(years))
+            conn.execute('''
+            INSERT OR IGNORE INTO derived_pending (source, Periodo)
+            SELECT DISTINCT 'FT_BCRA_dolar', CAST(substr(ID_tie_date, 1, 4) || substr(ID_tie_date, 6, 2) AS INTEGER)
+            FROM FT_BCRA_dolar
+            ''')
+
+        completo, escritas = timed(refresh_derived, conn)
+        print(f"IPC {len(ipc)} filas, dólar {years * 365} días")
+        print(f"Recálculo completo: {completo * 1000:.1f} ms {escritas}")
+
+        # Revisión de un período a mitad de la serie: se recalculan ese mes y los 11 siguientes
+        revised = ipc.copy()
+        periods = np.sort(revised['Periodo'].unique())
+        revised.loc[revised['Periodo'] == periods[len(periods) // 2], 'v_m_IPC'] += 0.1
+        upsert_ipc(conn, revised)
+        incremental, escritas = timed(refresh_derived, conn)
+        print(f"Recálculo incremental (1 período revisado): {incremental * 1000:.1f} ms {escritas}")
+
+        antes, _ = timed(per_request_yoy, conn, repeat=repeat)
+        despues, _ = timed(lookup_yoy, conn, repeat=repeat)
+        print(f"Interanual por pedido: cálculo {antes * 1000:.2f} ms, búsqueda {despues * 1000:.2f} ms")
+
+        antes, _ = timed(per_request_monthly, conn, repeat=repeat)
+        despues, _ = timed(lookup_monthly, conn, repeat=repeat)
+        print(f"Dólar mensual por pedido: GROUP BY {antes * 1000:.2f} ms, búsqueda {despues * 1000:.2f} ms")
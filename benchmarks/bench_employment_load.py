@@ -0,0 +1,85 @@
+"""Benchmark de la carga de un indicador del Banco Mundial: bucle fila a fila vs. melt + executemany.
+
+Las dos cargas recorren los mismos años (las columnas de años del DataFrame), así que escriben
+las mismas filas; sale con código 1 si no es así.
+
+Uso: python benchmarks/bench_employment_load.py [num_paises]
+"""
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from database import connect
+from worldbank import load_indicators, year_columns
+
+def synthetic_frame(num_countries, first_year=1960, last_year=2023, nan_ratio=0.4):
+    """Genera un DataFrame con la misma forma que el CSV del Banco Mundial."""
+    rng = np.random.default_rng(0)
+    years = [str(y) for y in range(first_year, last_year + 1)]
+    values = rng.uniform(0, 30, size=(num_countries, len(years)))
+    values[rng.random(values.shape) < nan_ratio] = np.nan
+    df = pd.DataFrame(values, columns=years)
+    df.insert(0, 'Country Name', [f'Pais {i}' for i in range(num_countries)])
+    df.insert(1, 'Country Code', [f'P{i:03d}' for i in range(num_countries)])
+    df.insert(2, 'Indicator Name', 'Desempleo, total (% de la población activa total)')
+    df.insert(3, 'Indicator Code', 'SL.UEM.TOTL.ZS')
+    return df
+
+
+# Tabla con la forma original de FT_world_employment (hoy es una vista sobre FT_world_indicator)
+LEGACY_TABLE = '''
+CREATE TABLE legacy_world_employment (
+    Country_Name TEXT, Country_Code TEXT, Indicator_Name TEXT, Indicator_Code TEXT, Year INTEGER, Value REAL
+)
+'''
+
+INSERT_LEGACY = '''
+INSERT INTO legacy_world_employment (Country_Name, Country_Code, Indicator_Name, Indicator_Code, Year, Value)
+VALUES (?, ?, ?, ?, ?, ?)
+'''
+
+
+def legacy_load(conn, df):
+    """Carga original: iterrows + un cursor.execute por país-año.
+
+    El script original recorría un rango fijo (1960-2021); acá recorre los mismos años que
+    load_indicators para comparar las dos cargas sobre las mismas filas.
+    """
+    conn.execute(LEGACY_TABLE)
+    cursor = conn.cursor()
+    years = [int(col) for col in year_columns(df)]
+    for index, row in df.iterrows():
+        for year in years:
+            if not pd.isna(row[str(year)]):
+                cursor.execute(INSERT_LEGACY, (row['Country Name'], row['Country Code'], row['Indicator Name'], row['Indicator Code'], year, row[str(year)]))
+    conn.commit()
+
+
+def timed(loader, df, table):
+    conn = connect(':memory:')
+    start = time.perf_counter()
+    loader(conn, df)
+    elapsed = time.perf_counter() - start
+    rows = conn.execute(f'SELECT COUNT(*) FROM {table}').fetchone()[0]
+    conn.close()
+    return elapsed, rows
+
+
+if __name__ == '__main__':
+    num_countries = int(sys.argv[1]) if len(sys.argv) > 1 else 266
+    df = synthetic_frame(num_countries)
+
+    antes, filas_antes = timed(legacy_load, df, 'legacy_world_employment')
+    despues, filas_despues = timed(load_indicators, df, 'FT_world_indicator')
+
+    print(f"Antes   (iterrows + execute): {antes:.3f}s, {filas_antes} filas")
+    print(f"Después (melt + executemany): {despues:.3f}s, {filas_despues} filas")
+    print(f"Aceleración: {antes / despues:.1f}x")
+    if filas_antes != filas_despues:
+        print(f"FALLA: las cargas escribieron distinta cantidad de filas ({filas_antes} vs {filas_despues})")
+        sys.exit(1)
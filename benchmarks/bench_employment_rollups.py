@@ -0,0 +1,81 @@
+"""Estadísticas entre países del desempleo: cálculo en cada gráfico vs. lectura de FT_world_indicator_rollup.
+
+Carga el fixture del Banco Mundial (países repetidos `factor` veces, con su Metadata_Country)
+en una base temporal y mide:
+- el promedio y el peor y el mejor país de cada año calculados por pedido, como hacía el
+  gráfico (pivot ancho, mean/idxmax/idxmin por año), contra la lectura de los rollups;
+- lo que agrega refresh_rollups a la carga del indicador.
+
+Verifica además que los rollups coincidan con el cálculo por pedido sobre los países reales
+(sin agregados como "Mundo"). Sale con código 1 si no coinciden.
+
+Uso: python benchmarks/bench_employment_rollups.py [factor] [repeticiones]
+"""
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import INDEC_employment
+from benchmarks.fixtures import FIXTURES_DIR, WORLDBANK_FILE, scale_worldbank
+from database import get_connection
+from queries import read_frame
+from worldbank import load_indicators, read_indicator_zip, refresh_rollups
+
+YEAR_FROM, YEAR_TO = 1991, 2023
+
+
+def per_request(conn):
+    # Lo que hacía el gráfico: todas las series en formato ancho y las estadísticas año por año
+    frame = read_frame(conn, 'employment.chart', {
+        'indicator': INDEC_employment.INDICATOR, 'year_from': YEAR_FROM, 'year_to': YEAR_TO,
+    })
+    frame = frame[~frame['Is_Aggregate'].fillna(0).astype(bool)]
+    by_year = frame.pivot(index='Year', columns='Country_Code', values='Value')
+    return by_year.mean(axis=1), by_year.idxmax(axis=1), by_year.idxmin(axis=1)
+
+
+def lookup(db_path):
+    return INDEC_employment.read_rollups(YEAR_FROM, YEAR_TO, db_path)
+
+
+def timed(func, *args, repeat=1):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        result = func(*args)
+    return (time.perf_counter() - start) / repeat, result
+
+
+if __name__ == '__main__':
+    factor = int(sys.argv[1]) if len(sys.argv) > 1 else 10
+    repeat = int(sys.argv[2]) if len(sys.argv) > 2 else 50
+
+    with tempfile.TemporaryDirectory() as tmp:
+        zip_path = os.path.join(tmp, WORLDBANK_FILE)
+        scale_worldbank(os.path.join(FIXTURES_DIR, WORLDBANK_FILE), zip_path, factor)
+        df = read_indicator_zip(zip_path)
+        db_path = os.path.join(tmp, 'bench.db')
+        conn = get_connection(db_path)
+
+        carga, filas = timed(load_indicators, conn, df)
+        with conn:
+            rollups, _ = timed(refresh_rollups, conn, [INDEC_employment.INDICATOR])
+        real = int((~df['Is_Aggregate'].fillna(False)).sum())
+        print(f"{len(df)} series ({real} países reales), {filas} filas")
+        print(f"Carga completa (con rollups): {carga * 1000:.1f} ms; refresh_rollups solo: {rollups * 1000:.1f} ms")
+
+        antes, (mean, highest, lowest) = timed(per_request, conn, repeat=repeat)
+        despues, stored = timed(lookup, db_path, repeat=repeat)
+        print(f"Estadísticas por gráfico ({YEAR_FROM}-{YEAR_TO}): cálculo {antes * 1000:.2f} ms, "
+              f"lectura de rollups {despues * 1000:.2f} ms")
+
+        stored = stored.set_index('Year')
+        ok = (np.allclose(stored['Mean'], mean.loc[stored.index])
+              and (stored['Max_Country'] == highest.loc[stored.index]).all()
+              and (stored['Min_Country'] == lowest.loc[stored.index]).all())
+        print(f"{'OK' if ok else 'FALLA'}: rollups iguales al cálculo por pedido en {len(stored)} años")
+    sys.exit(0 if ok else 1)
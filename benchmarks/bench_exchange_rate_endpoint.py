@@ -0,0 +1,96 @@
+"""Prueba de carga de /get_exchange_rate_data: handler original vs. el actual de app.py.
+
+Antes: una conexión nueva por request y FT_BCRA_dolar sin índice por fecha.
+Después: ConnectionPool y búsqueda por rango sobre IX_BCRA_dolar_fecha.
+
+Uso: python benchmarks/bench_exchange_rate_endpoint.py [segundos] [hilos]
+"""
+import os
+import sqlite3
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime, timedelta
+
+from flask import Flask, jsonify
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# ~35 años de cotizaciones diarias
+ROWS = [((date.today() - timedelta(days=i)).isoformat(), 1.0 + i / 100) for i in range(35 * 365)]
+
+
+def legacy_app(db_path):
+    """Copia del endpoint previo: conexión por request y consulta sin índice."""
+    legacy = Flask('legacy')
+
+    @legacy.route('/get_exchange_rate_data')
+    def get_exchange_rate_data():
+        conn = sqlite3.connect(db_path)
+        cursor = conn.cursor()
+        date_15_days_ago_str = (datetime.now() - timedelta(days=15)).strftime('%Y-%m-%d')
+        cursor.execute('''
+            SELECT ID_tie_date, F_bcra_dolar
+            FROM FT_BCRA_dolar
+            WHERE ID_tie_date >= ?
+            ORDER BY ID_tie_date DESC
+            LIMIT 15
+        ''', (date_15_days_ago_str,))
+        rows = cursor.fetchall()
+        conn.close()
+        return jsonify([{'date': row[0], 'rate': row[1]} for row in rows])
+
+    return legacy
+
+
+def build_db(db_path):
+    # Esquema previo a las migraciones; database.py agrega el índice al conectarse desde app.py
+    conn = sqlite3.connect(db_path)
+    conn.execute('CREATE TABLE FT_BCRA_dolar (id INTEGER PRIMARY KEY AUTOINCREMENT, ID_tie_date DATE, F_bcra_dolar FLOAT)')
+    conn.executemany('INSERT INTO FT_BCRA_dolar (ID_tie_date, F_bcra_dolar) VALUES (?, ?)', ROWS)
+    conn.commit()
+    conn.close()
+
+
+def load_test(flask_app, seconds, threads, url='/get_exchange_rate_data'):
+    client = flask_app.test_client()
+    stop = time.perf_counter() + seconds
+    counter = [0]
+    lock = threading.Lock()
+
+    def worker():
+        done = 0
+        while time.perf_counter() < stop:
+            response = client.get(url)
+            assert response.status_code == 200, response.status_code
+            done += 1
+        with lock:
+            counter[0] += done
+
+    with ThreadPoolExecutor(max_workers=threads) as executor:
+        for _ in range(threads):
+            executor.submit(worker)
+    return counter[0] / seconds
+
+
+if __name__ == '__main__':
+    seconds = float(sys.argv[1]) if len(sys.argv) > 1 else 3.0
+    threads = int(sys.argv[2]) if len(sys.argv) > 2 else 8
+
+    with tempfile.TemporaryDirectory() as tmp:
+        legacy_db = os.path.join(tmp, 'legacy.db')
+        build_db(legacy_db)
+        antes = load_test(legacy_app(legacy_db), seconds, threads)
+
+        # app.py usa la ruta relativa databases/social_indicators.db
+        os.makedirs(os.path.join(tmp, 'databases'))
+        os.chdir(tmp)
+        build_db(os.path.join('databases', 'social_indicators.db'))
+        import app
+        despues = load_test(app.app, seconds, threads)
+
+    print(f"Antes   (conexión por request, sin índice): {antes:8.0f} req/s")
+    print(f"Después (pool + índice por fecha):          {despues:8.0f} req/s")
+    print(f"Aceleración: {despues / antes:.1f}x")
@@ -0,0 +1,179 @@
+"""Capa de descargas contra un servidor local que inyecta latencia y fallas.
+
+El stub (HTTP/1.1, keep-alive, ETag y Range) sirve un archivo y, según la ruta:
+- /slow/<n>: responde con latencia; sirve para medir el límite de descargas por host y la
+  reutilización de conexiones (requests.get suelto vs. el cliente compartido);
+- /flaky: responde 503 las primeras veces;
+- /drop: corta la conexión a mitad del cuerpo la primera vez (se retoma con Range);
+- /stall: manda los encabezados y se cuelga (debe cortar por timeout de lectura).
+
+Verifica que cada caso termine con el contenido correcto o con el error esperado y mide los
+tiempos. Sale con código 1 si algún caso no se comporta como se espera.
+
+Uso: python benchmarks/bench_fetch_faults.py [num_archivos] [latencia_ms]
+"""
+import hashlib
+import os
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import requests
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fetch_cache import fetch
+from http_client import HttpClient
+
+BODY = os.urandom(1 << 20)
+ETAG = '"' + hashlib.sha256(BODY).hexdigest()[:16] + '"'
+
+
+class Stub:
+    def __init__(self, latency):
+        self.latency = latency
+        self.lock = threading.Lock()
+        self.active = 0
+        self.max_active = 0
+        self.hits = {}
+        self.ranges = []
+
+
+def make_handler(stub):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'
+        # Encabezados y cuerpo van en escrituras separadas: sin esto Nagle + ACK diferido suman ~40 ms por pedido
+        disable_nagle_algorithm = True
+
+        def log_message(self, *args):
+            pass
+
+        def _body(self, status, body, extra=None):
+            self.send_response(status)
+            self.send_header('Content-Length', str(len(body)))
+            self.send_header('ETag', ETAG)
+            self.send_header('Accept-Ranges', 'bytes')
+            for key, value in (extra or {}).items():
+                self.send_header(key, value)
+            self.end_headers()
+            return body
+
+        def do_GET(self):
+            path = self.path.split('?')[0]
+            with stub.lock:
+                stub.hits[path] = stub.hits.get(path, 0) + 1
+                hit = stub.hits[path]
+                stub.active += 1
+                stub.max_active = max(stub.max_active, stub.active)
+            try:
+                self.route(path, hit)
+            except (BrokenPipeError, ConnectionResetError):
+                pass
+            finally:
+                with stub.lock:
+                    stub.active -= 1
+
+        def route(self, path, hit):
+            start = 0
+            range_header = self.headers.get('Range')
+            if range_header and self.headers.get('If-Range') == ETAG:
+                start = int(range_header.split('=')[1].rstrip('-'))
+                stub.ranges.append((path, start))
+
+            if path.startswith('/slow/'):
+                time.sleep(stub.latency)
+                self.wfile.write(self._body(200, BODY[:4096]))
+            elif path == '/flaky' and hit <= 2:
+                self.wfile.write(self._body(503, b'', {'Retry-After': '0'}))
+            elif path == '/drop' and hit == 1:
+                # Promete el archivo completo y corta la conexión a la mitad
+                self._body(200, BODY)
+                self.wfile.write(BODY[:len(BODY) // 2])
+                self.wfile.flush()
+                self.connection.shutdown(2)
+                self.close_connection = True
+            elif path == '/stall':
+                self._body(200, BODY)
+                time.sleep(5)
+            elif start:
+                body = BODY[start:]
+                self.wfile.write(self._body(206, body, {'Content-Range': f'bytes {start}-{len(BODY) - 1}/{len(BODY)}'}))
+            else:
+                self.wfile.write(self._body(200, BODY))
+
+    return Handler
+
+
+def check(name, ok, detail):
+    print(f"{'OK   ' if ok else 'FALLA'} {name}: {detail}")
+    return ok
+
+
+if __name__ == '__main__':
+    num_files = int(sys.argv[1]) if len(sys.argv) > 1 else 24
+    latency = (int(sys.argv[2]) if len(sys.argv) > 2 else 100) / 1000
+    stub = Stub(latency)
+    server = ThreadingHTTPServer(('127.0.0.1', 0), make_handler(stub))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base = f'http://127.0.0.1:{server.server_port}'
+    expected = hashlib.sha256(BODY).hexdigest()
+    results = []
+
+    with tempfile.TemporaryDirectory() as cache_dir:
+        client = HttpClient(timeout=(1, 0.5), retries=3, backoff_factor=0.05, default_host_limit=4)
+
+        # Conexiones: un requests.get suelto por archivo (conexión nueva cada vez) vs. la sesión compartida
+        stub.latency = 0
+        start = time.perf_counter()
+        for i in range(num_files * 4):
+            requests.get(f'{base}/slow/{i}', timeout=5).content
+        antes = time.perf_counter() - start
+        start = time.perf_counter()
+        for i in range(num_files * 4):
+            with client.get(f'{base}/slow/{i}') as response:
+                response.content
+        despues = time.perf_counter() - start
+        print(f"{num_files * 4} pedidos en serie: requests.get {antes * 1000:.0f} ms, sesión compartida {despues * 1000:.0f} ms")
+
+        # Límite por host: todas las descargas en paralelo, a lo sumo 4 a la vez contra el stub
+        stub.latency, stub.max_active = latency, 0
+        start = time.perf_counter()
+        for i in range(num_files):
+            fetch(f'{base}/slow/s{i}', cache_dir=cache_dir, client=client)
+        print(f"{num_files} descargas en serie: {time.perf_counter() - start:.2f}s")
+        stub.max_active = 0
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=num_files) as executor:
+            list(executor.map(lambda i: fetch(f'{base}/slow/p{i}', cache_dir=cache_dir, client=client), range(num_files)))
+        elapsed = time.perf_counter() - start
+        results.append(check('límite por host', stub.max_active <= 4,
+                             f'{num_files} descargas en paralelo con latencia {latency * 1000:.0f} ms en {elapsed:.2f}s, '
+                             f'máximo simultáneo {stub.max_active}'))
+
+        # 503 transitorio: urllib3 reintenta con backoff
+        result = fetch(f'{base}/flaky', cache_dir=cache_dir, client=client)
+        results.append(check('503 y reintento', result.ok and result.sha256 == expected,
+                             f'{stub.hits["/flaky"]} pedidos, HTTP {result.status_code}'))
+
+        # Corte a mitad del cuerpo: se retoma desde lo recibido con Range + If-Range
+        result = fetch(f'{base}/drop', cache_dir=cache_dir, client=client)
+        resumed = [offset for path, offset in stub.ranges if path == '/drop']
+        results.append(check('corte y reanudación', result.ok and result.sha256 == expected and bool(resumed),
+                             f'{stub.hits["/drop"]} pedidos, retomado desde el byte {resumed[0] if resumed else "-"}'))
+
+        # Servidor colgado: el timeout de lectura corta la descarga en vez de colgar la ejecución
+        stalled = HttpClient(timeout=(1, 0.5), retries=1, backoff_factor=0.05)
+        start = time.perf_counter()
+        try:
+            fetch(f'{base}/stall', cache_dir=cache_dir, client=stalled)
+            error = None
+        except requests.exceptions.RequestException as exc:
+            error = type(exc).__name__
+        results.append(check('servidor colgado', error is not None,
+                             f'{error} después de {time.perf_counter() - start:.2f}s'))
+
+    server.shutdown()
+    sys.exit(0 if all(results) else 1)
@@ -0,0 +1,105 @@
+"""FT_indec_ipc como texto (esquema 7) vs. tipada y normalizada (migración 8).
+
+Crea una base con el esquema anterior y una serie sintética con la forma de
+serie_ipc_divisiones.csv (valores con coma decimal), mide su tamaño y la consulta del
+gráfico (NIVEL GENERAL, Nacional, rango de períodos, con la conversión en Python), aplica
+la migración 8 + VACUUM y repite la medición contra V_indec_ipc.
+
+Uso: python benchmarks/bench_ipc_storage.py [num_periodos] [repeticiones]
+"""
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import database
+
+DIVISIONES = ['NIVEL GENERAL', 'Alimentos y bebidas no alcohólicas', 'Bebidas alcohólicas y tabaco',
+              'Prendas de vestir y calzado', 'Vivienda, agua, electricidad, gas y otros combustibles',
+              'Equipamiento y mantenimiento del hogar', 'Salud', 'Transporte', 'Comunicación',
+              'Recreación y cultura', 'Educación', 'Restaurantes y hoteles', 'Bienes y servicios varios']
+REGIONES = ['Nacional', 'GBA', 'Pampeana', 'Noreste', 'Noroeste', 'Cuyo', 'Patagonia']
+
+TEXT_QUERY = '''
+SELECT Periodo, Descripcion, Region, v_m_IPC FROM FT_indec_ipc
+WHERE Descripcion = 'NIVEL GENERAL' AND Region = 'Nacional' AND Periodo >= ? AND Periodo <= ?
+'''
+
+TYPED_QUERY = '''
+SELECT Periodo, Descripcion, Region, v_m_IPC FROM V_indec_ipc
+WHERE Descripcion = 'NIVEL GENERAL' AND Region = 'Nacional' AND Periodo >= ? AND Periodo <= ?
+'''
+
+
+def text_rows(num_periods):
+    rng = np.random.default_rng(0)
+    periods = [(2017 + i // 12) * 100 + i % 12 + 1 for i in range(num_periods)]
+    for codigo, descripcion in enumerate(DIVISIONES):
+        for region in REGIONES:
+            for periodo in periods:
+                indice, mensual = rng.uniform(100, 9000), rng.uniform(0, 25)
+                yield (f'{codigo:02d}' if codigo else '0', descripcion, 'Nivel general y divisiones COICOP', str(periodo),
+                       f'{indice:.4f}'.replace('.', ','), f'{mensual:.1f}'.replace('.', ','), 'NA', region)
+
+
+def best_of(repeat, func):
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+
+def size_mb(conn):
+    page_count = conn.execute('PRAGMA page_count').fetchone()[0]
+    page_size = conn.execute('PRAGMA page_size').fetchone()[0]
+    return page_count * page_size / 1e6
+
+
+def query_text(conn, first, last):
+    df = pd.read_sql_query(TEXT_QUERY, conn, params=(str(first), str(last)))
+    df['v_m_IPC'] = df['v_m_IPC'].str.replace(',', '.').astype(float)
+    return df
+
+
+def query_typed(conn, first, last):
+    return pd.read_sql_query(TYPED_QUERY, conn, params=(first, last))
+
+
+if __name__ == '__main__':
+    num_periods = int(sys.argv[1]) if len(sys.argv) > 1 else 600
+    repeat = int(sys.argv[2]) if len(sys.argv) > 2 else 20
+    first, last = 201801, 201912
+
+    with tempfile.TemporaryDirectory() as workdir:
+        conn = database.connect(os.path.join(workdir, 'bench.db'), run_migrations=False)
+        for number, description, statements in database.MIGRATIONS:
+            if number < 8:
+                for statement in statements:
+                    conn.execute(statement)
+        conn.execute('PRAGMA user_version = 7')
+        conn.executemany('INSERT INTO FT_indec_ipc VALUES (?, ?, ?, ?, ?, ?, ?, ?)', text_rows(num_periods))
+        conn.commit()
+        conn.execute('VACUUM')
+
+        filas = conn.execute('SELECT COUNT(*) FROM FT_indec_ipc').fetchone()[0]
+        antes_mb = size_mb(conn)
+        antes = best_of(repeat, lambda: query_text(conn, first, last))
+        plan_antes = [row[3] for row in conn.execute(f'EXPLAIN QUERY PLAN {TEXT_QUERY}', (str(first), str(last)))]
+
+        database.migrate(conn)
+        conn.execute('VACUUM')
+        despues_mb = size_mb(conn)
+        despues = best_of(repeat, lambda: query_typed(conn, first, last))
+        plan_despues = [row[3] for row in conn.execute(f'EXPLAIN QUERY PLAN {TYPED_QUERY}', (first, last))]
+        conn.close()
+
+    print(f"{filas} filas de IPC")
+    print(f"Texto (esquema 7):    {antes_mb:.2f} MB, consulta {antes * 1000:.2f} ms  plan: {'; '.join(plan_antes)}")
+    print(f"Tipada (migración 8): {despues_mb:.2f} MB, consulta {despues * 1000:.2f} ms  plan: {'; '.join(plan_despues)}")
@@ -0,0 +1,67 @@
+"""Proyección del IPC: np.polyfit serie por serie vs. projection.py en lote.
+
+Genera 7 regiones x 13 divisiones de variaciones mensuales sintéticas y compara:
+- la proyección original (polyfit de los últimos 6 períodos + list comprehension) en un
+  bucle por serie contra projection.forecast con los cuatro modelos a la vez;
+- el backtest de origen móvil de la tendencia lineal con el bucle original contra
+  projection.backtest de los cuatro modelos sobre toda la historia.
+
+Uso: python benchmarks/bench_projection.py [num_periodos] [horizonte]
+"""
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from projection import MODELS, backtest, forecast
+
+
+def synthetic_series(num_series, num_periods):
+    """Variaciones mensuales (%) con persistencia AR(1) y nivel distinto por serie."""
+    rng = np.random.default_rng(0)
+    values = np.empty((num_series, num_periods))
+    values[:, 0] = rng.uniform(1, 8, num_series)
+    for t in range(1, num_periods):
+        values[:, t] = 0.5 + 0.85 * values[:, t - 1] + rng.normal(0, 1, num_series)
+    return values
+
+
+def legacy_projection(series, horizon):
+    ultimos_periodos = series[-6:]
+    pendiente = np.polyfit(range(6), ultimos_periodos, 1)[0]
+    return [ultimos_periodos[-1] + pendiente * i for i in range(1, horizon + 1)]
+
+
+def legacy_backtest(values, horizon, min_train=24):
+    errors = []
+    for row in values:
+        for origin in range(min_train, len(row) - horizon + 1):
+            errors.append(np.abs(np.array(legacy_projection(row[:origin], horizon)) - row[origin:origin + horizon]))
+    return np.mean(errors, axis=0)
+
+
+def timed(func, *args):
+    start = time.perf_counter()
+    result = func(*args)
+    return time.perf_counter() - start, result
+
+
+if __name__ == '__main__':
+    num_periods = int(sys.argv[1]) if len(sys.argv) > 1 else 400
+    horizon = int(sys.argv[2]) if len(sys.argv) > 2 else 3
+    values = synthetic_series(7 * 13, num_periods)
+
+    antes, _ = timed(lambda: [legacy_projection(row, horizon) for row in values])
+    despues, _ = timed(forecast, values, horizon)
+    print(f"{values.shape[0]} series x {num_periods} períodos, horizonte {horizon}")
+    print(f"Proyección: bucle polyfit (solo lineal) {antes * 1000:.1f} ms, lote ({len(MODELS)} modelos) {despues * 1000:.1f} ms")
+
+    antes, mae_lineal = timed(legacy_backtest, values, horizon)
+    lineal, _ = timed(backtest, values, horizon, ['linear'])
+    despues, scores = timed(backtest, values, horizon)
+    print(f"Backtest: bucle polyfit (solo lineal) {antes:.2f}s, lote lineal {lineal:.2f}s, lote ({len(MODELS)} modelos) {despues:.2f}s")
+    print(f"MAE lineal por paso (bucle): {np.round(mae_lineal, 4).tolist()}")
+    print(scores.to_string(index=False))
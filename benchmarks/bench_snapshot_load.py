@@ -0,0 +1,57 @@
+"""Lecturas anchas de FT_world_indicator: pd.read_sql_query vs. instantánea Parquet con memory map.
+
+Carga N indicadores sintéticos (266 países x 64 años cada uno) en una base temporal, escribe
+la instantánea con snapshot.refresh_snapshot y compara el tiempo de lectura de la tabla
+completa y de un solo indicador (una partición).
+
+Uso: python benchmarks/bench_snapshot_load.py [num_indicadores] [repeticiones]
+"""
+import os
+import sys
+import tempfile
+import time
+
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.bench_employment_load import synthetic_frame
+from database import connect
+from snapshot import SNAPSHOTS, read_snapshot, refresh_snapshot
+from worldbank import load_indicators
+
+
+def best_of(repeat, func):
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        rows = len(func())
+        times.append(time.perf_counter() - start)
+    return min(times), rows
+
+
+if __name__ == '__main__':
+    num_indicators = int(sys.argv[1]) if len(sys.argv) > 1 else 50
+    repeat = int(sys.argv[2]) if len(sys.argv) > 2 else 5
+
+    with tempfile.TemporaryDirectory() as workdir:
+        conn = connect(os.path.join(workdir, 'bench.db'))
+        for i in range(num_indicators):
+            df = synthetic_frame(266)
+            df['Indicator Code'] = f'BENCH.IND.{i:03d}'
+            load_indicators(conn, df)
+        refresh_snapshot(conn, 'FT_world_indicator')
+
+        query = SNAPSHOTS['FT_world_indicator'][0]
+        one = [('Indicator_Code', '=', 'BENCH.IND.000')]
+        cases = [
+            ('Tabla completa', lambda: pd.read_sql_query(query, conn),
+             lambda: read_snapshot(conn, 'FT_world_indicator')),
+            ('Un indicador', lambda: pd.read_sql_query(f'{query} WHERE f.Indicator_Code = ?', conn, params=('BENCH.IND.000',)),
+             lambda: read_snapshot(conn, 'FT_world_indicator', filters=one)),
+        ]
+        for name, sqlite_read, parquet_read in cases:
+            antes, filas_antes = best_of(repeat, sqlite_read)
+            despues, filas_despues = best_of(repeat, parquet_read)
+            print(f"{name}: SQLite {antes:.3f}s ({filas_antes} filas), Parquet {despues:.3f}s ({filas_despues} filas), {antes / despues:.1f}x")
+        conn.close()
@@ -0,0 +1,44 @@
+"""Tablero estático (export.py): bytes que descarga un visitante y tiempo de exportación.
+
+Exporta el tablero a una carpeta temporal y compara, por diapositiva:
+- la imagen que cargaba index.html (la de images/) contra la variante WebP que elige el
+  navegador con el srcset, en pantallas de 480, 960 y 1440 px de ancho efectivo;
+- los JSON tal como los sirve la API (sin comprimir) contra las instantáneas .gz.
+
+Uso: python benchmarks/bench_static_export.py [ruta_db]
+"""
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import export
+from database import DB_PATH
+
+
+def chosen(images, width):
+    # Como el navegador con srcset: la variante más chica que cubre el ancho pedido
+    return next((image for image in images if image['width'] and image['width'] >= width), images[-1])
+
+
+if __name__ == '__main__':
+    db_path = sys.argv[1] if len(sys.argv) > 1 else DB_PATH
+
+    with tempfile.TemporaryDirectory() as site_dir:
+        start = time.perf_counter()
+        manifest = export.export_site(site_dir, db_path)
+        print(f"Exportación: {time.perf_counter() - start:.2f}s\n")
+
+        size = lambda path: os.path.getsize(os.path.join(site_dir, path))
+        print(f"{'gráfico':<15} {'original':>10} {'480px':>10} {'960px':>10} {'1440px':>10}")
+        sources = {slide['chart']: export._source_image(slide['image']) for slide in export.SLIDES}
+        for slide in manifest['slides']:
+            png = os.path.getsize(sources[slide['chart']])
+            variants = [size(chosen(slide['images'], width)['src']) for width in (480, 960, 1440)]
+            print(f"{slide['chart']:<15} {png:10d} " + ' '.join(f'{variant:10d}' for variant in variants))
+
+        print(f"\n{'instantánea':<24} {'JSON':>10} {'gzip':>10}")
+        for name, path in manifest['data'].items():
+            print(f"{name:<24} {size(path):10d} {size(path + '.gz'):10d}")
@@ -0,0 +1,107 @@
+"""Lectores de la API contra una ingesta en curso: journal por defecto vs. database.py (WAL).
+
+Un proceso reemplaza FT_BCRA_dolar completa en bucle (como BCRA_exchangerate.load_data) mientras
+varios hilos lectores ejecutan la consulta de /get_exchange_rate_data. Se informa cuántas
+lecturas se completaron, cuántas fallaron con "database is locked" y la latencia máxima.
+
+Uso: python benchmarks/bench_wal_concurrency.py [segundos]
+"""
+import os
+import sqlite3
+import sys
+import tempfile
+import multiprocessing
+import threading
+import time
+from datetime import date, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import database
+
+READ_QUERY = '''
+SELECT ID_tie_date, F_bcra_dolar
+FROM FT_BCRA_dolar
+WHERE ID_tie_date >= ?
+ORDER BY ID_tie_date DESC
+LIMIT 15
+'''
+
+ROWS = [((date(2000, 1, 1) + timedelta(days=i)).isoformat(), 1.0 + i / 100) for i in range(60000)]
+
+
+def plain_connect(db_path):
+    # Configuración previa: sqlite3.connect con valores por defecto (rollback journal)
+    return sqlite3.connect(db_path)
+
+
+def writer(connect, db_path, stop):
+    conn = connect(db_path)
+    while not stop.is_set():
+        with conn:
+            conn.execute('DELETE FROM FT_BCRA_dolar')
+            conn.executemany('INSERT INTO FT_BCRA_dolar (ID_tie_date, F_bcra_dolar) VALUES (?, ?)', ROWS)
+    conn.close()
+
+
+def reader(connect, db_path, stop, stats, lock):
+    conn = connect(db_path)
+    ok = locked = 0
+    worst = 0.0
+    while not stop.is_set():
+        start = time.perf_counter()
+        try:
+            conn.execute(READ_QUERY, ('2020-01-01',)).fetchall()
+            ok += 1
+        except sqlite3.OperationalError:
+            locked += 1
+        worst = max(worst, time.perf_counter() - start)
+    conn.close()
+    with lock:
+        stats['ok'] += ok
+        stats['locked'] += locked
+        stats['worst'] = max(stats['worst'], worst)
+
+
+def run(label, connect, seconds, num_readers=4):
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, 'social_indicators.db')
+        setup = database.connect(db_path) if connect is not plain_connect else plain_connect(db_path)
+        if connect is plain_connect:
+            database.migrate(setup)
+            setup.execute('PRAGMA journal_mode = DELETE')
+        with setup:
+            # Índice sobre la fecha para que la lectura mida la espera por locks y no un escaneo
+            setup.execute('CREATE INDEX IF NOT EXISTS IX_bench_dolar_fecha ON FT_BCRA_dolar (ID_tie_date)')
+            setup.executemany('INSERT INTO FT_BCRA_dolar (ID_tie_date, F_bcra_dolar) VALUES (?, ?)', ROWS)
+        setup.close()
+
+        # La ingesta corre en otro proceso, como FULL_exec.py frente a app.py
+        stop_writer = multiprocessing.Event()
+        ingest = multiprocessing.Process(target=writer, args=(connect, db_path, stop_writer))
+        ingest.start()
+        time.sleep(0.5)
+
+        stop = threading.Event()
+        lock = threading.Lock()
+        stats = {'ok': 0, 'locked': 0, 'worst': 0.0}
+        threads = [threading.Thread(target=reader, args=(connect, db_path, stop, stats, lock)) for _ in range(num_readers)]
+        for thread in threads:
+            thread.start()
+        time.sleep(seconds)
+        stop.set()
+        for thread in threads:
+            thread.join()
+        stop_writer.set()
+        ingest.join()
+
+    print(f"{label:<28} lecturas ok: {stats['ok']:>7}  bloqueadas: {stats['locked']:>6}  latencia máx: {stats['worst'] * 1000:8.1f} ms")
+    return stats
+
+
+if __name__ == '__main__':
+    seconds = float(sys.argv[1]) if len(sys.argv) > 1 else 3.0
+    run('Antes (rollback journal)', plain_connect, seconds)
+    despues = run('Después (WAL, database.py)', database.connect, seconds)
+    if despues['locked']:
+        sys.exit('Con WAL ninguna lectura debería bloquearse durante la ingesta')
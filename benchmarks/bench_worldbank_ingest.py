@@ -0,0 +1,106 @@
+"""Ingesta de indicadores del Banco Mundial: descargas en serie vs. pool acotado.
+
+Genera N ZIPs con la forma de los del Banco Mundial, los sirve desde un servidor HTTP
+local con una latencia artificial por respuesta (simula api.worldbank.org) y mide
+worldbank.ingest_indicators con 1 worker contra DEFAULT_WORKERS, cada corrida sobre
+una base y un caché de descargas nuevos.
+
+Uso: python benchmarks/bench_worldbank_ingest.py [num_indicadores] [latencia_ms]
+"""
+import io
+import os
+import sys
+import tempfile
+import threading
+import time
+import zipfile
+from functools import partial
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.bench_employment_load import synthetic_frame
+from database import close_connections, get_connection
+from worldbank import DEFAULT_WORKERS, ingest_indicators
+
+
+def write_fixture(folder, code, num_countries=266):
+    """Escribe `{code}.zip` con el CSV de datos (4 líneas de encabezado), Metadata_Country y Metadata_Indicator.
+
+    Uno de cada diez códigos queda sin región (un agregado), como en los archivos reales.
+    """
+    df = synthetic_frame(num_countries)
+    df['Indicator Code'] = code
+    df['Indicator Name'] = f'Indicador {code}'
+    df[''] = np.nan  # columna vacía final, como en los archivos reales
+
+    csv = io.StringIO()
+    csv.write('"Data Source","World Development Indicators",\n\n"Last Updated Date","2024-01-01",\n\n')
+    df.to_csv(csv, index=False)
+    with zipfile.ZipFile(os.path.join(folder, f'{code}.zip'), 'w', zipfile.ZIP_DEFLATED) as z:
+        z.writestr(f'API_{code}_DS2_es_csv_v2.csv', csv.getvalue())
+        metadata = pd.DataFrame({'Country Code': df['Country Code'], 'Region': 'Región',
+                                 'IncomeGroup': 'Ingreso mediano alto'})
+        metadata.loc[metadata.index % 10 == 0, ['Region', 'IncomeGroup']] = ''
+        z.writestr(f'Metadata_Country_API_{code}_DS2_es_csv_v2.csv', metadata.to_csv(index=False))
+        z.writestr(f'Metadata_Indicator_API_{code}_DS2_es_csv_v2.csv', '"INDICATOR_CODE"\n')
+
+
+class SlowHandler(SimpleHTTPRequestHandler):
+    latency = 0.0
+
+    def do_GET(self):
+        time.sleep(self.latency)
+        super().do_GET()
+
+    def log_message(self, format, *args):
+        pass
+
+
+def serve(folder, latency):
+    handler = partial(type('Handler', (SlowHandler,), {'latency': latency}), directory=folder)
+    server = ThreadingHTTPServer(('127.0.0.1', 0), handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def timed(codes, url_template, workdir, workers):
+    db_path = os.path.join(workdir, f'workers_{workers}.db')
+    cache_dir = os.path.join(workdir, f'cache_{workers}')
+    start = time.perf_counter()
+    summary = ingest_indicators(codes, db_path=db_path, max_workers=workers, url_template=url_template, cache_dir=cache_dir)
+    elapsed = time.perf_counter() - start
+    errors = [code for code, value in summary.items() if isinstance(value, Exception)]
+    if errors:
+        raise RuntimeError(f"Fallaron {len(errors)} indicadores: {summary[errors[0]]}")
+    rows = get_connection(db_path).execute('SELECT COUNT(*) FROM FT_world_indicator').fetchone()[0]
+    close_connections()
+    return elapsed, rows
+
+
+if __name__ == '__main__':
+    num_indicators = int(sys.argv[1]) if len(sys.argv) > 1 else 50
+    latency = (int(sys.argv[2]) if len(sys.argv) > 2 else 200) / 1000
+
+    with tempfile.TemporaryDirectory() as workdir:
+        fixtures = os.path.join(workdir, 'fixtures')
+        os.makedirs(fixtures)
+        codes = [f'BENCH.IND.{i:03d}' for i in range(num_indicators)]
+        for code in codes:
+            write_fixture(fixtures, code)
+
+        server = serve(fixtures, latency)
+        url_template = f'http://127.0.0.1:{server.server_address[1]}/{{code}}.zip'
+        try:
+            serie, filas_serie = timed(codes, url_template, workdir, 1)
+            pool, filas_pool = timed(codes, url_template, workdir, DEFAULT_WORKERS)
+        finally:
+            server.shutdown()
+
+    print(f"{num_indicators} indicadores, {latency * 1000:.0f} ms de latencia por descarga")
+    print(f"En serie (1 worker):          {serie:.2f}s, {filas_serie} filas")
+    print(f"Pool ({DEFAULT_WORKERS} workers):             {pool:.2f}s, {filas_pool} filas")
+    print(f"Aceleración: {serie / pool:.1f}x")
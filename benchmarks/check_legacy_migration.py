@@ -0,0 +1,56 @@
+"""Migración de una base creada por el loader original del IPC y recarga del mismo CSV.
+
+Arma FT_indec_ipc como lo hacía la primera versión de INDEC_inflation.py (to_sql con
+if_exists='append', dos ejecuciones, así que la serie queda duplicada y Codigo como INTEGER),
+la migra al esquema actual con get_connection y vuelve a cargar el mismo CSV con load_data.
+La recarga no debe insertar ni actualizar nada: mismas divisiones y mismas filas que el CSV.
+Sale con código 1 si no es así.
+
+Uso: python benchmarks/check_legacy_migration.py [csv_ipc]
+"""
+import os
+import sqlite3
+import sys
+import tempfile
+from io import StringIO
+
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import INDEC_inflation
+from benchmarks.fixtures import FIXTURES_DIR, IPC_FILE
+from database import get_connection
+
+
+def legacy_load(db_path, csv_path, runs=2):
+    """Carga original: read_csv sin tipos (Codigo queda entero) y to_sql en modo append."""
+    with open(csv_path, 'rb') as file:
+        df = pd.read_csv(StringIO(file.read().decode('latin1')), delimiter=';')
+    conn = sqlite3.connect(db_path)
+    for _ in range(runs):
+        df.to_sql('FT_indec_ipc', conn, if_exists='append', index=False)
+    conn.commit()
+    conn.close()
+
+
+if __name__ == '__main__':
+    csv_path = sys.argv[1] if len(sys.argv) > 1 else os.path.join(FIXTURES_DIR, IPC_FILE)
+    expected = INDEC_inflation.parse_data(csv_path)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, 'legacy.db')
+        legacy_load(db_path, csv_path)
+        conn = get_connection(db_path)
+        migrated = conn.execute('SELECT COUNT(*) FROM FT_indec_ipc').fetchone()[0]
+
+        result = INDEC_inflation.load_data(expected, db_path=db_path)
+        divisions = conn.execute('SELECT COUNT(*) FROM DIM_indec_division').fetchone()[0]
+        rows = conn.execute('SELECT COUNT(*) FROM FT_indec_ipc').fetchone()[0]
+        conn.close()
+
+    ok = (result['inserted'] == 0 and result['updated'] == 0 and rows == migrated == len(expected)
+          and divisions == expected['Codigo'].nunique())
+    print(f"{'OK' if ok else 'FALLA'}: migradas {migrated} filas; recarga {result}; "
+          f"{divisions} divisiones (CSV: {expected['Codigo'].nunique()}), {rows} filas (CSV: {len(expected)})")
+    sys.exit(0 if ok else 1)
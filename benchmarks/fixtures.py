@@ -0,0 +1,348 @@
+"""Fixtures de las tres fuentes para la suite offline (benchmarks/suite.py).
+
+benchmarks/fixtures/ guarda un archivo por fuente, con el mismo nombre y formato que el
+original: serie_ipc_divisiones.csv (INDEC), el ZIP de SL.UEM.TOTL.ZS (Banco Mundial) y
+com3500.xls (BCRA). `record` los reemplaza por descargas de las URLs reales; `generate`
+los vuelve a escribir sintéticos y deterministas. `scale_fixtures` arma a partir de ellos
+las versiones agrandadas (10x, 100x filas) que usa la suite.
+
+Uso: python benchmarks/fixtures.py record|generate
+"""
+import csv
+import io
+import os
+import shutil
+import struct
+import sys
+import zipfile
+from datetime import date, timedelta
+
+import numpy as np
+import requests
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import BCRA_exchangerate
+import INDEC_employment
+import INDEC_inflation
+
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures')
+
+IPC_FILE = 'serie_ipc_divisiones.csv'
+WORLDBANK_FILE = 'API_SL.UEM.TOTL.ZS_DS2_es_csv_v2.zip'
+BCRA_FILE = 'com3500.xls'
+
+# Archivo de cada fuente -> URL de la que se graba
+SOURCES = {
+    IPC_FILE: INDEC_inflation.URL,
+    WORLDBANK_FILE: INDEC_employment.URL,
+    BCRA_FILE: BCRA_exchangerate.URL,
+}
+
+IPC_REGIONS = ['Nacional', 'GBA', 'Pampeana', 'Noreste', 'Noroeste', 'Cuyo', 'Patagonia']
+IPC_DIVISIONS = [
+    ('0', 'NIVEL GENERAL'),
+    ('01', 'Alimentos y bebidas no alcohólicas'),
+    ('02', 'Bebidas alcohólicas y tabaco'),
+    ('03', 'Prendas de vestir y calzado'),
+    ('04', 'Vivienda, agua, electricidad, gas y otros combustibles'),
+    ('05', 'Equipamiento y mantenimiento del hogar'),
+    ('06', 'Salud'),
+    ('07', 'Transporte'),
+    ('08', 'Comunicación'),
+    ('09', 'Recreación y cultura'),
+    ('10', 'Educación'),
+    ('11', 'Restaurantes y hoteles'),
+    ('12', 'Bienes y servicios varios'),
+]
+IPC_CLASSIFIER = 'Nivel general y divisiones COICOP'
+
+# Países y agregados del ZIP del Banco Mundial (los agregados no tienen región en Metadata_Country)
+WORLDBANK_COUNTRIES = 217
+WORLDBANK_AGGREGATES = 49
+WORLDBANK_YEARS = range(1960, 2024)
+
+# Días hábiles del Excel del BCRA (la serie real empieza en 2002)
+BCRA_FIRST_DATE = date(2002, 3, 4)
+BCRA_LAST_DATE = date(2024, 12, 31)
+# Filas de una hoja de Excel 97-2003 (el formato de com3500.xls)
+XLS_MAX_ROWS = 65536
+
+
+def record(folder=FIXTURES_DIR):
+    """Descarga las fuentes reales y las guarda como fixtures."""
+    os.makedirs(folder, exist_ok=True)
+    for name, url in SOURCES.items():
+        response = requests.get(url, timeout=60)
+        response.raise_for_status()
+        with open(os.path.join(folder, name), 'wb') as file:
+            file.write(response.content)
+        print(f"{name}: {len(response.content)} bytes grabados de {url}")
+
+
+def _decimal(value, digits):
+    return 'NA' if np.isnan(value) else f'{value:.{digits}f}'.replace('.', ',')
+
+
+def write_ipc(path, first_year=2017, last_year=2024):
+    """CSV del IPC por divisiones: latin1, separado por ';', coma decimal y 'NA' para faltantes."""
+    rng = np.random.default_rng(1)
+    periods = [year * 100 + month for year in range(first_year, last_year + 1) for month in range(1, 13)]
+    with open(path, 'w', encoding='latin1', newline='') as file:
+        file.write('Codigo;Descripcion;Clasificador;Periodo;Indice_IPC;v_m_IPC;v_i_a_IPC;Region\n')
+        for region in IPC_REGIONS:
+            for code, description in IPC_DIVISIONS:
+                monthly = rng.uniform(0.5, 9, len(periods)).round(1)
+                index = 100 * np.cumprod(1 + monthly / 100)
+                yearly = np.full(len(periods), np.nan)
+                yearly[12:] = (index[12:] / index[:-12] - 1) * 100
+                for period, level, change, year_change in zip(periods, index, monthly, yearly):
+                    file.write(f'{code};{description};{IPC_CLASSIFIER};{period};{_decimal(level, 4)};'
+                               f'{_decimal(change, 1)};{_decimal(year_change, 1)};{region}\n')
+
+
+def _worldbank_csv(rows, years):
+    buffer = io.StringIO()
+    buffer.write('"Data Source","Indicadores del desarrollo mundial",\n\n"Last Updated Date","2024-06-28",\n\n')
+    writer = csv.writer(buffer, quoting=csv.QUOTE_ALL, lineterminator=',\n')
+    writer.writerow(['Country Name', 'Country Code', 'Indicator Name', 'Indicator Code'] + [str(y) for y in years])
+    writer.writerows(rows)
+    return buffer.getvalue()
+
+
+def _write_worldbank_zip(path, data_csv, metadata_csv):
+    with zipfile.ZipFile(path, 'w', zipfile.ZIP_DEFLATED) as z:
+        z.writestr('API_SL.UEM.TOTL.ZS_DS2_es_csv_v2.csv', data_csv)
+        z.writestr('Metadata_Country_API_SL.UEM.TOTL.ZS_DS2_es_csv_v2.csv', metadata_csv)
+        z.writestr('Metadata_Indicator_API_SL.UEM.TOTL.ZS_DS2_es_csv_v2.csv',
+                   '"INDICATOR_CODE","INDICATOR_NAME","SOURCE_NOTE","SOURCE_ORGANIZATION",\n'
+                   '"SL.UEM.TOTL.ZS","Desempleo, total (% de la población activa total)","","OIT",\n')
+
+
+def _metadata_csv(rows):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer, quoting=csv.QUOTE_ALL, lineterminator=',\n')
+    writer.writerow(['Country Code', 'Region', 'Income_Group', 'SpecialNotes', 'TableName'])
+    writer.writerows(rows)
+    return buffer.getvalue()
+
+
+def write_worldbank(path):
+    """ZIP del Banco Mundial: CSV de datos con 4 líneas de encabezado, Metadata_Country y Metadata_Indicator."""
+    rng = np.random.default_rng(2)
+    regions = ['América Latina y el Caribe', 'Europa y Asia central', 'África al sur del Sahara',
+               'Asia oriental y el Pacífico', 'Oriente Medio y Norte de África', 'América del Norte', 'Asia meridional']
+    incomes = ['Ingreso alto', 'Ingreso mediano alto', 'Ingreso mediano bajo', 'Países de ingreso bajo']
+    countries = [('Argentina', 'ARG', regions[0], incomes[1])]
+    countries += [(f'País {i}', f'P{i:02d}', regions[i % len(regions)], incomes[i % len(incomes)])
+                  for i in range(1, WORLDBANK_COUNTRIES)]
+    aggregates = [(f'Agregado {i}', f'Z{i:02d}', '', '') for i in range(WORLDBANK_AGGREGATES)]
+
+    data, metadata = [], []
+    for name, code, region, income in countries + aggregates:
+        # La serie de desempleo de la OIT empieza en 1991
+        values = [rng.uniform(1, 30) if year >= 1991 and rng.random() > 0.1 else None for year in WORLDBANK_YEARS]
+        data.append([name, code, 'Desempleo, total (% de la población activa total)', 'SL.UEM.TOTL.ZS']
+                    + ['' if value is None else f'{value:.3f}' for value in values])
+        metadata.append([code, region, income, '', name])
+    _write_worldbank_zip(path, _worldbank_csv(data, WORLDBANK_YEARS), _metadata_csv(metadata))
+
+
+# Registros BIFF8 (formato de Excel 97-2003, el de com3500.xls)
+BIFF_BOF, BIFF_EOF, BIFF_CODEPAGE, BIFF_XF = 0x0809, 0x000A, 0x0042, 0x00E0
+BIFF_BOUNDSHEET, BIFF_DIMENSIONS, BIFF_NUMBER, BIFF_LABEL = 0x0085, 0x0200, 0x0203, 0x0204
+# XF de las celdas: 0 general, 1 fecha (formato estándar 14, "d/m/aaaa")
+XF_GENERAL, XF_DATE = 0, 1
+# Serie de fechas de Excel: el día 1 es 1900-01-01 y existe un 1900-02-29 ficticio (el 60), así
+# que antes de marzo de 1900 la cuenta corre un día (xlrd lo lee igual). Las fechas anteriores
+# a 1900 quedan negativas: Excel no las muestra, pero xlrd y pandas las leen bien
+EXCEL_EPOCH = date(1899, 12, 30)
+EXCEL_LEAP_BUG = date(1900, 3, 1)
+
+# Contenedor OLE2 (Compound File Binary) con sectores de 512 bytes
+OLE_SECTOR = 512
+OLE_FREE, OLE_END, OLE_FAT = 0xFFFFFFFF, 0xFFFFFFFE, 0xFFFFFFFD
+OLE_HEADER_FAT_ENTRIES = 109
+# Flujos más chicos que esto irían al mini stream; el libro se rellena hasta este tamaño
+OLE_MINI_CUTOFF = 4096
+
+
+def _record(kind, data=b''):
+    return struct.pack('<HH', kind, len(data)) + data
+
+
+def _bof(kind):
+    # BIFF8: versión 0x0600; kind 0x0005 = libro, 0x0010 = hoja
+    return _record(BIFF_BOF, struct.pack('<HHHHII', 0x0600, kind, 0x0DBB, 0x07CC, 0, 0x06))
+
+
+def _xf(format_key):
+    # Fuente 0, celda bloqueada, atributos propios solo de formato
+    return _record(BIFF_XF, struct.pack('<HHHBBBBIIH', 0, format_key, 0x0001, 0x20, 0, 0, 0x04, 0, 0, 0x20C0))
+
+
+def _excel_serial(day):
+    return (day - EXCEL_EPOCH).days - (day < EXCEL_LEAP_BUG)
+
+
+def _biff_cell(row, column, value):
+    if isinstance(value, date):
+        return _record(BIFF_NUMBER, struct.pack('<HHHd', row, column, XF_DATE, _excel_serial(value)))
+    if isinstance(value, (int, float)):
+        return _record(BIFF_NUMBER, struct.pack('<HHHd', row, column, XF_GENERAL, value))
+    text = str(value).encode('utf-16-le')
+    return _record(BIFF_LABEL, struct.pack('<HHHHB', row, column, XF_GENERAL, len(text) // 2, 0x01) + text)
+
+
+def _workbook_stream(rows, sheet_name='Hoja1'):
+    """Flujo Workbook BIFF8 de un libro con una hoja: los valores date van como celdas de fecha."""
+    name = sheet_name.encode('utf-16-le')
+    globals_ = _bof(0x0005) + _record(BIFF_CODEPAGE, struct.pack('<H', 1200)) + _xf(0) + _xf(14)
+    boundsheet_size = 4 + 8 + len(name)
+    sheet_offset = len(globals_) + boundsheet_size + 4
+    globals_ += _record(BIFF_BOUNDSHEET, struct.pack('<IBBBB', sheet_offset, 0, 0, len(name) // 2, 0x01) + name)
+    globals_ += _record(BIFF_EOF)
+
+    width = max((len(row) for row in rows), default=0)
+    sheet = [_bof(0x0010), _record(BIFF_DIMENSIONS, struct.pack('<IIHHH', 0, len(rows), 0, width, 0))]
+    for number, row in enumerate(rows):
+        sheet.extend(_biff_cell(number, column, value) for column, value in enumerate(row) if value is not None)
+    sheet.append(_record(BIFF_EOF))
+    return globals_ + b''.join(sheet)
+
+
+def _ole_directory_entry(name, kind, child, start, size):
+    encoded = (name + '\0').encode('utf-16-le') if name else b''
+    return struct.pack('<64sHBBIII16sIQQII', encoded, len(encoded), kind, 1, OLE_FREE, OLE_FREE, child,
+                       b'', 0, 0, 0, start, size) + b'\0' * 4
+
+
+def write_xls(path, rows):
+    """Libro de Excel 97-2003 (BIFF8 en un contenedor OLE2) de una hoja, escrito sin dependencias.
+
+    Es el formato de com3500.xls: pd.read_excel lo detecta por contenido y lo lee con xlrd.
+    """
+    stream = _workbook_stream(rows)
+    stream += b'\0' * (max(OLE_MINI_CUTOFF, len(stream) + -len(stream) % OLE_SECTOR) - len(stream))
+    stream_sectors = len(stream) // OLE_SECTOR
+    fat_sectors = 1
+    while fat_sectors * OLE_SECTOR // 4 < fat_sectors + 1 + stream_sectors:
+        fat_sectors += 1
+    if fat_sectors > OLE_HEADER_FAT_ENTRIES:
+        raise ValueError(f'Libro de {len(stream)} bytes: más grande que lo que admite el encabezado OLE2 sin DIFAT')
+
+    # Sectores: FAT, directorio y el flujo Workbook contiguo
+    directory_sector = fat_sectors
+    first_stream_sector = fat_sectors + 1
+    fat = [OLE_FAT] * fat_sectors + [OLE_END]
+    fat += list(range(first_stream_sector + 1, first_stream_sector + stream_sectors)) + [OLE_END]
+    fat += [OLE_FREE] * (fat_sectors * OLE_SECTOR // 4 - len(fat))
+
+    header = struct.pack('<8s16sHHHHH6sIIIIIIIII', bytes.fromhex('D0CF11E0A1B11AE1'), b'', 0x003E, 0x0003, 0xFFFE,
+                         9, 6, b'', 0, fat_sectors, directory_sector, 0, OLE_MINI_CUTOFF, OLE_END, 0, OLE_END, 0)
+    header += struct.pack(f'<{OLE_HEADER_FAT_ENTRIES}I',
+                          *range(fat_sectors), *[OLE_FREE] * (OLE_HEADER_FAT_ENTRIES - fat_sectors))
+    directory = (_ole_directory_entry('Root Entry', 5, 1, OLE_END, 0)
+                 + _ole_directory_entry('Workbook', 2, OLE_FREE, first_stream_sector, len(stream))
+                 + _ole_directory_entry('', 0, OLE_FREE, 0, 0) * 2)
+
+    with open(path, 'wb') as file:
+        file.write(header)
+        file.write(struct.pack(f'<{len(fat)}I', *fat))
+        file.write(directory)
+        file.write(stream)
+
+
+def write_bcra(path, first_date=BCRA_FIRST_DATE, last_date=BCRA_LAST_DATE):
+    """Planilla de la Comunicación A 3500: 4 filas de títulos, encabezado y fecha/valor en las columnas C y D.
+
+    Como el original, la hoja no pasa de XLS_MAX_ROWS filas: quedan las fechas más recientes.
+    """
+    header = [
+        (None, None, 'Tipo de Cambio de Referencia Comunicación A 3500 (Mayorista)', None),
+        (None, None, None, None),
+        (None, None, 'Cotizaciones diarias', None),
+        (None, None, None, None),
+        (None, None, 'Fecha', 'Tipo de Cambio de Referencia - en Pesos - por Dólar'),
+    ]
+    days = [first_date + timedelta(days=i) for i in range((last_date - first_date).days + 1)]
+    days = [day for day in days if day.weekday() < 5][-(XLS_MAX_ROWS - len(header)):]
+    rng = np.random.default_rng(3)
+    # Tendencia exponencial con ruido, de ~1,4 a ~1000 pesos por dólar
+    rates = np.exp(np.linspace(np.log(1.4), np.log(1000), len(days)) + rng.normal(0, 0.005, len(days)))
+    write_xls(path, header + [(None, None, day, round(float(rate), 4)) for day, rate in zip(days, rates)])
+
+
+def generate(folder=FIXTURES_DIR):
+    """Escribe las fixtures sintéticas con el formato de cada fuente."""
+    os.makedirs(folder, exist_ok=True)
+    write_ipc(os.path.join(folder, IPC_FILE))
+    write_worldbank(os.path.join(folder, WORLDBANK_FILE))
+    write_bcra(os.path.join(folder, BCRA_FILE))
+    for name in SOURCES:
+        print(f"{name}: {os.path.getsize(os.path.join(folder, name))} bytes")
+
+
+def scale_ipc(source, target, factor):
+    """Repite cada fila del IPC `factor` veces, como regiones nuevas ('GBA 2', 'GBA 3', ...)."""
+    with open(source, 'r', encoding='latin1') as file:
+        header, *lines = file.read().splitlines()
+    with open(target, 'w', encoding='latin1', newline='') as file:
+        file.write(header + '\n')
+        for copy in range(factor):
+            suffix = '' if copy == 0 else f' {copy + 1}'
+            file.writelines(f'{line}{suffix}\n' for line in lines)
+
+
+def scale_worldbank(source, target, factor):
+    """Repite cada país `factor` veces con código y nombre nuevos, en el CSV de datos y en Metadata_Country."""
+    with zipfile.ZipFile(source) as z:
+        members = {name: z.read(name).decode('utf-8-sig') for name in z.namelist()}
+
+    def repeat(text, skip, code_column, name_column):
+        lines = text.splitlines(keepends=True)
+        head, rows = lines[:skip], list(csv.reader(lines[skip:]))
+        buffer = io.StringIO()
+        buffer.writelines(head)
+        writer = csv.writer(buffer, quoting=csv.QUOTE_ALL, lineterminator='\n')
+        for copy in range(factor):
+            for row in rows:
+                if not row:
+                    continue
+                row = list(row)
+                if copy:
+                    row[code_column] = f'{row[code_column]}_{copy}'
+                    row[name_column] = f'{row[name_column]} {copy + 1}'
+                writer.writerow(row)
+        return buffer.getvalue()
+
+    with zipfile.ZipFile(target, 'w', zipfile.ZIP_DEFLATED) as z:
+        for name, text in members.items():
+            if os.path.basename(name).startswith('Metadata_Country'):
+                text = repeat(text, 1, 0, 4)
+            elif not os.path.basename(name).startswith('Metadata'):
+                text = repeat(text, 5, 1, 0)
+            z.writestr(name, text)
+
+
+def scale_fixtures(folder, factor, source=FIXTURES_DIR):
+    """Deja en `folder` las tres fuentes con `factor` veces las filas de las fixtures."""
+    os.makedirs(folder, exist_ok=True)
+    if factor == 1:
+        for name in SOURCES:
+            shutil.copyfile(os.path.join(source, name), os.path.join(folder, name))
+        return
+    scale_ipc(os.path.join(source, IPC_FILE), os.path.join(folder, IPC_FILE), factor)
+    scale_worldbank(os.path.join(source, WORLDBANK_FILE), os.path.join(folder, WORLDBANK_FILE), factor)
+    # El Excel del BCRA se agranda hacia atrás en el tiempo (la clave es la fecha); desde ~11x
+    # queda acotado por las XLS_MAX_ROWS filas de la hoja
+    span = min((BCRA_LAST_DATE - BCRA_FIRST_DATE) * factor, timedelta(weeks=XLS_MAX_ROWS // 5 + 1))
+    write_bcra(os.path.join(folder, BCRA_FILE), first_date=BCRA_LAST_DATE - span)
+
+
+if __name__ == '__main__':
+    commands = {'record': record, 'generate': generate}
+    if len(sys.argv) != 2 or sys.argv[1] not in commands:
+        print(__doc__.strip().splitlines()[-1])
+        sys.exit(2)
+    commands[sys.argv[1]]()
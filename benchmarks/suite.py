@@ -0,0 +1,283 @@
+"""Suite de benchmarks offline de las tres fuentes, comparada contra un baseline guardado.
+
+Para cada escala (1x = benchmarks/fixtures, 10x y 100x = versiones agrandadas) sirve las
+fixtures desde un servidor HTTP local y corre, sobre una base, un caché de descargas y una
+carpeta de imágenes nuevos, las etapas de INDEC_inflation, INDEC_employment y
+BCRA_exchangerate (fetch, parse, load, render) y luego los endpoints de app.py con el caché
+de respuestas vacío. Cada medición es la mediana de --repeat corridas.
+
+El resultado se compara contra benchmarks/baseline.json: una medición que empeora más que
+--tolerance (y más de MIN_DELTA_SECONDS en términos absolutos) es una regresión y la suite
+sale con código 1. También falla si una etapa no se pudo medir (p. ej. falta xlrd, el lector
+del Excel del BCRA) o si una medición del baseline no aparece en la corrida: todo lo que el
+baseline cubre se vuelve a medir. --update-baseline reemplaza el baseline (correrlo en la
+máquina de referencia) y se niega a guardarlo si quedó alguna etapa sin medir.
+
+Sobre cada base cargada corre además queries.check_plans: una consulta caliente (la API o los
+gráficos) cuyo plan recorre una tabla completa hace fallar la suite.
+
+Uso: python benchmarks/suite.py [--scales 1,10,100] [--repeat 3] [--tolerance 0.5] [--update-baseline]
+"""
+import argparse
+import json
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from functools import partial
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import BCRA_exchangerate
+import INDEC_employment
+import INDEC_inflation
+import app
+from benchmarks.fixtures import BCRA_FILE, IPC_FILE, WORLDBANK_FILE, scale_fixtures
+from database import ConnectionPool, close_connections, get_connection
+from queries import check_plans
+from render import get_pyplot
+
+BASELINE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'baseline.json')
+
+# Diferencias menores a esto son ruido aunque superen la tolerancia relativa
+MIN_DELTA_SECONDS = 0.01
+DEFAULT_TOLERANCE = 0.5
+
+# Pedidos por endpoint en cada corrida (cada uno con el caché de respuestas vacío): hasta
+# ENDPOINT_REQUESTS, cortando después de ENDPOINT_MIN_REQUESTS si ya se usó ENDPOINT_BUDGET_SECONDS
+ENDPOINT_REQUESTS = 20
+ENDPOINT_MIN_REQUESTS = 3
+ENDPOINT_BUDGET_SECONDS = 1.0
+ENDPOINTS = [
+    '/get_exchange_rate_data?from=2024-01-01',
+    '/get_exchange_rate_monthly_data',
+    '/get_inflation_data?region=Nacional&division=0',
+    '/get_inflation_data',
+    '/get_inflation_derived_data',
+    '/get_employment_data?country=ARG',
+    '/get_employment_global_data',
+]
+
+
+class Skipped(Exception):
+    """Etapa que no se pudo medir en este entorno (falta una dependencia opcional)."""
+
+
+class _QuietHandler(SimpleHTTPRequestHandler):
+    def log_message(self, *args):
+        pass
+
+
+@contextmanager
+def serve(folder):
+    """Servidor HTTP local con las fixtures (el stub de INDEC, el Banco Mundial y el BCRA)."""
+    server = ThreadingHTTPServer(('127.0.0.1', 0), partial(_QuietHandler, directory=folder))
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        yield f'http://127.0.0.1:{server.server_port}'
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+def _parse(parse_data, path):
+    try:
+        return parse_data(path)
+    except ImportError as exc:
+        # pd.read_excel sin xlrd/openpyxl
+        raise Skipped(str(exc))
+
+
+# Etapas de cada script, en el orden de su main(): (nombre, función(url, estado) -> resultado)
+SCRIPTS = {
+    'inflation': (IPC_FILE, [
+        ('fetch', lambda url, state: INDEC_inflation.fetch_data(url)),
+        ('parse', lambda url, state: _parse(INDEC_inflation.parse_data, state['fetch'].path)),
+        ('load', lambda url, state: INDEC_inflation.load_data(state['parse'])),
+        ('query', lambda url, state: INDEC_inflation.query_data('201701', '999912')),
+        ('render', lambda url, state: INDEC_inflation.plot_data(state['query'], 3)),
+    ]),
+    'employment': (WORLDBANK_FILE, [
+        ('fetch', lambda url, state: INDEC_employment.fetch_data(url)),
+        ('parse', lambda url, state: INDEC_employment.parse_data(state['fetch'].path)),
+        ('load', lambda url, state: INDEC_employment.load_data(state['parse'])),
+        ('query', lambda url, state: INDEC_employment.query_data(2005, 2023)),
+        ('render', lambda url, state: INDEC_employment.plot_data(state['query'], 'Argentina', 2005, 2023)),
+    ]),
+    'exchange_rate': (BCRA_FILE, [
+        ('fetch', lambda url, state: BCRA_exchangerate.fetch_data(url)),
+        ('parse', lambda url, state: _parse(BCRA_exchangerate.parse_data, state['fetch'].path)),
+        ('load', lambda url, state: BCRA_exchangerate.load_data(state['parse'])),
+        ('query', lambda url, state: BCRA_exchangerate.query_data('2024-01-01', '2024-12-31')),
+        ('render', lambda url, state: BCRA_exchangerate.plot_data(state['query'], '2024-01-01', '2024-12-31')),
+    ]),
+}
+
+
+def run_once(base_url, scale, skipped, bad_plans):
+    """Una corrida completa en el directorio actual (vacío); devuelve {medición: segundos}.
+
+    Las etapas que no se pudieron medir (y las siguientes del mismo script) se agregan a `skipped`;
+    las consultas calientes con escaneos completos sobre la base cargada, a `bad_plans`.
+    """
+    timings = {}
+    for script, (file_name, stages) in SCRIPTS.items():
+        state = {}
+        for position, (stage, func) in enumerate(stages):
+            start = time.perf_counter()
+            try:
+                state[stage] = func(f'{base_url}/{scale}x/{file_name}', state)
+            except Skipped as exc:
+                print(f"  {script}.{stage} sin medir: {exc}")
+                skipped.update(f'{scale}x/{script}.{name}' for name, _ in stages[position:])
+                break
+            timings[f'{scale}x/{script}.{stage}'] = time.perf_counter() - start
+
+    # Planes de las consultas calientes con las estadísticas de la base recién cargada
+    for name, scans in check_plans(get_connection()).items():
+        bad_plans[f'{scale}x/{name}'] = scans
+
+    # Endpoints sobre la base recién cargada, sin el caché de respuestas
+    app.pool = ConnectionPool()
+    client = app.app.test_client()
+    try:
+        for endpoint in ENDPOINTS:
+            samples = []
+            while len(samples) < ENDPOINT_REQUESTS and (len(samples) < ENDPOINT_MIN_REQUESTS
+                                                        or sum(samples) < ENDPOINT_BUDGET_SECONDS):
+                app.response_cache.clear()
+                start = time.perf_counter()
+                response = client.get(endpoint)
+                samples.append(time.perf_counter() - start)
+                if response.status_code != 200:
+                    raise RuntimeError(f'{endpoint} respondió HTTP {response.status_code}')
+            timings[f'{scale}x/api{endpoint}'] = statistics.median(samples)
+    finally:
+        app.pool.close()
+    return timings
+
+
+def run_suite(scales, repeat):
+    """Mediana de cada medición sobre `repeat` corridas por escala.
+
+    Devuelve (resultados, mediciones que no se pudieron tomar, {consulta: escaneos completos}).
+    """
+    results = {}
+    skipped = set()
+    bad_plans = {}
+    cwd = os.getcwd()
+    # La importación de matplotlib no se cuenta en el primer render
+    get_pyplot()
+    with tempfile.TemporaryDirectory() as root:
+        fixtures = os.path.join(root, 'fixtures')
+        for scale in scales:
+            scale_fixtures(os.path.join(fixtures, f'{scale}x'), scale)
+        with serve(fixtures) as base_url:
+            for scale in scales:
+                runs = []
+                for attempt in range(repeat):
+                    # Base, caché de descargas, instantáneas e imágenes usan rutas relativas
+                    workdir = os.path.join(root, f'run-{scale}x-{attempt}')
+                    os.makedirs(workdir)
+                    os.chdir(workdir)
+                    try:
+                        runs.append(run_once(base_url, scale, skipped, bad_plans))
+                    finally:
+                        close_connections()
+                        os.chdir(cwd)
+                for name in runs[0]:
+                    results[name] = statistics.median(run[name] for run in runs)
+                print(f"Escala {scale}x: {len(runs[0])} mediciones")
+    return results, sorted(skipped), bad_plans
+
+
+def compare(results, baseline, tolerance, scales):
+    """Imprime la comparación y devuelve (regresiones, mediciones del baseline que faltan).
+
+    Del baseline solo se cuentan las escalas que se corrieron (`scales`).
+    """
+    prefixes = tuple(f'{scale}x/' for scale in scales)
+    baseline = {name: seconds for name, seconds in baseline.items() if name.startswith(prefixes)}
+    regressions = []
+    missing = []
+    print(f"{'medición':<60} {'actual':>10} {'baseline':>10} {'cambio':>8}")
+    for name in sorted(results.keys() | baseline.keys()):
+        seconds, reference = results.get(name), baseline.get(name)
+        if seconds is None:
+            print(f"{name:<60} {'-':>10} {reference * 1000:8.1f}ms {'FALTA':>8}")
+            missing.append(name)
+            continue
+        if reference is None:
+            print(f"{name:<60} {seconds * 1000:8.1f}ms {'-':>10} {'nuevo':>8}")
+            continue
+        change = seconds / reference - 1 if reference else 0.0
+        regressed = change > tolerance and seconds - reference > MIN_DELTA_SECONDS
+        flag = '  REGRESIÓN' if regressed else ''
+        print(f"{name:<60} {seconds * 1000:8.1f}ms {reference * 1000:8.1f}ms {change:+8.0%}{flag}")
+        if regressed:
+            regressions.append(name)
+    return regressions, missing
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Benchmarks offline de las tres fuentes contra un baseline.')
+    parser.add_argument('--scales', default='1,10,100', help='Factores de escala de las fixtures, separados por coma')
+    parser.add_argument('--repeat', type=int, default=3, help='Corridas por escala (se toma la mediana)')
+    parser.add_argument('--tolerance', type=float, default=DEFAULT_TOLERANCE, help='Empeoramiento relativo permitido')
+    parser.add_argument('--baseline', default=BASELINE_PATH, help='Archivo JSON del baseline')
+    parser.add_argument('--update-baseline', action='store_true', help='Guardar los resultados como baseline')
+    args = parser.parse_args(argv)
+
+    scales = [int(scale) for scale in args.scales.split(',')]
+    results, skipped, bad_plans = run_suite(scales, args.repeat)
+    for name, scans in bad_plans.items():
+        print(f"Escaneo completo en la consulta caliente {name}: {'; '.join(scans)}")
+
+    if args.update_baseline:
+        if skipped:
+            print(f"\nNo se guarda un baseline incompleto; sin medir: {', '.join(skipped)}")
+            return 1
+        if bad_plans:
+            print(f"\nNo se guarda el baseline: {len(bad_plans)} consultas calientes con escaneos completos")
+            return 1
+        with open(args.baseline, 'w', encoding='utf-8') as file:
+            json.dump({
+                'created_at': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+                'machine': f'{platform.machine()} {platform.processor() or platform.system()}',
+                'python': platform.python_version(),
+                'repeat': args.repeat,
+                'results': results,
+            }, file, indent=2, sort_keys=True)
+            file.write('\n')
+        print(f"Baseline guardado en {args.baseline}")
+        return 0
+
+    if not os.path.exists(args.baseline):
+        print(f"No hay baseline en {args.baseline}; correr con --update-baseline")
+        return 1
+    with open(args.baseline, 'r', encoding='utf-8') as file:
+        baseline = json.load(file)['results']
+    regressions, missing = compare(results, baseline, args.tolerance, scales)
+    if skipped:
+        print(f"\n{len(skipped)} mediciones SIN TOMAR (falta una dependencia): {', '.join(skipped)}")
+    if missing:
+        print(f"\n{len(missing)} mediciones del baseline FALTAN en esta corrida: {', '.join(missing)}")
+    if regressions:
+        print(f"\n{len(regressions)} REGRESIONES (tolerancia {args.tolerance:.0%}): {', '.join(regressions)}")
+    if bad_plans:
+        print(f"\n{len(bad_plans)} CONSULTAS CALIENTES con escaneos completos: {', '.join(bad_plans)}")
+    if skipped or missing or regressions or bad_plans:
+        return 1
+    print("\nSin regresiones")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,103 @@
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+import BCRA_exchangerate
+import INDEC_employment
+import INDEC_inflation
+from database import DB_PATH
+from render import figure_bytes, get_pyplot
+
+# Procesos que dibujan gráficos a pedido para la API (matplotlib no libera el GIL)
+CHART_WORKERS = int(os.environ.get('CHART_WORKERS', 2))
+
+# Tabla de origen de cada gráfico: su contador de ingesta (database.bump_generation) es la versión de los datos
+CHART_TABLES = {
+    'employment': 'FT_world_indicator',
+    'inflation': 'FT_indec_ipc',
+    'exchange_rate': 'FT_BCRA_dolar',
+}
+
+
+class ChartError(ValueError):
+    pass
+
+
+def _employment(params):
+    """Desempleo de todos los países entre dos años, resaltando el país `country` (código ISO3)."""
+    df = INDEC_employment.query_data(params['year_from'], params['year_to'], params['db_path'])
+    rollups = INDEC_employment.read_rollups(params['year_from'], params['year_to'], params['db_path'])
+    if df.empty or rollups.empty:
+        raise ChartError('No hay datos de desempleo para el rango de años pedido')
+    names = df.set_index('Country Code')['Country Name']
+    if params['country'] not in names.index:
+        raise ChartError(f"No hay datos para el país {params['country']}")
+    return INDEC_employment.draw_figure(df, names[params['country']], params['year_from'], params['year_to'], rollups)
+
+
+def _inflation(params):
+    """Variación mensual del IPC Nacional entre dos períodos, con `horizon` períodos de proyección."""
+    df = INDEC_inflation.query_data(params['period_from'], params['period_to'], db_path=params['db_path'])
+    if df.empty:
+        raise ChartError('No hay datos del IPC para el rango de períodos pedido')
+    return INDEC_inflation.draw_figure(df, params['horizon'])
+
+
+def _exchange_rate(params):
+    """Tipo de cambio diario entre dos fechas."""
+    df = BCRA_exchangerate.query_data(params['date_from'], params['date_to'], params['db_path'])
+    if df.empty:
+        raise ChartError('No hay cotizaciones para el rango de fechas pedido')
+    return BCRA_exchangerate.draw_figure(df, params['date_from'])
+
+
+DRAW = {
+    'employment': _employment,
+    'inflation': _inflation,
+    'exchange_rate': _exchange_rate,
+}
+
+
+def render_chart(chart, params, fmt, dpi, db_path=DB_PATH):
+    """Dibuja `chart` con los datos actuales de la base y devuelve la imagen. Corre en un worker."""
+    plt = DRAW[chart]({**params, 'db_path': db_path})
+    return figure_bytes(plt, fmt, dpi)
+
+
+def _warm_up():
+    # Importar matplotlib al arrancar el worker, no en el primer pedido
+    get_pyplot()
+
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def _get_executor():
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            # spawn y no fork: el servidor tiene hilos (y locks tomados) al crear el pool
+            _executor = ProcessPoolExecutor(max_workers=CHART_WORKERS, mp_context=multiprocessing.get_context('spawn'),
+                                            initializer=_warm_up)
+        return _executor
+
+
+def submit(chart, params, fmt, dpi, db_path=DB_PATH):
+    """Encola el dibujo de `chart` en el pool de procesos y devuelve el Future con los bytes."""
+    try:
+        return _get_executor().submit(render_chart, chart, params, fmt, dpi, os.path.abspath(db_path))
+    except BrokenProcessPool:
+        # Un worker murió (p. ej. por memoria): se descarta el pool y se crea otro
+        shutdown(wait=False)
+        return _get_executor().submit(render_chart, chart, params, fmt, dpi, os.path.abspath(db_path))
+
+
+def shutdown(wait=True):
+    global _executor
+    with _executor_lock:
+        executor, _executor = _executor, None
+    if executor is not None:
+        executor.shutdown(wait=wait, cancel_futures=not wait)
@@ -0,0 +1,487 @@
+import os
+import queue
+import sqlite3
+import threading
+from contextlib import contextmanager
+
+from queries import fetch_all
+
+# Ruta de la base de datos compartida por los scripts de ingesta y la API
+DB_PATH = os.path.join('databases', 'social_indicators.db')
+
+# WAL permite que los lectores (la API) sigan respondiendo mientras una ingesta escribe
+PRAGMAS = [
+    ('journal_mode', 'WAL'),
+    ('synchronous', 'NORMAL'),
+    ('cache_size', -32000),       # ~32 MB de caché de páginas por conexión
+    ('mmap_size', 268435456),     # 256 MB mapeados en memoria para lecturas
+    ('temp_store', 'MEMORY'),
+    ('busy_timeout', 10000),      # milisegundos de espera antes de "database is locked"
+]
+
+# Sentencias preparadas que sqlite3 guarda por conexión (las consultas con nombre de queries.py)
+STATEMENT_CACHE_SIZE = 256
+
+# Codigo de FT_indec_ipc como texto de dos dígitos: el loader original (to_sql) infería la columna
+# como INTEGER y guardaba "01" como 1, mientras que las cargas actuales usan el texto del CSV ("01")
+LEGACY_IPC_CODIGO = "CASE WHEN CAST({col} AS TEXT) GLOB '[1-9]' THEN '0' || {col} ELSE CAST({col} AS TEXT) END"
+
+
+def _backfill_world_rollups(conn):
+    """Calcula FT_world_indicator_rollup de los indicadores ya cargados (paso de la migración 11)."""
+    # Import diferido: worldbank importa este módulo
+    from worldbank import refresh_rollups
+    codes = [row[0] for row in conn.execute('SELECT DISTINCT Indicator_Code FROM FT_world_indicator')]
+    if codes:
+        refresh_rollups(conn, codes)
+
+
+# Migraciones versionadas (PRAGMA user_version): cada una es una lista de sentencias SQL, o de
+# funciones que reciben la conexión cuando el paso no se puede expresar en SQL.
+# Son dueñas de todas las tablas FT_* y sus índices; los scripts ya no crean esquema.
+MIGRATIONS = [
+    (1, 'Tablas de hechos iniciales', [
+        '''
+        CREATE TABLE IF NOT EXISTS FT_world_employment (
+            Country_Name TEXT,
+            Country_Code TEXT,
+            Indicator_Name TEXT,
+            Indicator_Code TEXT,
+            Year INTEGER,
+            Value REAL
+        )
+        ''',
+        '''
+        CREATE TABLE IF NOT EXISTS FT_indec_ipc (
+            Codigo TEXT,
+            Descripcion TEXT,
+            Clasificador TEXT,
+            Periodo INTEGER,
+            Indice_IPC TEXT,
+            v_m_IPC TEXT,
+            v_i_a_IPC TEXT,
+            Region TEXT
+        )
+        ''',
+        '''
+        CREATE TABLE IF NOT EXISTS FT_BCRA_dolar (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            ID_tie_date DATE,
+            F_bcra_dolar FLOAT
+        )
+        ''',
+    ]),
+    (2, 'Clave natural única de FT_indec_ipc', [
+        # Las ejecuciones con to_sql(append) duplicaban la serie: se conserva la última copia
+        f'''
+        UPDATE FT_indec_ipc SET Codigo = {LEGACY_IPC_CODIGO.format(col='Codigo')}
+        WHERE typeof(Codigo) = 'integer'
+        ''',
+        f'''
+        DELETE FROM FT_indec_ipc
+        WHERE rowid NOT IN (
+            SELECT MAX(rowid) FROM FT_indec_ipc GROUP BY {LEGACY_IPC_CODIGO.format(col='Codigo')}, Region, Periodo
+        )
+        ''',
+        'CREATE UNIQUE INDEX IF NOT EXISTS UX_indec_ipc_natural ON FT_indec_ipc (Codigo, Region, Periodo)',
+    ]),
+    (3, 'Índice por fecha de FT_BCRA_dolar', [
+        # /get_exchange_rate_data filtra y ordena por fecha: búsqueda por rango en lugar de escaneo + sort
+        'CREATE INDEX IF NOT EXISTS IX_BCRA_dolar_fecha ON FT_BCRA_dolar (ID_tie_date)',
+    ]),
+    (4, 'Contador de generación por tabla de ingesta', [
+        # La API invalida su caché de respuestas cuando cambia la generación de una tabla
+        '''
+        CREATE TABLE IF NOT EXISTS ingest_generation (
+            table_name TEXT PRIMARY KEY,
+            generation INTEGER NOT NULL,
+            updated_at TEXT NOT NULL
+        )
+        ''',
+    ]),
+    (5, 'Índices de FT_world_employment para la API', [
+        # Series por país y agregados globales por año (GROUP BY Year recorriendo el índice)
+        'CREATE INDEX IF NOT EXISTS IX_world_employment_pais ON FT_world_employment (Country_Code, Year)',
+        'CREATE INDEX IF NOT EXISTS IX_world_employment_anio ON FT_world_employment (Indicator_Code, Year, Value)',
+    ]),
+    (6, 'Fecha como clave primaria de FT_BCRA_dolar', [
+        # Permite la carga incremental con upsert por fecha; la clave reemplaza a IX_BCRA_dolar_fecha
+        'CREATE TABLE FT_BCRA_dolar_new (ID_tie_date DATE PRIMARY KEY, F_bcra_dolar FLOAT)',
+        '''
+        INSERT INTO FT_BCRA_dolar_new (ID_tie_date, F_bcra_dolar)
+        SELECT ID_tie_date, F_bcra_dolar FROM FT_BCRA_dolar
+        WHERE id IN (SELECT MAX(id) FROM FT_BCRA_dolar WHERE ID_tie_date IS NOT NULL GROUP BY ID_tie_date)
+        ''',
+        'DROP TABLE FT_BCRA_dolar',
+        'ALTER TABLE FT_BCRA_dolar_new RENAME TO FT_BCRA_dolar',
+    ]),
+    (7, 'Tabla larga de indicadores del Banco Mundial', [
+        # Un único hecho por (indicador, país, año); los nombres pasan a dimensiones
+        '''
+        CREATE TABLE FT_world_indicator (
+            Indicator_Code TEXT NOT NULL,
+            Country_Code TEXT NOT NULL,
+            Year INTEGER NOT NULL,
+            Value REAL,
+            PRIMARY KEY (Indicator_Code, Country_Code, Year)
+        ) WITHOUT ROWID
+        ''',
+        'CREATE TABLE DIM_world_country (Country_Code TEXT PRIMARY KEY, Country_Name TEXT)',
+        'CREATE TABLE DIM_world_indicator (Indicator_Code TEXT PRIMARY KEY, Indicator_Name TEXT)',
+        '''
+        INSERT INTO DIM_world_country (Country_Code, Country_Name)
+        SELECT Country_Code, MAX(Country_Name) FROM FT_world_employment
+        WHERE Country_Code IS NOT NULL GROUP BY Country_Code
+        ''',
+        '''
+        INSERT INTO DIM_world_indicator (Indicator_Code, Indicator_Name)
+        SELECT Indicator_Code, MAX(Indicator_Name) FROM FT_world_employment
+        WHERE Indicator_Code IS NOT NULL GROUP BY Indicator_Code
+        ''',
+        '''
+        INSERT OR REPLACE INTO FT_world_indicator (Indicator_Code, Country_Code, Year, Value)
+        SELECT Indicator_Code, Country_Code, Year, Value FROM FT_world_employment
+        WHERE Indicator_Code IS NOT NULL AND Country_Code IS NOT NULL AND Year IS NOT NULL
+        ''',
+        # Agregados globales por año (GROUP BY Year recorriendo el índice)
+        'CREATE INDEX IX_world_indicator_anio ON FT_world_indicator (Indicator_Code, Year, Value)',
+        'DROP TABLE FT_world_employment',
+        # FT_world_employment se mantiene como vista del desempleo para las consultas existentes
+        '''
+        CREATE VIEW FT_world_employment AS
+        SELECT c.Country_Name, f.Country_Code, i.Indicator_Name, f.Indicator_Code, f.Year, f.Value
+        FROM FT_world_indicator f
+        JOIN DIM_world_country c ON c.Country_Code = f.Country_Code
+        JOIN DIM_world_indicator i ON i.Indicator_Code = f.Indicator_Code
+        WHERE f.Indicator_Code = 'SL.UEM.TOTL.ZS'
+        ''',
+    ]),
+    (8, 'FT_indec_ipc tipada y normalizada', [
+        # Región y división pasan a dimensiones con clave entera; los valores se guardan como REAL
+        'CREATE TABLE DIM_indec_region (ID_region INTEGER PRIMARY KEY, Region TEXT NOT NULL UNIQUE)',
+        '''
+        CREATE TABLE DIM_indec_division (
+            ID_division INTEGER PRIMARY KEY,
+            Codigo TEXT NOT NULL UNIQUE,
+            Descripcion TEXT,
+            Clasificador TEXT
+        )
+        ''',
+        '''
+        INSERT INTO DIM_indec_region (Region)
+        SELECT DISTINCT Region FROM FT_indec_ipc WHERE Region IS NOT NULL ORDER BY Region
+        ''',
+        # En una tabla creada por to_sql la columna sigue siendo INTEGER (1 y no "01"): se normaliza acá
+        f'''
+        INSERT INTO DIM_indec_division (Codigo, Descripcion, Clasificador)
+        SELECT {LEGACY_IPC_CODIGO.format(col='Codigo')} AS Codigo, MAX(Descripcion), MAX(Clasificador)
+        FROM FT_indec_ipc
+        WHERE Codigo IS NOT NULL GROUP BY 1 ORDER BY 1
+        ''',
+        # Clave (división, región, período): los filtros de la API y del gráfico son búsquedas por índice
+        '''
+        CREATE TABLE FT_indec_ipc_new (
+            ID_division INTEGER NOT NULL,
+            ID_region INTEGER NOT NULL,
+            Periodo INTEGER NOT NULL,
+            Indice_IPC REAL,
+            v_m_IPC REAL,
+            v_i_a_IPC REAL,
+            PRIMARY KEY (ID_division, ID_region, Periodo)
+        ) WITHOUT ROWID
+        ''',
+        # Coma decimal a punto; "NA" y vacíos pasan a NULL
+        f'''
+        INSERT INTO FT_indec_ipc_new (ID_division, ID_region, Periodo, Indice_IPC, v_m_IPC, v_i_a_IPC)
+        SELECT d.ID_division, r.ID_region, CAST(f.Periodo AS INTEGER),
+               CASE WHEN f.Indice_IPC GLOB '*[0-9]*' THEN CAST(REPLACE(f.Indice_IPC, ',', '.') AS REAL) END,
+               CASE WHEN f.v_m_IPC GLOB '*[0-9]*' THEN CAST(REPLACE(f.v_m_IPC, ',', '.') AS REAL) END,
+               CASE WHEN f.v_i_a_IPC GLOB '*[0-9]*' THEN CAST(REPLACE(f.v_i_a_IPC, ',', '.') AS REAL) END
+        FROM FT_indec_ipc f
+        JOIN DIM_indec_division d ON d.Codigo = {LEGACY_IPC_CODIGO.format(col='f.Codigo')}
+        JOIN DIM_indec_region r ON r.Region = f.Region
+        WHERE f.Periodo IS NOT NULL
+        ''',
+        'DROP TABLE FT_indec_ipc',
+        'ALTER TABLE FT_indec_ipc_new RENAME TO FT_indec_ipc',
+        # Consultas por región sin fijar la división
+        'CREATE INDEX IX_indec_ipc_region ON FT_indec_ipc (ID_region, Periodo)',
+        # Vista con las columnas originales (ya numéricas) para las consultas por nombre
+        '''
+        CREATE VIEW V_indec_ipc AS
+        SELECT d.Codigo, d.Descripcion, d.Clasificador, f.Periodo, f.Indice_IPC, f.v_m_IPC, f.v_i_a_IPC, r.Region
+        FROM FT_indec_ipc f
+        JOIN DIM_indec_division d ON d.ID_division = f.ID_division
+        JOIN DIM_indec_region r ON r.ID_region = f.ID_region
+        ''',
+    ]),
+    (9, 'Tablas de métricas derivadas', [
+        # Períodos (YYYYMM) tocados por las cargas y todavía no recalculados por derived.py
+        '''
+        CREATE TABLE derived_pending (
+            source TEXT NOT NULL,
+            Periodo INTEGER NOT NULL,
+            PRIMARY KEY (source, Periodo)
+        ) WITHOUT ROWID
+        ''',
+        # Variación interanual y acumulada en el año (%), compuestas desde v_m_IPC
+        '''
+        CREATE TABLE FT_indec_ipc_derived (
+            ID_division INTEGER NOT NULL,
+            ID_region INTEGER NOT NULL,
+            Periodo INTEGER NOT NULL,
+            Var_interanual REAL,
+            Var_acumulada REAL,
+            PRIMARY KEY (ID_division, ID_region, Periodo)
+        ) WITHOUT ROWID
+        ''',
+        '''
+        CREATE TABLE FT_BCRA_dolar_mensual (
+            Periodo INTEGER PRIMARY KEY,
+            Promedio REAL,
+            Minimo REAL,
+            Maximo REAL,
+            Cierre REAL,
+            Dias INTEGER
+        )
+        ''',
+        # Dólar promedio del mes en pesos constantes de la base del IPC (diciembre 2016 = 100)
+        '''
+        CREATE TABLE FT_dolar_real (
+            Periodo INTEGER PRIMARY KEY,
+            Dolar_promedio REAL,
+            Indice_IPC REAL,
+            Dolar_real REAL
+        )
+        ''',
+        '''
+        CREATE VIEW V_indec_ipc_derived AS
+        SELECT d.Codigo, d.Descripcion, r.Region, f.Periodo, f.Var_interanual, f.Var_acumulada
+        FROM FT_indec_ipc_derived f
+        JOIN DIM_indec_division d ON d.ID_division = f.ID_division
+        JOIN DIM_indec_region r ON r.ID_region = f.ID_region
+        ''',
+        # La primera ejecución de derived.py calcula toda la historia ya cargada
+        '''
+        INSERT INTO derived_pending (source, Periodo)
+        SELECT DISTINCT 'FT_indec_ipc', Periodo FROM FT_indec_ipc
+        ''',
+        '''
+        INSERT INTO derived_pending (source, Periodo)
+        SELECT DISTINCT 'FT_BCRA_dolar', CAST(substr(ID_tie_date, 1, 4) || substr(ID_tie_date, 6, 2) AS INTEGER)
+        FROM FT_BCRA_dolar WHERE ID_tie_date IS NOT NULL
+        ''',
+    ]),
+    (10, 'Registro de ejecuciones del pipeline', [
+        # Una fila por ejecución; stages tiene un objeto JSON por etapa y por línea (JSON-lines)
+        '''
+        CREATE TABLE pipeline_runs (
+            run_id INTEGER PRIMARY KEY,
+            script TEXT NOT NULL,
+            started_at TEXT NOT NULL,
+            seconds REAL NOT NULL,
+            status TEXT NOT NULL,
+            peak_rss_bytes INTEGER,
+            stages TEXT NOT NULL
+        )
+        ''',
+        'CREATE INDEX IX_pipeline_runs_script ON pipeline_runs (script, run_id)',
+    ]),
+    (11, 'Metadatos de países y agregados anuales de los indicadores del Banco Mundial', [
+        # Del Metadata_Country del ZIP; los agregados (regiones, grupos de ingreso, "Mundo") no tienen región
+        'ALTER TABLE DIM_world_country ADD COLUMN Region TEXT',
+        'ALTER TABLE DIM_world_country ADD COLUMN Income_Group TEXT',
+        'ALTER TABLE DIM_world_country ADD COLUMN Is_Aggregate INTEGER',
+        # Estadísticas por indicador y año sobre países reales, calculadas en la carga (worldbank.refresh_rollups).
+        '''
+        CREATE TABLE FT_world_indicator_rollup (
+            Indicator_Code TEXT NOT NULL,
+            Year INTEGER NOT NULL,
+            Countries INTEGER NOT NULL,
+            Mean REAL,
+            Median REAL,
+            P10 REAL,
+            P25 REAL,
+            P75 REAL,
+            P90 REAL,
+            Min_Country TEXT,
+            Min_Value REAL,
+            Max_Country TEXT,
+            Max_Value REAL,
+            PRIMARY KEY (Indicator_Code, Year)
+        ) WITHOUT ROWID
+        ''',
+        # Los indicadores ya cargados tienen agregados desde el primer arranque, aunque su ZIP no cambie.
+        # Sin Metadata_Country todavía se cuentan todos los códigos; la próxima carga los recalcula.
+        _backfill_world_rollups,
+    ]),
+    (12, 'Conteo de ejecuciones del pipeline por script y estado', [
+        # Lo mantiene instrumentation.Run al guardar cada ejecución; /metrics lo lee sin recorrer pipeline_runs
+        '''
+        CREATE TABLE pipeline_run_counts (
+            script TEXT NOT NULL,
+            status TEXT NOT NULL,
+            runs INTEGER NOT NULL,
+            last_run_id INTEGER NOT NULL,
+            PRIMARY KEY (script, status)
+        ) WITHOUT ROWID
+        ''',
+        '''
+        INSERT INTO pipeline_run_counts (script, status, runs, last_run_id)
+        SELECT script, status, COUNT(*), MAX(run_id) FROM pipeline_runs GROUP BY script, status
+        ''',
+    ]),
+]
+
+_local = threading.local()
+_migrated = set()
+_migrate_lock = threading.Lock()
+
+
+def apply_pragmas(conn):
+    for name, value in PRAGMAS:
+        conn.execute(f'PRAGMA {name} = {value}')
+
+
+def schema_version(conn):
+    return conn.execute('PRAGMA user_version').fetchone()[0]
+
+
+def migrate(conn):
+    """Aplica las migraciones pendientes, cada una en su propia transacción."""
+    version = schema_version(conn)
+    applied = []
+    isolation_level = conn.isolation_level
+    conn.isolation_level = None
+    try:
+        for number, description, statements in MIGRATIONS:
+            if number <= version:
+                continue
+            conn.execute('BEGIN IMMEDIATE')
+            try:
+                # Otro proceso pudo haberla aplicado mientras esperábamos el lock
+                if schema_version(conn) >= number:
+                    conn.execute('COMMIT')
+                    continue
+                for statement in statements:
+                    if callable(statement):
+                        statement(conn)
+                    else:
+                        conn.execute(statement)
+                conn.execute(f'PRAGMA user_version = {number}')
+                conn.execute('COMMIT')
+            except Exception:
+                conn.execute('ROLLBACK')
+                raise
+            applied.append((number, description))
+    finally:
+        conn.isolation_level = isolation_level
+    return applied
+
+
+def bump_generation(conn, table_name):
+    """Incrementa la generación de `table_name`; llamar dentro de la transacción de carga."""
+    conn.execute('''
+    INSERT INTO ingest_generation (table_name, generation, updated_at)
+    VALUES (?, 1, CURRENT_TIMESTAMP)
+    ON CONFLICT (table_name) DO UPDATE SET generation = generation + 1, updated_at = CURRENT_TIMESTAMP
+    ''', (table_name,))
+
+
+def read_generations(conn):
+    """Devuelve {tabla: generación} para todas las tablas cargadas al menos una vez."""
+    return dict(fetch_all(conn, 'ingest.generations'))
+
+
+def connect(db_path=DB_PATH, run_migrations=True, check_same_thread=True):
+    """Abre una conexión nueva con los pragmas aplicados y el esquema al día."""
+    db_folder = os.path.dirname(db_path)
+    if db_folder:
+        os.makedirs(db_folder, exist_ok=True)
+    conn = sqlite3.connect(db_path, timeout=10, check_same_thread=check_same_thread,
+                           cached_statements=STATEMENT_CACHE_SIZE)
+    apply_pragmas(conn)
+    if run_migrations:
+        # Una base en memoria es nueva en cada conexión: siempre se migra
+        key = os.path.abspath(db_path) if db_path != ':memory:' else None
+        with _migrate_lock:
+            if key is None or key not in _migrated:
+                migrate(conn)
+                if key is not None:
+                    _migrated.add(key)
+    return conn
+
+
+def get_connection(db_path=DB_PATH):
+    """Devuelve la conexión de este hilo para `db_path`, creándola la primera vez.
+
+    Las conexiones se reutilizan entre llamadas del mismo hilo; si el proceso se
+    bifurcó (p. ej. un worker del pool de procesos) se descartan las heredadas.
+    """
+    pid = os.getpid()
+    if getattr(_local, 'pid', None) != pid:
+        _local.pid = pid
+        _local.connections = {}
+    key = os.path.abspath(db_path)
+    conn = _local.connections.get(key)
+    if conn is None:
+        conn = connect(db_path)
+        _local.connections[key] = conn
+    return conn
+
+
+def close_connections():
+    """Cierra las conexiones abiertas por este hilo."""
+    for conn in getattr(_local, 'connections', {}).values():
+        conn.close()
+    _local.connections = {}
+
+
+class ConnectionPool:
+    """Pool acotado de conexiones compartidas entre hilos.
+
+    Pensado para servidores que crean un hilo por request (como el de Flask), donde
+    las conexiones por hilo de `get_connection` no llegarían a reutilizarse.
+    """
+
+    def __init__(self, db_path=DB_PATH, size=8):
+        self.db_path = db_path
+        self.size = size
+        self._idle = queue.LifoQueue()
+        self._created = 0
+        self._lock = threading.Lock()
+        self._pid = os.getpid()
+
+    def _acquire(self):
+        if self._pid != os.getpid():
+            # Las conexiones no se comparten entre procesos bifurcados
+            self._idle = queue.LifoQueue()
+            self._created = 0
+            self._pid = os.getpid()
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            pass
+        with self._lock:
+            if self._created < self.size:
+                self._created += 1
+                return connect(self.db_path, check_same_thread=False)
+        return self._idle.get()
+
+    @contextmanager
+    def connection(self):
+        conn = self._acquire()
+        try:
+            yield conn
+        finally:
+            if conn.in_transaction:
+                conn.rollback()
+            self._idle.put(conn)
+
+    def close(self):
+        while True:
+            try:
+                self._idle.get_nowait().close()
+            except queue.Empty:
+                break
+        self._created = 0
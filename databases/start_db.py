@@ -1,15 +1,24 @@
-import sqlite3
-import csv
 import os
+import sys
 
-# Ensure the databases folder exists
-os.makedirs('databases', exist_ok=True)
+# Make the modules at the repository root importable when running this script directly
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-# Connect to the SQLite database named social_indicators.db
-conn = sqlite3.connect('databases/social_indicators.db')
-cursor = conn.cursor()
+from database import DB_PATH, connect, migrate, schema_version
 
+# Connect to the SQLite database named social_indicators.db (creates the databases folder if needed)
+conn = connect(DB_PATH, run_migrations=False)
 
-# Commit changes and close the connection
-conn.commit()
-conn.close()
\ No newline at end of file
+# Apply every pending schema migration (FT_* tables and indexes)
+applied = migrate(conn)
+for number, description in applied:
+    print(f"Applied migration {number}: {description}")
+
+# Migrations that rebuild tables leave free pages behind; VACUUM returns them to the filesystem
+if applied:
+    conn.execute('VACUUM')
+
+print(f"{DB_PATH} schema is at version {schema_version(conn)}")
+
+# Close the connection
+conn.close()
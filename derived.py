@@ -0,0 +1,160 @@
+import sys
+
+import numpy as np
+
+from database import DB_PATH, bump_generation, get_connection
+from queries import fetch_all, json_list, read_frame
+
+# Meses posteriores que dependen de un período revisado (la variación interanual compone 12 meses)
+IPC_LOOKAHEAD = 11
+
+# Serie del IPC usada como deflactor del dólar: NIVEL GENERAL, Nacional
+REAL_DOLLAR_DIVISION = '0'
+REAL_DOLLAR_REGION = 'Nacional'
+
+
+def _month_index(periods):
+    """YYYYMM -> número de mes correlativo (para restar y sumar meses)."""
+    periods = np.asarray(periods)
+    return periods // 100 * 12 + periods % 100 - 1
+
+
+def _period(month_index):
+    return month_index // 12 * 100 + month_index % 12 + 1
+
+
+def ipc_metrics(df):
+    """Variación interanual y acumulada en el año (%) de cada serie, compuestas desde v_m_IPC.
+
+    `df` tiene ID_division, ID_region, Periodo y v_m_IPC; se devuelve con Var_interanual y
+    Var_acumulada agregadas. Quedan en NaN si falta algún mes de la ventana.
+    """
+    month = _month_index(df['Periodo'].to_numpy())
+    first = month.min()
+    width = month.max() - first + 1
+    keys, series = np.unique(df[['ID_division', 'ID_region']].to_numpy(), axis=0, return_inverse=True)
+    series = series.ravel()
+
+    # Matriz (series x meses) de log(1 + v/100): las composiciones son diferencias de sumas acumuladas
+    growth = np.full((len(keys), width), np.nan)
+    growth[series, month - first] = np.log1p(df['v_m_IPC'].to_numpy(dtype=float) / 100)
+    present = ~np.isnan(growth)
+    zeros = np.zeros((len(keys), 1))
+    total = np.hstack([zeros, np.cumsum(np.where(present, growth, 0), axis=1)])
+    count = np.hstack([zeros, np.cumsum(present, axis=1)])
+
+    column = np.arange(width)
+
+    def compounded(start):
+        # Composición de las columnas start..column, solo si están todos los meses
+        start_ok = start >= 0
+        start = np.maximum(start, 0)
+        months = count[:, column + 1] - count[:, start]
+        value = np.expm1(total[:, column + 1] - total[:, start]) * 100
+        return np.where(start_ok & (months == column - start + 1), value, np.nan)
+
+    year_on_year = compounded(column - 11)
+    year_to_date = compounded(column - (first + column) % 12)
+
+    result = df.copy()
+    result['Var_interanual'] = year_on_year[series, month - first]
+    result['Var_acumulada'] = year_to_date[series, month - first]
+    return result
+
+
+def _refresh_ipc(conn, periods):
+    if not periods:
+        return 0
+    touched = np.unique(_month_index(periods))
+    affected = np.unique((touched[:, None] + np.arange(IPC_LOOKAHEAD + 1)).ravel())
+    # Se leen 11 meses antes del primer afectado: cubren la ventana interanual y el enero del año
+    df = read_frame(conn, 'derived.ipc_source', {
+        'period_from': int(_period(affected.min() - IPC_LOOKAHEAD)),
+        'period_to': int(_period(affected.max())),
+    })
+    if df.empty:
+        return 0
+    metrics = ipc_metrics(df)
+    metrics = metrics[np.isin(_month_index(metrics['Periodo'].to_numpy()), affected)]
+    columns = ['ID_division', 'ID_region', 'Periodo', 'Var_interanual', 'Var_acumulada']
+    rows = metrics[columns].astype(object).where(metrics[columns].notna(), None).itertuples(index=False, name=None)
+    cursor = conn.executemany('''
+    INSERT INTO FT_indec_ipc_derived (ID_division, ID_region, Periodo, Var_interanual, Var_acumulada)
+    VALUES (?, ?, ?, ?, ?)
+    ON CONFLICT (ID_division, ID_region, Periodo) DO UPDATE SET
+        Var_interanual = excluded.Var_interanual, Var_acumulada = excluded.Var_acumulada
+    ''', rows)
+    return cursor.rowcount
+
+
+def _refresh_dollar_monthly(conn, periods):
+    # Cada mes es una búsqueda por rango sobre la clave ID_tie_date
+    ranges = [(period, f'{period // 100:04d}-{period % 100:02d}-01', f'{period // 100:04d}-{period % 100:02d}-32')
+              for period in periods]
+    cursor = conn.executemany('''
+    INSERT INTO FT_BCRA_dolar_mensual (Periodo, Promedio, Minimo, Maximo, Cierre, Dias)
+    SELECT ?1, AVG(F_bcra_dolar), MIN(F_bcra_dolar), MAX(F_bcra_dolar),
+           (SELECT F_bcra_dolar FROM FT_BCRA_dolar WHERE ID_tie_date >= ?2 AND ID_tie_date < ?3
+            ORDER BY ID_tie_date DESC LIMIT 1),
+           COUNT(*)
+    FROM FT_BCRA_dolar
+    WHERE ID_tie_date >= ?2 AND ID_tie_date < ?3
+    HAVING COUNT(*) > 0
+    ON CONFLICT (Periodo) DO UPDATE SET
+        Promedio = excluded.Promedio, Minimo = excluded.Minimo, Maximo = excluded.Maximo,
+        Cierre = excluded.Cierre, Dias = excluded.Dias
+    ''', ranges)
+    return max(cursor.rowcount, 0)
+
+
+def _refresh_real_dollar(conn, periods):
+    if not periods:
+        return 0
+    cursor = conn.execute('''
+    INSERT INTO FT_dolar_real (Periodo, Dolar_promedio, Indice_IPC, Dolar_real)
+    SELECT m.Periodo, m.Promedio, i.Indice_IPC, m.Promedio * 100 / i.Indice_IPC
+    FROM FT_BCRA_dolar_mensual m
+    JOIN V_indec_ipc i ON i.Periodo = m.Periodo AND i.Codigo = ? AND i.Region = ?
+    WHERE m.Periodo IN (SELECT value FROM json_each(?))
+    ON CONFLICT (Periodo) DO UPDATE SET
+        Dolar_promedio = excluded.Dolar_promedio, Indice_IPC = excluded.Indice_IPC, Dolar_real = excluded.Dolar_real
+    ''', (REAL_DOLLAR_DIVISION, REAL_DOLLAR_REGION, json_list(periods)))
+    return cursor.rowcount
+
+
+def refresh_derived(conn):
+    """Recalcula las métricas derivadas de los períodos pendientes (derived_pending) y vacía la cola.
+
+    Las cargas de IPC y dólar encolan los períodos que tocan en su misma transacción; acá solo
+    se recalculan esos y los que dependen de ellos. Devuelve {tabla: filas escritas}.
+    """
+    with conn:
+        # Lock de escritura desde el inicio: un período encolado durante el cálculo no se pierde
+        conn.execute('BEGIN IMMEDIATE')
+        pending = fetch_all(conn, 'derived.pending')
+        ipc = sorted(period for source, period in pending if source == 'FT_indec_ipc')
+        dollar = sorted(period for source, period in pending if source == 'FT_BCRA_dolar')
+
+        written = {
+            'FT_indec_ipc_derived': _refresh_ipc(conn, ipc),
+            'FT_BCRA_dolar_mensual': _refresh_dollar_monthly(conn, dollar),
+        }
+        # El dólar real cambia con el dólar del mes o con el IPC del mes
+        written['FT_dolar_real'] = _refresh_real_dollar(conn, sorted(set(ipc) | set(dollar)))
+
+        conn.execute('DELETE FROM derived_pending')
+        for table, rows in written.items():
+            if rows:
+                bump_generation(conn, table)
+    return written
+
+
+def main(db_path=DB_PATH):
+    written = refresh_derived(get_connection(db_path))
+    for table, rows in written.items():
+        print(f"{table}: {rows} filas recalculadas")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
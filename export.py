@@ -0,0 +1,236 @@
+import argparse
+import gzip
+import hashlib
+import io
+import json
+import os
+import shutil
+import sys
+from datetime import datetime, timezone
+
+import BCRA_exchangerate
+import INDEC_employment
+import INDEC_inflation
+import app
+from database import DB_PATH, ConnectionPool
+
+# Tablero estático: index.html y main.js leen todo de <sitio>/data/ sin la API de Flask.
+#   data/manifest.json                 (único archivo sin hash: el servidor debe revalidarlo)
+#   data/<nombre>.<hash>.json[.gz|.br] (cuerpos de la API, comprimidos de antemano)
+#   data/<gráfico>-<ancho>.<hash>.webp (cada gráfico en varios anchos para srcset)
+# Los archivos con hash nunca cambian de contenido: se pueden servir con Cache-Control immutable.
+DATA_FOLDER = 'data'
+MANIFEST_FILE = 'manifest.json'
+
+# Archivos del tablero que se copian cuando el sitio se exporta a otra carpeta
+SITE_FILES = ['index.html', 'main.js', 'styles', 'icons']
+
+# Instantánea -> pedido a la API; mismos cuerpos que sirve app.py
+SNAPSHOTS = {
+    # Las últimas 15 cotizaciones (la API por defecto mira 15 días hacia atrás desde hoy)
+    'exchange_rate': '/get_exchange_rate_data?from=0001-01-01&limit=15',
+    'exchange_rate_monthly': '/get_exchange_rate_monthly_data',
+    'real_exchange_rate': '/get_real_exchange_rate_data',
+    'inflation': '/get_inflation_data?region=Nacional',
+    'inflation_derived': '/get_inflation_derived_data',
+    'employment': '/get_employment_data?country=ARG',
+    'employment_global': '/get_employment_global_data',
+}
+
+# Diapositivas del tablero, en orden: imagen generada por cada script y tabla que la acompaña
+SLIDES = [
+    {'chart': 'employment', 'image': INDEC_employment.IMAGE_PATH, 'alt': 'Tasa de Empleo', 'table': None},
+    {'chart': 'inflation', 'image': INDEC_inflation.IMAGE_PATH, 'alt': 'IPC Histórico', 'table': None},
+    {'chart': 'exchange_rate', 'image': BCRA_exchangerate.IMAGE_PATH, 'alt': 'Evolución USD', 'table': 'exchange_rate'},
+]
+
+# Anchos (px) de las variantes de cada gráfico; nunca más que la imagen original
+IMAGE_WIDTHS = (480, 960, 1440)
+WEBP_QUALITY = 80
+
+
+def get_brotli():
+    """Importa brotli si está instalado; sin él solo se escriben las versiones .gz."""
+    try:
+        import brotli
+    except ImportError:
+        return None
+    return brotli
+
+
+def content_hash(body):
+    return hashlib.sha256(body).hexdigest()[:12]
+
+
+def _write_atomic(path, data):
+    tmp_path = f'{path}.{os.getpid()}.tmp'
+    with open(tmp_path, 'wb') as file:
+        file.write(data)
+    os.replace(tmp_path, path)
+
+
+def write_hashed(data_dir, stem, suffix, body):
+    """Escribe `body` como <stem>.<hash><suffix> (si no existe ya) y devuelve el nombre del archivo."""
+    name = f'{stem}.{content_hash(body)}{suffix}'
+    path = os.path.join(data_dir, name)
+    if not os.path.exists(path):
+        _write_atomic(path, body)
+    return name
+
+
+def export_snapshots(data_dir, db_path=DB_PATH):
+    """Guarda el cuerpo de cada pedido de SNAPSHOTS, con sus versiones comprimidas al lado.
+
+    Devuelve {nombre: ruta relativa al sitio}.
+    """
+    app.pool = ConnectionPool(db_path)
+    client = app.app.test_client()
+    brotli = get_brotli()
+    snapshots = {}
+    try:
+        for name, url in SNAPSHOTS.items():
+            response = client.get(url)
+            if response.status_code != 200:
+                raise RuntimeError(f'{url} respondió HTTP {response.status_code}: {response.get_data(as_text=True)[:200]}')
+            body = response.get_data()
+            filename = write_hashed(data_dir, name, '.json', body)
+            path = os.path.join(data_dir, filename)
+            # mtime=0: el mismo contenido da el mismo .gz en cada exportación
+            if not os.path.exists(f'{path}.gz'):
+                _write_atomic(f'{path}.gz', gzip.compress(body, compresslevel=9, mtime=0))
+            if brotli is not None and not os.path.exists(f'{path}.br'):
+                _write_atomic(f'{path}.br', brotli.compress(body))
+            snapshots[name] = f'{DATA_FOLDER}/{filename}'
+    finally:
+        app.pool.close()
+    return snapshots
+
+
+def _source_image(image_path):
+    # El script puede haber guardado el gráfico en cualquiera de los formatos de render.py
+    stem = os.path.splitext(image_path)[0]
+    for ext in ('webp', 'png', 'svg'):
+        if os.path.exists(f'{stem}.{ext}'):
+            return f'{stem}.{ext}'
+    return None
+
+
+def export_images(data_dir, slide, widths=IMAGE_WIDTHS):
+    """Variantes WebP de la imagen de `slide` para srcset, de la más chica a la más grande.
+
+    Devuelve [{'src', 'width', 'height'}, ...] o None si el gráfico todavía no se generó.
+    Un SVG se copia tal cual (escala sin perder calidad).
+    """
+    source = _source_image(slide['image'])
+    if source is None:
+        return None
+    if source.endswith('.svg'):
+        with open(source, 'rb') as file:
+            name = write_hashed(data_dir, slide['chart'], '.svg', file.read())
+        return [{'src': f'{DATA_FOLDER}/{name}', 'width': None, 'height': None}]
+
+    # Pillow viene con matplotlib; se importa acá como pyplot en render.py
+    from PIL import Image
+
+    variants = []
+    with Image.open(source) as image:
+        image = image.convert('RGB')
+        sizes = sorted({min(width, image.width) for width in widths})
+        for width in sizes:
+            height = round(image.height * width / image.width)
+            resized = image if width == image.width else image.resize((width, height), Image.LANCZOS)
+            buffer = io.BytesIO()
+            resized.save(buffer, format='WEBP', quality=WEBP_QUALITY, method=6)
+            name = write_hashed(data_dir, f"{slide['chart']}-{width}", '.webp', buffer.getvalue())
+            variants.append({'src': f'{DATA_FOLDER}/{name}', 'width': width, 'height': height})
+    return variants
+
+
+def _read_manifest(data_dir):
+    try:
+        with open(os.path.join(data_dir, MANIFEST_FILE), 'r', encoding='utf-8') as file:
+            return json.load(file)
+    except (OSError, ValueError):
+        return None
+
+
+def _manifest_files(manifest):
+    """Archivos de data/ a los que apunta `manifest` (sin las versiones comprimidas)."""
+    if not manifest:
+        return set()
+    files = {os.path.basename(path) for path in manifest.get('data', {}).values()}
+    for slide in manifest.get('slides', []):
+        files.update(os.path.basename(image['src']) for image in slide.get('images', []))
+    return files
+
+
+def prune(data_dir, keep):
+    """Borra los archivos de data/ que no están en `keep` (ni son sus .gz/.br). Devuelve cuántos borró."""
+    removed = 0
+    for name in os.listdir(data_dir):
+        base = name[:-3] if name.endswith(('.gz', '.br')) else name
+        if name == MANIFEST_FILE or base in keep:
+            continue
+        os.remove(os.path.join(data_dir, name))
+        removed += 1
+    return removed
+
+
+def copy_site(site_dir, source_dir=os.path.dirname(os.path.abspath(__file__))):
+    """Copia index.html, main.js, estilos e íconos a `site_dir` si es otra carpeta."""
+    if os.path.abspath(site_dir) == source_dir:
+        return
+    for name in SITE_FILES:
+        source = os.path.join(source_dir, name)
+        target = os.path.join(site_dir, name)
+        if os.path.isdir(source):
+            shutil.copytree(source, target, dirs_exist_ok=True)
+        else:
+            shutil.copy2(source, target)
+
+
+def export_site(site_dir='.', db_path=DB_PATH):
+    """Escribe las instantáneas, las imágenes y el manifest del tablero estático en `site_dir`.
+
+    El manifest se escribe al final y de forma atómica, así un navegador nunca lo ve apuntando
+    a archivos que todavía no existen. Se conservan los archivos del manifest anterior (por si
+    una página abierta los sigue pidiendo) y se borran los más viejos. Devuelve el manifest.
+    """
+    data_dir = os.path.join(site_dir, DATA_FOLDER)
+    os.makedirs(data_dir, exist_ok=True)
+    copy_site(site_dir)
+    previous = _read_manifest(data_dir)
+
+    snapshots = export_snapshots(data_dir, db_path)
+    slides = []
+    for slide in SLIDES:
+        images = export_images(data_dir, slide)
+        if images is None:
+            print(f"Sin imagen para {slide['chart']} ({slide['image']}): se omite la diapositiva")
+            continue
+        slides.append({'chart': slide['chart'], 'alt': slide['alt'], 'table': slide['table'], 'images': images})
+
+    manifest = {
+        'generated_at': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+        'data': snapshots,
+        'slides': slides,
+    }
+    _write_atomic(os.path.join(data_dir, MANIFEST_FILE),
+                  json.dumps(manifest, ensure_ascii=False, indent=2).encode('utf-8'))
+    removed = prune(data_dir, _manifest_files(manifest) | _manifest_files(previous))
+    print(f"Tablero exportado en {os.path.abspath(site_dir)}: {len(snapshots)} instantáneas, "
+          f"{len(slides)} gráficos, {removed} archivos viejos borrados")
+    return manifest
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Export the dashboard as static files (JSON snapshots and chart images).')
+    parser.add_argument('--out', default='.', help='Site folder (the one with index.html); by default the current one')
+    parser.add_argument('--db', default=DB_PATH, help='SQLite database to read from')
+    args = parser.parse_args(argv)
+    export_site(args.out, args.db)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
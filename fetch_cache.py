@@ -0,0 +1,141 @@
+import hashlib
+import json
+import os
+import time
+from collections import namedtuple
+
+import requests
+
+from http_client import DownloadTimeout, get_client
+
+# Carpeta del caché en disco (contenido descargado + validadores HTTP)
+CACHE_DIR = os.path.join('.cache', 'fetch')
+
+# path: archivo con el contenido cacheado; changed: si difiere de lo último procesado
+FetchResult = namedtuple('FetchResult', ['url', 'ok', 'status_code', 'path', 'sha256', 'changed', 'cache_dir'])
+
+
+def _entry_paths(url, cache_dir):
+    key = hashlib.sha256(url.encode('utf-8')).hexdigest()[:32]
+    return os.path.join(cache_dir, f'{key}.body'), os.path.join(cache_dir, f'{key}.json')
+
+
+def _read_meta(meta_path):
+    if not os.path.exists(meta_path):
+        return {}
+    with open(meta_path, 'r', encoding='utf-8') as file:
+        return json.load(file)
+
+
+def _write_atomic(path, data, mode='wb'):
+    tmp_path = f'{path}.tmp'
+    with open(tmp_path, mode) as file:
+        file.write(data)
+    os.replace(tmp_path, path)
+
+
+def _download(response, part_path, offset, deadline, chunk_size=1 << 16):
+    """Escribe el cuerpo en `part_path` por bloques (sin tenerlo entero en memoria) y devuelve su SHA-256.
+
+    Con `offset` > 0 la respuesta es la continuación (206) de los `offset` bytes ya guardados.
+    """
+    digest = hashlib.sha256()
+    if offset:
+        with open(part_path, 'rb') as file:
+            for chunk in iter(lambda: file.read(chunk_size), b''):
+                digest.update(chunk)
+    with response, open(part_path, 'ab' if offset else 'wb') as file:
+        for chunk in response.iter_content(chunk_size=chunk_size):
+            if time.monotonic() > deadline:
+                raise DownloadTimeout(f'Download of {response.url} exceeded its deadline')
+            digest.update(chunk)
+            file.write(chunk)
+    return digest.hexdigest()
+
+
+def _validators(response):
+    return {'etag': response.headers.get('ETag'), 'last_modified': response.headers.get('Last-Modified')}
+
+
+def fetch(url, cache_dir=CACHE_DIR, client=None, **kwargs):
+    """Descarga `url` con una petición condicional (ETag / Last-Modified).
+
+    Si el servidor responde 304 se reutiliza el contenido cacheado. `changed` es False
+    cuando el hash del contenido coincide con el último marcado con `mark_processed`,
+    de modo que el llamador puede saltear el parseo y la carga (el gráfico se dibuja igual).
+
+    Usa el cliente compartido de http_client (timeouts, reintentos, límite por host). Si la
+    descarga se corta, se retoma con un pedido Range desde lo ya recibido (If-Range garantiza
+    que sea la misma versión del archivo), también en la ejecución siguiente.
+    Los `kwargs` se pasan a `requests.get` (p. ej. `timeout`).
+    """
+    os.makedirs(cache_dir, exist_ok=True)
+    client = client or get_client()
+    body_path, meta_path = _entry_paths(url, cache_dir)
+    part_path = f'{body_path}.part'
+    meta = _read_meta(meta_path)
+    cached = os.path.exists(body_path) and 'sha256' in meta
+    base_headers = dict(kwargs.pop('headers', None) or {})
+
+    with client.slot(url):
+        deadline = time.monotonic() + client.deadline
+        attempt = 0
+        while True:
+            headers = dict(base_headers)
+            if cached and meta.get('etag'):
+                headers['If-None-Match'] = meta['etag']
+            if cached and meta.get('last_modified'):
+                headers['If-Modified-Since'] = meta['last_modified']
+
+            # Continuar una descarga parcial solo si se sabe de qué versión es
+            partial = meta.get('partial') or {}
+            validator = partial.get('etag') or partial.get('last_modified')
+            offset = os.path.getsize(part_path) if validator and os.path.exists(part_path) else 0
+            if offset:
+                headers['Range'] = f'bytes={offset}-'
+                headers['If-Range'] = validator
+
+            response = client.get(url, headers=headers, **kwargs)
+
+            if response.status_code == 304 and cached:
+                response.close()
+                sha256 = meta['sha256']
+                break
+            if response.status_code not in (200, 206):
+                response.close()
+                return FetchResult(url, False, response.status_code, None, None, False, cache_dir)
+
+            if response.status_code == 200:
+                # Versión nueva o servidor sin soporte de Range: se empieza de cero
+                offset = 0
+                meta['partial'] = _validators(response)
+                _write_atomic(meta_path, json.dumps(meta, indent=2), mode='w')
+            try:
+                sha256 = _download(response, part_path, offset, deadline)
+            except DownloadTimeout:
+                raise
+            except (requests.exceptions.ConnectionError, requests.exceptions.ChunkedEncodingError,
+                    requests.exceptions.Timeout):
+                # Corte a mitad del cuerpo (urllib3 solo reintenta hasta recibir los encabezados)
+                attempt += 1
+                if attempt > client.retries:
+                    raise
+                time.sleep(client.backoff(attempt))
+                continue
+
+            os.replace(part_path, body_path)
+            meta.update({'url': url, **meta.pop('partial'), 'sha256': sha256})
+            _write_atomic(meta_path, json.dumps(meta, indent=2), mode='w')
+            break
+
+    changed = meta.get('processed_sha256') != sha256
+    return FetchResult(url, True, response.status_code, body_path, sha256, changed, cache_dir)
+
+
+def mark_processed(result):
+    """Registra que el contenido de `result` ya se parseó, cargó y graficó."""
+    _, meta_path = _entry_paths(result.url, result.cache_dir)
+    meta = _read_meta(meta_path)
+    meta['processed_sha256'] = result.sha256
+    _write_atomic(meta_path, json.dumps(meta, indent=2), mode='w')
+
@@ -0,0 +1,105 @@
+import os
+import threading
+from contextlib import contextmanager
+from urllib.parse import urlsplit
+
+import certifi
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+# Timeouts de conexión y de lectura (entre bloques recibidos), en segundos
+CONNECT_TIMEOUT = 10
+READ_TIMEOUT = 60
+# Tiempo máximo de una descarga completa: un servidor que manda bytes a cuentagotas no
+# dispara el timeout de lectura, pero tampoco puede colgar la ejecución
+DOWNLOAD_DEADLINE = 900
+
+# Reintentos ante errores de conexión y respuestas 429/5xx, con espera exponencial
+# (BACKOFF_FACTOR * 2 ** (intento - 1) segundos; se respeta Retry-After)
+MAX_RETRIES = 4
+BACKOFF_FACTOR = 1.0
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+
+# Descargas simultáneas por host; la API del Banco Mundial tolera las de worldbank.DEFAULT_WORKERS
+DEFAULT_HOST_LIMIT = 2
+HOST_LIMITS = {'api.worldbank.org': 8}
+
+# Conexiones reutilizables por host en el pool de la sesión
+POOL_SIZE = 16
+
+# Certificados de confianza de la sesión: los de certifi, o el bundle PEM de CA_BUNDLE (p. ej.
+# los de certifi más la cadena intermedia que el servidor del BCRA no siempre envía)
+CA_BUNDLE = os.environ.get('CA_BUNDLE') or certifi.where()
+
+
+class DownloadTimeout(requests.exceptions.Timeout):
+    pass
+
+
+class HttpClient:
+    """Sesión HTTP compartida por todas las descargas del proceso.
+
+    Reutiliza conexiones (keep-alive) entre descargas y entre hilos, aplica timeouts de
+    conexión y lectura, reintenta con backoff exponencial y limita las descargas
+    simultáneas por host con un semáforo (`slot`). Todas las descargas verifican el
+    certificado del servidor contra `ca_bundle`.
+    """
+
+    def __init__(self, timeout=(CONNECT_TIMEOUT, READ_TIMEOUT), retries=MAX_RETRIES, backoff_factor=BACKOFF_FACTOR,
+                 host_limits=None, default_host_limit=DEFAULT_HOST_LIMIT, deadline=DOWNLOAD_DEADLINE,
+                 ca_bundle=CA_BUNDLE):
+        self.timeout = timeout
+        self.retries = retries
+        self.backoff_factor = backoff_factor
+        self.deadline = deadline
+        self.host_limits = {**HOST_LIMITS, **(host_limits or {})}
+        self.default_host_limit = default_host_limit
+        self._semaphores = {}
+        self._lock = threading.Lock()
+
+        retry = Retry(total=retries, backoff_factor=backoff_factor, status_forcelist=RETRY_STATUSES,
+                      allowed_methods=frozenset({'GET', 'HEAD'}), respect_retry_after_header=True,
+                      raise_on_status=False)
+        adapter = HTTPAdapter(pool_connections=POOL_SIZE, pool_maxsize=POOL_SIZE, max_retries=retry)
+        self.session = requests.Session()
+        self.session.verify = ca_bundle
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+
+    def backoff(self, attempt):
+        """Espera antes del reintento número `attempt` (1, 2, ...) de una descarga cortada."""
+        return self.backoff_factor * 2 ** (attempt - 1)
+
+    @contextmanager
+    def slot(self, url):
+        """Ocupa uno de los lugares de descarga del host de `url` mientras dura el bloque."""
+        host = urlsplit(url).hostname or ''
+        with self._lock:
+            semaphore = self._semaphores.get(host)
+            if semaphore is None:
+                semaphore = threading.BoundedSemaphore(self.host_limits.get(host, self.default_host_limit))
+                self._semaphores[host] = semaphore
+        with semaphore:
+            yield
+
+    def get(self, url, **kwargs):
+        """GET en streaming con el timeout del cliente (salvo que se pase otro)."""
+        kwargs.setdefault('timeout', self.timeout)
+        return self.session.get(url, stream=True, **kwargs)
+
+    def close(self):
+        self.session.close()
+
+
+_client = None
+_client_lock = threading.Lock()
+
+
+def get_client():
+    """Cliente compartido del proceso (se crea la primera vez)."""
+    global _client
+    with _client_lock:
+        if _client is None:
+            _client = HttpClient()
+        return _client
@@ -0,0 +1,94 @@
+from database import bump_generation
+
+# Columnas del CSV serie_ipc_divisiones.csv de INDEC
+IPC_COLUMNS = ['Codigo', 'Descripcion', 'Clasificador', 'Periodo', 'Indice_IPC', 'v_m_IPC', 'v_i_a_IPC', 'Region']
+
+# Clave natural de cada observación: división, región y período
+IPC_KEY = ['Codigo', 'Region', 'Periodo']
+
+# Columnas numéricas (coma decimal en el CSV, REAL en FT_indec_ipc)
+IPC_VALUES = ['Indice_IPC', 'v_m_IPC', 'v_i_a_IPC']
+
+# Tipos al leer el CSV: Codigo como texto para conservar los ceros a la izquierda ("01")
+IPC_DTYPES = {'Codigo': str, 'Descripcion': str, 'Clasificador': str, 'Region': str, 'Periodo': 'int64',
+              **{col: 'float64' for col in IPC_VALUES}}
+
+def upsert_ipc(conn, df):
+    """Inserta períodos nuevos y actualiza los revisados en FT_indec_ipc.
+
+    Espera los valores ya numéricos y Periodo como entero YYYYMM (ver IPC_DTYPES). Las
+    regiones y divisiones nuevas se agregan a DIM_indec_region y DIM_indec_division.
+
+    Devuelve un diccionario con la cantidad de filas insertadas, actualizadas y sin cambios.
+    """
+    columns = ', '.join(IPC_COLUMNS)
+    placeholders = ', '.join('?' for _ in IPC_COLUMNS)
+    differs = ' OR '.join(f't.{col} IS NOT s.{col}' for col in IPC_VALUES)
+
+    data = df[IPC_COLUMNS].astype(object).where(df[IPC_COLUMNS].notna(), None)
+
+    with conn:
+        conn.execute('DROP TABLE IF EXISTS temp.stage_indec_ipc')
+        conn.execute('''
+        CREATE TEMP TABLE stage_indec_ipc (
+            Codigo TEXT, Descripcion TEXT, Clasificador TEXT, Periodo INTEGER,
+            Indice_IPC REAL, v_m_IPC REAL, v_i_a_IPC REAL, Region TEXT
+        )
+        ''')
+        conn.executemany(f'INSERT INTO temp.stage_indec_ipc ({columns}) VALUES ({placeholders})',
+                         data.itertuples(index=False, name=None))
+
+        # Dimensiones: regiones nuevas y divisiones nuevas o renombradas
+        conn.execute('''
+        INSERT INTO DIM_indec_region (Region)
+        SELECT DISTINCT Region FROM temp.stage_indec_ipc WHERE Region IS NOT NULL
+        ON CONFLICT (Region) DO NOTHING
+        ''')
+        changes_before = conn.total_changes
+        conn.execute('''
+        INSERT INTO DIM_indec_division (Codigo, Descripcion, Clasificador)
+        SELECT Codigo, MAX(Descripcion), MAX(Clasificador) FROM temp.stage_indec_ipc
+        WHERE Codigo IS NOT NULL GROUP BY Codigo
+        ON CONFLICT (Codigo) DO UPDATE SET Descripcion = excluded.Descripcion, Clasificador = excluded.Clasificador
+        WHERE Descripcion IS NOT excluded.Descripcion OR Clasificador IS NOT excluded.Clasificador
+        ''')
+        renamed = conn.total_changes - changes_before
+
+        # La clave natural se traduce a las claves enteras de las dimensiones
+        keyed = '''
+        SELECT d.ID_division, r.ID_region, s.Periodo, s.Indice_IPC, s.v_m_IPC, s.v_i_a_IPC
+        FROM temp.stage_indec_ipc s
+        JOIN DIM_indec_division d ON d.Codigo = s.Codigo
+        JOIN DIM_indec_region r ON r.Region = s.Region
+        WHERE s.Periodo IS NOT NULL
+        '''
+        total, existing, updated = conn.execute(f'''
+        SELECT COUNT(*), COUNT(t.Periodo), COALESCE(SUM(t.Periodo IS NOT NULL AND ({differs})), 0)
+        FROM ({keyed}) s
+        LEFT JOIN FT_indec_ipc t
+          ON t.ID_division = s.ID_division AND t.ID_region = s.ID_region AND t.Periodo = s.Periodo
+        ''').fetchone()
+
+        # Períodos nuevos o revisados: derived.py recalcula solo esos y los que dependen de ellos
+        conn.execute(f'''
+        INSERT OR IGNORE INTO derived_pending (source, Periodo)
+        SELECT DISTINCT 'FT_indec_ipc', s.Periodo
+        FROM ({keyed}) s
+        LEFT JOIN FT_indec_ipc t
+          ON t.ID_division = s.ID_division AND t.ID_region = s.ID_region AND t.Periodo = s.Periodo
+        WHERE t.Periodo IS NULL OR {differs}
+        ''')
+
+        conn.execute(f'''
+        INSERT INTO FT_indec_ipc (ID_division, ID_region, Periodo, {', '.join(IPC_VALUES)})
+        {keyed}
+        ON CONFLICT (ID_division, ID_region, Periodo) DO UPDATE SET
+            {', '.join(f'{col} = excluded.{col}' for col in IPC_VALUES)}
+        WHERE {' OR '.join(f'{col} IS NOT excluded.{col}' for col in IPC_VALUES)}
+        ''')
+        conn.execute('DROP TABLE temp.stage_indec_ipc')
+
+        if updated or total - existing or renamed:
+            bump_generation(conn, 'FT_indec_ipc')
+
+    return {'inserted': total - existing, 'updated': updated, 'unchanged': existing - updated}
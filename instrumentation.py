@@ -0,0 +1,216 @@
+import json
+import os
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from datetime import datetime, timezone
+
+try:
+    import resource
+except ImportError:  # Windows: sin getrusage no se registra el pico de memoria
+    resource = None
+
+from database import DB_PATH, get_connection
+from queries import fetch_all
+
+# Límites (segundos) de los buckets del histograma de latencia de la API
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+
+# Campos numéricos de las etapas que se exponen en /metrics, con su nombre de métrica
+STAGE_METRICS = {
+    'seconds': 'pipeline_stage_duration_seconds',
+    'bytes': 'pipeline_stage_bytes',
+    'rows_parsed': 'pipeline_stage_rows_parsed',
+    'rows_written': 'pipeline_stage_rows_written',
+}
+
+
+def peak_rss_bytes():
+    """Pico de memoria residente del proceso o de cualquiera de sus hijos ya terminados (pool de procesos)."""
+    if resource is None:
+        return None
+    peak = max(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+               resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss)
+    # ru_maxrss está en KiB en Linux y en bytes en macOS
+    return peak if os.uname().sysname == 'Darwin' else peak * 1024
+
+
+# Medidas de cada etapa a partir de su resultado (Task.measure en pipeline.py)
+def fetch_metrics(result):
+    """Tamaño del archivo descargado: 0 si el servidor respondió 304 y se reutilizó el caché."""
+    if result is None or not result.ok or result.status_code == 304:
+        return {'bytes': 0}
+    return {'bytes': os.path.getsize(result.path)}
+
+
+def parse_metrics(df):
+    return {} if df is None else {'rows_parsed': len(df)}
+
+
+def load_metrics(written):
+    # Las cargas devuelven la cantidad de filas o {'inserted', 'updated', ...} (y 'deleted' si borran)
+    if written is None:
+        return {}
+    if isinstance(written, dict):
+        written = written['inserted'] + written['updated'] + written.get('deleted', 0)
+    return {'rows_written': int(written)}
+
+
+class Run:
+    """Registro de una ejecución de un script de ingesta, guardado en pipeline_runs al terminar.
+
+    Cada etapa es un dict con stage, attempt, status y seconds, más bytes, rows_parsed o
+    rows_written cuando corresponde. Se usa como context manager; una excepción marca la
+    ejecución como fallida, y `status` se puede cambiar a mano para los errores sin excepción.
+    """
+
+    def __init__(self, script, db_path=DB_PATH):
+        self.script = script
+        self.db_path = db_path
+        self.started_at = datetime.now(timezone.utc).isoformat(timespec='seconds')
+        self.status = 'ok'
+        self.stages = []
+        self._start = time.perf_counter()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is not None:
+            self.status = 'error'
+        self.finish()
+        return False
+
+    @contextmanager
+    def stage(self, name):
+        """Mide el bloque como la etapa `name`; el dict devuelto acepta bytes y filas."""
+        record = {'stage': name, 'attempt': 1, 'status': 'ok'}
+        start = time.perf_counter()
+        try:
+            yield record
+        except Exception as exc:
+            record.update(status='error', error=str(exc))
+            raise
+        finally:
+            record['seconds'] = time.perf_counter() - start
+            self.stages.append(record)
+
+    def add(self, record):
+        """Agrega una etapa ya medida (p. ej. un registro de tiempos de run_dag, con 'task' como nombre)."""
+        record = dict(record)
+        record['stage'] = record.pop('task', record.get('stage'))
+        self.stages.append(record)
+
+    def finish(self):
+        """Guarda la ejecución en pipeline_runs (y la cuenta en pipeline_run_counts) y devuelve su run_id."""
+        seconds = time.perf_counter() - self._start
+        stages = '\n'.join(json.dumps(record, sort_keys=True) for record in self.stages)
+        conn = get_connection(self.db_path)
+        with conn:
+            cursor = conn.execute('''
+            INSERT INTO pipeline_runs (script, started_at, seconds, status, peak_rss_bytes, stages)
+            VALUES (?, ?, ?, ?, ?, ?)
+            ''', (self.script, self.started_at, seconds, self.status, peak_rss_bytes(), stages))
+            conn.execute('''
+            INSERT INTO pipeline_run_counts (script, status, runs, last_run_id) VALUES (?, ?, 1, ?)
+            ON CONFLICT (script, status) DO UPDATE SET runs = runs + 1, last_run_id = excluded.last_run_id
+            ''', (self.script, self.status, cursor.lastrowid))
+        return cursor.lastrowid
+
+
+class LatencyHistogram:
+    """Histograma acumulativo de latencias por etiquetas, en el formato de Prometheus."""
+
+    def __init__(self, name, help_text, label_names, buckets=LATENCY_BUCKETS):
+        self.name = name
+        self.help_text = help_text
+        self.label_names = tuple(label_names)
+        self.buckets = tuple(buckets)
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def observe(self, labels, seconds):
+        index = bisect_left(self.buckets, seconds)
+        with self._lock:
+            series = self._series.setdefault(tuple(labels), [[0] * (len(self.buckets) + 1), 0.0])
+            series[0][index] += 1
+            series[1] += seconds
+
+    def render(self):
+        lines = [f'# HELP {self.name} {self.help_text}', f'# TYPE {self.name} histogram']
+        with self._lock:
+            series = {labels: (list(counts), total) for labels, (counts, total) in self._series.items()}
+        for labels, (counts, total) in sorted(series.items()):
+            base = dict(zip(self.label_names, labels))
+            cumulative = 0
+            for bound, count in zip(self.buckets + ('+Inf',), counts):
+                cumulative += count
+                lines.append(_sample(f'{self.name}_bucket', {**base, 'le': str(bound)}, cumulative))
+            lines.append(_sample(f'{self.name}_sum', base, total))
+            lines.append(_sample(f'{self.name}_count', base, cumulative))
+        return lines
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _sample(name, labels, value):
+    label_text = ','.join(f'{key}="{_escape(val)}"' for key, val in labels.items())
+    return f'{name}{{{label_text}}} {value}' if label_text else f'{name} {value}'
+
+
+def _family(name, metric_type, help_text, samples):
+    return [f'# HELP {name} {help_text}', f'# TYPE {name} {metric_type}'] + samples
+
+
+def run_metrics(conn):
+    """Métricas de pipeline_runs en formato de Prometheus: conteos por estado y la última ejecución de cada script."""
+    counts = fetch_all(conn, 'metrics.run_counts')
+    latest = fetch_all(conn, 'metrics.latest_runs')
+
+    lines = _family('pipeline_runs_total', 'counter', 'Pipeline runs recorded, by script and status',
+                    [_sample('pipeline_runs_total', {'script': script, 'status': status}, count)
+                     for script, status, count in counts])
+
+    run_samples = {
+        'pipeline_run_duration_seconds': [],
+        'pipeline_run_timestamp_seconds': [],
+        'pipeline_run_success': [],
+        'pipeline_run_peak_rss_bytes': [],
+    }
+    stage_samples = {name: [] for name in STAGE_METRICS.values()}
+    for script, run_id, started_at, seconds, status, peak_rss, stages in latest:
+        labels = {'script': script}
+        started = datetime.fromisoformat(started_at).timestamp()
+        run_samples['pipeline_run_duration_seconds'].append(_sample('pipeline_run_duration_seconds', labels, seconds))
+        run_samples['pipeline_run_timestamp_seconds'].append(_sample('pipeline_run_timestamp_seconds', labels, started))
+        run_samples['pipeline_run_success'].append(_sample('pipeline_run_success', labels, int(status == 'ok')))
+        if peak_rss is not None:
+            run_samples['pipeline_run_peak_rss_bytes'].append(_sample('pipeline_run_peak_rss_bytes', labels, peak_rss))
+
+        # La última tentativa de cada etapa (las anteriores fallaron y se reintentaron)
+        last_attempt = {}
+        for line in stages.splitlines():
+            record = json.loads(line)
+            last_attempt[record['stage']] = record
+        for stage, record in sorted(last_attempt.items()):
+            stage_labels = {**labels, 'stage': stage, 'status': record['status']}
+            for field, metric in STAGE_METRICS.items():
+                if field in record:
+                    stage_samples[metric].append(_sample(metric, stage_labels, record[field]))
+
+    help_texts = {
+        'pipeline_run_duration_seconds': 'Wall time of the latest run',
+        'pipeline_run_timestamp_seconds': 'Start time of the latest run (Unix time)',
+        'pipeline_run_success': 'Whether the latest run finished without errors',
+        'pipeline_run_peak_rss_bytes': 'Peak resident memory of the latest run, including worker processes',
+        'pipeline_stage_duration_seconds': 'Duration of the last attempt of each stage in the latest run',
+        'pipeline_stage_bytes': 'Bytes downloaded by each stage in the latest run',
+        'pipeline_stage_rows_parsed': 'Rows parsed by each stage in the latest run',
+        'pipeline_stage_rows_written': 'Rows inserted or updated by each stage in the latest run',
+    }
+    for name, samples in {**run_samples, **stage_samples}.items():
+        lines += _family(name, 'gauge', help_texts[name], samples)
+    return lines
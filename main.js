@@ -1,37 +1,93 @@
 document.addEventListener('DOMContentLoaded', () => {
-    const images = [
-        { src: 'images/employment_graph.png', alt: 'Tasa de Empleo' },
-        { src: 'images/inflation_graph.png', alt: 'IPC Histórico' },
-        { src: 'images/dollar_graph.png', alt: 'Evolución USD' }
+    // Written by export.py; without it (no export yet) the dashboard falls back to the local API
+    const MANIFEST_URL = 'data/manifest.json';
+    const API_BASE = 'http://127.0.0.1:5000';
+
+    const fallbackSlides = [
+        { images: [{ src: 'images/employment_graph.png' }], alt: 'Tasa de Empleo', table: null },
+        { images: [{ src: 'images/inflation_graph.png' }], alt: 'IPC Histórico', table: null },
+        { images: [{ src: 'images/dollar_graph.png' }], alt: 'Evolución USD', table: 'exchange_rate' }
     ];
+    const fallbackData = { exchange_rate: `${API_BASE}/get_exchange_rate_data` };
 
+    let slides = fallbackSlides;
+    let dataUrls = fallbackData;
     let currentIndex = 0;
+    const dataCache = new Map();
     const kpiImage = document.getElementById('kpiImage');
     const prevBtn = document.getElementById('prevBtn');
     const nextBtn = document.getElementById('nextBtn');
     const exchangeRateTableContainer = document.getElementById('exchangeRateTableContainer');
     const exchangeRateTableBody = document.getElementById('exchangeRateTable').querySelector('tbody');
 
+    // The image is shown at most 1200px wide (styles/style.css), at 90% of the viewport below that
+    const IMAGE_SIZES = '(max-width: 1333px) 90vw, 1200px';
+
+    function setSource(img, slide) {
+        const images = slide.images;
+        const largest = images[images.length - 1];
+        if (images.length > 1 && largest.width) {
+            img.sizes = IMAGE_SIZES;
+            img.srcset = images.map(image => `${image.src} ${image.width}w`).join(', ');
+        } else {
+            img.removeAttribute('srcset');
+        }
+        if (largest.width && largest.height) {
+            // Reserve the space before the image arrives, so the page does not jump
+            img.width = largest.width;
+            img.height = largest.height;
+        }
+        img.src = largest.src;
+    }
+
+    function loadData(name) {
+        // Hashed snapshots never change, so one request per page load is enough
+        if (!dataCache.has(name)) {
+            const request = fetch(dataUrls[name]).then(response => {
+                if (!response.ok) {
+                    throw new Error('Network response was not ok');
+                }
+                return response.json();
+            });
+            request.catch(() => dataCache.delete(name));
+            dataCache.set(name, request);
+        }
+        return dataCache.get(name);
+    }
+
+    function prefetch(index) {
+        // Warm the browser cache for the next slide: same srcset and sizes pick the same file
+        const slide = slides[index];
+        setSource(new Image(), slide);
+        if (slide.table) {
+            loadData(slide.table).catch(() => {});
+        }
+    }
+
     function updateImage(index) {
-        kpiImage.src = images[index].src;
-        kpiImage.alt = images[index].alt;
+        const slide = slides[index];
+        setSource(kpiImage, slide);
+        kpiImage.alt = slide.alt;
 
-        if (images[index].src === 'images/dollar_graph.png') {
+        if (slide.table === 'exchange_rate') {
             exchangeRateTableContainer.style.display = 'block';
-            fetchExchangeRateData();
+            showExchangeRateData();
         } else {
             exchangeRateTableContainer.style.display = 'none';
         }
+
+        // Only once the current image is in, so the prefetch does not compete with it
+        const next = (index + 1) % slides.length;
+        if (kpiImage.complete) {
+            prefetch(next);
+        } else {
+            kpiImage.addEventListener('load', () => prefetch(next), { once: true });
+        }
     }
 
-    async function fetchExchangeRateData() {
+    async function showExchangeRateData() {
         try {
-            const response = await fetch('http://127.0.0.1:5000/get_exchange_rate_data');
-            if (!response.ok) {
-                throw new Error('Network response was not ok');
-            }
-            const exchangeRateData = await response.json();
-            console.log('Fetched exchange rate data:', exchangeRateData);
+            const exchangeRateData = await loadData('exchange_rate');
 
             // Clear existing table data
             exchangeRateTableBody.innerHTML = '';
@@ -54,16 +110,33 @@ document.addEventListener('DOMContentLoaded', () => {
         }
     }
 
+    async function loadManifest() {
+        try {
+            // Revalidated on every load: it is the only exported file whose content changes
+            const response = await fetch(MANIFEST_URL, { cache: 'no-cache' });
+            if (!response.ok) {
+                throw new Error(`HTTP ${response.status}`);
+            }
+            const manifest = await response.json();
+            if (manifest.slides.length) {
+                slides = manifest.slides;
+                dataUrls = manifest.data;
+            }
+        } catch (error) {
+            console.info('No static export found, using the local API:', error);
+        }
+    }
+
     prevBtn.addEventListener('click', () => {
-        currentIndex = (currentIndex > 0) ? currentIndex - 1 : images.length - 1;
+        currentIndex = (currentIndex > 0) ? currentIndex - 1 : slides.length - 1;
         updateImage(currentIndex);
     });
 
     nextBtn.addEventListener('click', () => {
-        currentIndex = (currentIndex < images.length - 1) ? currentIndex + 1 : 0;
+        currentIndex = (currentIndex < slides.length - 1) ? currentIndex + 1 : 0;
         updateImage(currentIndex);
     });
 
     // Initial image
-    updateImage(currentIndex);
-});
\ No newline at end of file
+    loadManifest().then(() => updateImage(currentIndex));
+});
@@ -0,0 +1,133 @@
+import multiprocessing
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, ThreadPoolExecutor, wait
+
+
+class Task:
+    """A node of the pipeline DAG.
+
+    `func` receives the results of `deps` as positional arguments, in order.
+    `pool` selects the executor: 'thread' for network/DB I/O, 'process' for CPU-bound
+    work such as rendering (the function and its arguments must then be picklable, and the
+    function importable by module name: process workers are spawned, not forked).
+    `measure`, if given, maps the task result to extra fields for its timing record
+    (bytes, row counts); it runs in the scheduler, so it does not need to be picklable.
+    """
+
+    def __init__(self, name, func, deps=(), pool='thread', retries=2, retry_delay=1.0, measure=None):
+        self.name = name
+        self.func = func
+        self.deps = tuple(deps)
+        self.pool = pool
+        self.retries = retries
+        self.retry_delay = retry_delay
+        self.measure = measure
+
+
+class PipelineError(Exception):
+    pass
+
+
+def _call_after(delay, func, *args):
+    # The retry backoff runs inside the worker so the scheduler keeps dispatching other tasks
+    if delay:
+        time.sleep(delay)
+    return func(*args)
+
+
+def _validate(tasks):
+    names = {task.name for task in tasks}
+    if len(names) != len(tasks):
+        raise PipelineError('Duplicate task names in pipeline')
+    for task in tasks:
+        missing = [dep for dep in task.deps if dep not in names]
+        if missing:
+            raise PipelineError(f'Task {task.name} depends on unknown tasks: {missing}')
+        if task.pool not in ('thread', 'process'):
+            raise PipelineError(f'Task {task.name} has an unknown pool: {task.pool}')
+
+    # Detect cycles with a depth-first search
+    by_name = {task.name: task for task in tasks}
+    state = {}
+
+    def visit(name):
+        if state.get(name) == 'done':
+            return
+        if state.get(name) == 'visiting':
+            raise PipelineError(f'Dependency cycle through task {name}')
+        state[name] = 'visiting'
+        for dep in by_name[name].deps:
+            visit(dep)
+        state[name] = 'done'
+
+    for task in tasks:
+        visit(task.name)
+
+
+def run_dag(tasks, thread_workers=4, process_workers=2):
+    """Run `tasks` as soon as their dependencies finish.
+
+    Independent branches run concurrently. A failing task is retried up to
+    `task.retries` times without re-running the rest of the batch; when it
+    finally fails, its downstream tasks are skipped.
+
+    Returns (results, timings, failures): results by task name, one timing record
+    per attempt and the final exception of every failed task.
+    """
+    _validate(tasks)
+    results = {}
+    failures = {}
+    skipped = set()
+    attempts = {task.name: 0 for task in tasks}
+    timings = []
+    pending = list(tasks)
+    running = {}
+
+    executors = {'thread': ThreadPoolExecutor(max_workers=thread_workers)}
+    if any(task.pool == 'process' for task in tasks):
+        # spawn, not fork: the scheduler and thread pool may be holding locks (database._migrate_lock,
+        # the pooled connections) at fork time, and a forked worker would inherit them taken
+        executors['process'] = ProcessPoolExecutor(max_workers=process_workers,
+                                                   mp_context=multiprocessing.get_context('spawn'))
+
+    def submit(task, delay=0.0):
+        attempts[task.name] += 1
+        args = [results[dep] for dep in task.deps]
+        future = executors[task.pool].submit(_call_after, delay, task.func, *args)
+        running[future] = (task, time.perf_counter() + delay)
+
+    try:
+        while pending or running:
+            for task in list(pending):
+                if any(dep in failures or dep in skipped for dep in task.deps):
+                    pending.remove(task)
+                    skipped.add(task.name)
+                    timings.append({'task': task.name, 'attempt': 0, 'status': 'skipped', 'seconds': 0.0})
+                elif all(dep in results for dep in task.deps):
+                    pending.remove(task)
+                    submit(task)
+
+            if not running:
+                continue
+
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                task, started = running.pop(future)
+                elapsed = time.perf_counter() - started
+                try:
+                    results[task.name] = future.result()
+                    record = {'task': task.name, 'attempt': attempts[task.name], 'status': 'ok', 'seconds': elapsed}
+                    if task.measure is not None:
+                        record.update(task.measure(results[task.name]))
+                    timings.append(record)
+                except Exception as exc:
+                    timings.append({'task': task.name, 'attempt': attempts[task.name], 'status': 'error', 'seconds': elapsed, 'error': str(exc)})
+                    if attempts[task.name] <= task.retries:
+                        submit(task, task.retry_delay * 2 ** (attempts[task.name] - 1))
+                    else:
+                        failures[task.name] = exc
+    finally:
+        for executor in executors.values():
+            executor.shutdown(wait=True)
+
+    return results, timings, failures
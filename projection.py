@@ -0,0 +1,215 @@
+import sys
+import time
+from collections import namedtuple
+from statistics import NormalDist
+
+import numpy as np
+import pandas as pd
+
+# Proyección de series de variación mensual (%) en lote: una fila por serie (región x división),
+# una columna por período, alineadas a la derecha (la última columna es la última observación
+# de todas las filas; los NaN iniciales son historia faltante). Cada modelo opera con operaciones
+# de NumPy sobre la matriz completa, sin bucles por serie.
+
+# Ventana de la tendencia lineal (la proyección original del gráfico usaba los últimos 6 períodos)
+TREND_WINDOW = 6
+# Meses usados para la tasa compuesta anualizada
+COMPOUND_WINDOW = 12
+# Grilla de alfas del suavizado exponencial (se elige el de menor error a un paso por serie)
+SES_ALPHAS = np.linspace(0.05, 0.95, 19)
+# Cota de |phi| del AR(1) para que la proyección no diverja
+AR_MAX_PHI = 0.99
+# Nivel de los intervalos de predicción
+DEFAULT_LEVEL = 0.8
+# Historia máxima que ve cada origen en el backtest (todos los modelos miran hacia atrás poco)
+BACKTEST_HISTORY = 120
+
+# mean, lower y upper tienen forma (series, horizonte)
+Forecast = namedtuple('Forecast', ['mean', 'lower', 'upper'])
+
+
+def _masked_moments(x, y):
+    """Medias, pendiente MCO y desvío residual de y ~ x por fila, ignorando pares con NaN."""
+    mask = ~(np.isnan(x) | np.isnan(y))
+    n = mask.sum(axis=1)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        xm = np.where(mask, x, 0).sum(axis=1) / n
+        ym = np.where(mask, y, 0).sum(axis=1) / n
+        dx = np.where(mask, x - xm[:, None], 0)
+        dy = np.where(mask, y - ym[:, None], 0)
+        slope = (dx * dy).sum(axis=1) / (dx ** 2).sum(axis=1)
+        resid = np.where(mask, dy - slope[:, None] * dx, 0)
+        sigma = np.sqrt((resid ** 2).sum(axis=1) / np.maximum(n - 2, 1))
+    return xm, ym, np.nan_to_num(slope), sigma
+
+
+def linear_trend(values, horizon, window=TREND_WINDOW):
+    """Último valor + pendiente MCO de los últimos `window` períodos (la proyección original)."""
+    recent = values[:, -window:]
+    x = np.broadcast_to(np.arange(recent.shape[1], dtype=float), recent.shape)
+    _, _, slope, sigma = _masked_moments(x, recent)
+    steps = np.arange(1, horizon + 1)
+    mean = values[:, -1:] + slope[:, None] * steps
+    return mean, sigma[:, None] * np.sqrt(steps)
+
+
+def exponential_smoothing(values, horizon, alphas=SES_ALPHAS):
+    """Suavizado exponencial simple; el alfa de cada serie minimiza el error a un paso."""
+    rows = values.shape[0]
+    level = np.full((len(alphas), rows), np.nan)
+    sse = np.zeros((len(alphas), rows))
+    count = np.zeros(rows)
+    alpha = alphas[:, None]
+    # Un paso por período, vectorizado sobre todas las series y todos los alfas
+    for column in values.T:
+        valid = ~np.isnan(column)
+        error = column - level
+        seen = valid & ~np.isnan(level[0])
+        sse += np.where(seen, error, 0) ** 2
+        count += seen
+        level = np.where(valid, np.where(np.isnan(level), column, level + alpha * error), level)
+
+    best = np.argmin(sse, axis=0)
+    picked = np.arange(rows)
+    best_alpha = alphas[best]
+    sigma = np.sqrt(sse[best, picked] / np.maximum(count, 1))
+    steps = np.arange(1, horizon + 1)
+    mean = np.repeat(level[best, picked][:, None], horizon, axis=1)
+    return mean, sigma[:, None] * np.sqrt(1 + (steps - 1) * best_alpha[:, None] ** 2)
+
+
+def ar1(values, horizon, max_phi=AR_MAX_PHI):
+    """AR(1) con constante, estimado por MCO sobre toda la historia de cada serie."""
+    xm, ym, phi, sigma = _masked_moments(values[:, :-1], values[:, 1:])
+    phi = np.clip(phi, -max_phi, max_phi)
+    const = ym - phi * xm
+    mean = np.empty((values.shape[0], horizon))
+    variance = np.empty_like(mean)
+    level, accumulated = values[:, -1], np.zeros(values.shape[0])
+    for step in range(horizon):
+        level = const + phi * level
+        accumulated = accumulated + phi ** (2 * step)
+        mean[:, step], variance[:, step] = level, accumulated
+    return mean, sigma[:, None] * np.sqrt(variance)
+
+
+def compound_rate(values, horizon, window=COMPOUND_WINDOW):
+    """Tasa mensual equivalente a la variación compuesta de los últimos `window` meses."""
+    recent = values[:, -window:]
+    with np.errstate(invalid='ignore'):
+        monthly = np.expm1(np.nanmean(np.log1p(recent / 100), axis=1)) * 100
+        sigma = np.nanstd(recent, axis=1)
+    return np.repeat(monthly[:, None], horizon, axis=1), np.repeat(sigma[:, None], horizon, axis=1)
+
+
+# Modelos disponibles: función(values, horizon) -> (media, desvío) de forma (series, horizonte)
+MODELS = {
+    'linear': linear_trend,
+    'ses': exponential_smoothing,
+    'ar1': ar1,
+    'compound': compound_rate,
+}
+
+
+def annualized_rate(monthly):
+    """Variación anual (%) equivalente a una variación mensual (%) compuesta 12 meses."""
+    return ((1 + np.asarray(monthly) / 100) ** 12 - 1) * 100
+
+
+def forecast(values, horizon, models=None, level=DEFAULT_LEVEL):
+    """Proyecta `horizon` períodos para todas las filas de `values` con cada modelo.
+
+    Devuelve {modelo: Forecast} con la media y el intervalo de predicción normal al `level` dado.
+    """
+    values = np.asarray(values, dtype=float)
+    z = NormalDist().inv_cdf(0.5 + level / 2)
+    result = {}
+    for name in models or MODELS:
+        mean, std = MODELS[name](values, horizon)
+        result[name] = Forecast(mean, mean - z * std, mean + z * std)
+    return result
+
+
+def series_matrix(df, value='v_m_IPC', keys=('Region', 'Codigo')):
+    """Pasa el IPC en formato largo a una matriz (series x períodos) ordenada por Periodo."""
+    wide = df.pivot_table(index=list(keys), columns='Periodo', values=value, aggfunc='last').sort_index(axis=1)
+    return wide.index, wide.columns.to_numpy(), wide.to_numpy(dtype=float)
+
+
+def next_periods(last_period, count):
+    """Los `count` períodos YYYYMM siguientes a `last_period`."""
+    year, month = divmod(int(last_period), 100)
+    months = year * 12 + month - 1 + np.arange(1, count + 1)
+    return months // 12 * 100 + months % 12 + 1
+
+
+def project(df, horizon, models=None, level=DEFAULT_LEVEL, value='v_m_IPC', keys=('Region', 'Codigo')):
+    """Proyecta todas las series de `df` (formato largo) y devuelve un DataFrame largo.
+
+    Columnas: las de `keys`, model, step, Periodo, forecast, lower, upper.
+    """
+    index, periods, values = series_matrix(df, value, keys)
+    future = next_periods(periods[-1], horizon)
+    frames = []
+    for name, result in forecast(values, horizon, models, level).items():
+        frame = pd.DataFrame(index.to_list() * horizon, columns=list(keys))
+        frame['model'] = name
+        frame['step'] = np.repeat(np.arange(1, horizon + 1), len(index))
+        frame['Periodo'] = np.repeat(future, len(index))
+        for column in Forecast._fields:
+            frame[column if column != 'mean' else 'forecast'] = getattr(result, column).T.ravel()
+        frames.append(frame)
+    return pd.concat(frames, ignore_index=True)
+
+
+def rolling_origins(values, horizon, min_train=24, history=BACKTEST_HISTORY):
+    """Apila cada serie cortada en cada origen: (entrenamiento, real) de forma (orígenes*series, ...)."""
+    rows, periods = values.shape
+    padded = np.hstack([np.full((rows, history), np.nan), values, np.full((rows, horizon), np.nan)])
+    windows = np.lib.stride_tricks.sliding_window_view(padded, history + horizon, axis=1)
+    origins = np.arange(min_train, periods - horizon + 1)
+    # La ventana que empieza en la columna o termina su entrenamiento en el período o - 1
+    stacked = windows[:, origins].transpose(1, 0, 2).reshape(-1, history + horizon)
+    return stacked[:, :history], stacked[:, history:], origins
+
+
+def backtest(values, horizon, models=None, level=DEFAULT_LEVEL, min_train=24, history=BACKTEST_HISTORY):
+    """Backtest de origen móvil: todos los orígenes y series se proyectan en un único lote.
+
+    Devuelve un DataFrame con MAE, RMSE y cobertura del intervalo por modelo y paso.
+    """
+    train, actual, origins = rolling_origins(np.asarray(values, dtype=float), horizon, min_train, history)
+    keep = ~np.isnan(train[:, -1])
+    train, actual = train[keep], actual[keep]
+    records = []
+    for name, result in forecast(train, horizon, models, level).items():
+        error = result.mean - actual
+        observed = ~np.isnan(error)
+        inside = (actual >= result.lower) & (actual <= result.upper)
+        for step in range(horizon):
+            ok = observed[:, step]
+            records.append({
+                'model': name,
+                'step': step + 1,
+                'mae': np.abs(error[ok, step]).mean(),
+                'rmse': np.sqrt((error[ok, step] ** 2).mean()),
+                'coverage': inside[ok, step].mean(),
+                'forecasts': int(ok.sum()),
+            })
+    return pd.DataFrame(records)
+
+
+if __name__ == '__main__':
+    # Backtest y proyección de todas las series del IPC guardadas
+    from database import DB_PATH, connect
+    from queries import read_frame
+
+    horizon = int(sys.argv[1]) if len(sys.argv) > 1 else 3
+    df = read_frame(connect(DB_PATH), 'inflation.all', {'period_from': 0, 'period_to': 999999})
+    index, periods, values = series_matrix(df)
+
+    start = time.perf_counter()
+    scores = backtest(values, horizon)
+    print(f"Backtest de {values.shape[0]} series x {values.shape[1]} períodos en {time.perf_counter() - start:.2f}s")
+    print(scores.to_string(index=False))
+    print(project(df, horizon).query("Region == 'Nacional' and Codigo == '0'").to_string(index=False))
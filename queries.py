@@ -0,0 +1,267 @@
+import json
+import logging
+import os
+import sys
+import threading
+from collections import namedtuple
+
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+# Con QUERY_DEBUG=1 se registra el plan (EXPLAIN QUERY PLAN) de cada consulta la primera vez que se usa
+DEBUG = os.environ.get('QUERY_DEBUG') == '1'
+
+# sql: texto constante, así sqlite3 reutiliza la sentencia preparada de su caché por conexión.
+# hot: consulta de la API o de los gráficos; un escaneo completo de tabla se reporta.
+# example: parámetros de muestra para revisar el plan sin tráfico real.
+Query = namedtuple('Query', ['sql', 'hot', 'example'])
+
+# Tablas chicas por construcción (su tamaño depende del dominio, no del volumen de datos): recorrerlas
+# para guiar búsquedas por clave en una tabla de hechos no es un escaneo completo. En el SQL van sin
+# alias, así EXPLAIN QUERY PLAN muestra su nombre.
+SMALL_TABLES = {'DIM_indec_region', 'DIM_indec_division', 'pipeline_run_counts', 'ingest_generation'}
+
+# Las listas de valores (países, regiones, divisiones) se pasan como un único parámetro JSON
+# recorrido con json_each, para no generar un texto SQL distinto por cada largo de lista.
+QUERIES = {
+    'exchange_rate.range': Query('''
+        SELECT ID_tie_date, F_bcra_dolar
+        FROM FT_BCRA_dolar
+        WHERE ID_tie_date >= :date_from AND ID_tie_date <= :date_to
+        ORDER BY ID_tie_date DESC
+        LIMIT :limit
+    ''', True, {'date_from': '2024-01-01', 'date_to': '9999-12-31', 'limit': 15}),
+
+    'exchange_rate.series': Query('''
+        SELECT ID_tie_date, F_bcra_dolar
+        FROM FT_BCRA_dolar
+        WHERE ID_tie_date >= :date_from AND ID_tie_date <= :date_to
+        ORDER BY ID_tie_date
+    ''', True, {'date_from': '2024-01-01', 'date_to': '2024-12-31'}),
+
+    'exchange_rate.monthly': Query('''
+        SELECT printf('%04d-%02d', Periodo / 100, Periodo % 100), Promedio, Minimo, Maximo, Dias, Cierre
+        FROM FT_BCRA_dolar_mensual
+        WHERE Periodo >= :period_from AND Periodo <= :period_to
+        ORDER BY Periodo
+    ''', True, {'period_from': 202401, 'period_to': 202412}),
+
+    # Carga incremental de BCRA_exchangerate: las fechas posteriores a esta son nuevas
+    'exchange_rate.last_date': Query('''
+        SELECT MAX(ID_tie_date) FROM FT_BCRA_dolar
+    ''', False, {}),
+
+    'exchange_rate.real': Query('''
+        SELECT Periodo, Dolar_promedio, Indice_IPC, Dolar_real
+        FROM FT_dolar_real
+        WHERE Periodo >= :period_from AND Periodo <= :period_to
+        ORDER BY Periodo
+    ''', True, {'period_from': 202401, 'period_to': 202412}),
+
+    'inflation.series': Query('''
+        SELECT Periodo, Descripcion, Region, v_m_IPC
+        FROM V_indec_ipc
+        WHERE Descripcion = :division AND Region = :region AND Periodo >= :period_from AND Periodo <= :period_to
+    ''', True, {'division': 'NIVEL GENERAL', 'region': 'Nacional', 'period_from': 202301, 'period_to': 202412}),
+
+    # Regiones y divisiones en el orden de la respuesta (CROSS JOIN fija el orden del join) y, para
+    # cada par, un rango de la clave primaria de FT_indec_ipc: sin escaneo de la tabla de hechos ni sort.
+    # Sin filtros la respuesta es toda la tabla: la API la pagina con LIMIT/OFFSET
+    'inflation.all': Query('''
+        SELECT f.Periodo, DIM_indec_division.Codigo, DIM_indec_division.Descripcion, DIM_indec_region.Region,
+               f.Indice_IPC, f.v_m_IPC, f.v_i_a_IPC
+        FROM DIM_indec_region
+        CROSS JOIN DIM_indec_division
+        CROSS JOIN FT_indec_ipc f
+        WHERE f.ID_region = DIM_indec_region.ID_region AND f.ID_division = DIM_indec_division.ID_division
+          AND f.Periodo >= :period_from AND f.Periodo <= :period_to
+        ORDER BY DIM_indec_region.Region, DIM_indec_division.Codigo, f.Periodo
+        LIMIT :limit OFFSET :offset
+    ''', True, {'period_from': 0, 'period_to': 999999, 'limit': 5000, 'offset': 0}),
+
+    'inflation.by_region': Query('''
+        SELECT Periodo, Codigo, Descripcion, Region, Indice_IPC, v_m_IPC, v_i_a_IPC
+        FROM V_indec_ipc
+        WHERE Region IN (SELECT value FROM json_each(:regions))
+          AND Periodo >= :period_from AND Periodo <= :period_to
+        ORDER BY Region, Codigo, Periodo
+    ''', True, {'regions': '["GBA"]', 'period_from': 0, 'period_to': 999999}),
+
+    'inflation.by_division': Query('''
+        SELECT Periodo, Codigo, Descripcion, Region, Indice_IPC, v_m_IPC, v_i_a_IPC
+        FROM V_indec_ipc
+        WHERE Codigo IN (SELECT value FROM json_each(:divisions))
+          AND Periodo >= :period_from AND Periodo <= :period_to
+        ORDER BY Region, Codigo, Periodo
+    ''', True, {'divisions': '["0"]', 'period_from': 0, 'period_to': 999999}),
+
+    'inflation.by_region_division': Query('''
+        SELECT Periodo, Codigo, Descripcion, Region, Indice_IPC, v_m_IPC, v_i_a_IPC
+        FROM V_indec_ipc
+        WHERE Region IN (SELECT value FROM json_each(:regions))
+          AND Codigo IN (SELECT value FROM json_each(:divisions))
+          AND Periodo >= :period_from AND Periodo <= :period_to
+        ORDER BY Region, Codigo, Periodo
+    ''', True, {'regions': '["GBA"]', 'divisions': '["0"]', 'period_from': 0, 'period_to': 999999}),
+
+    'inflation.derived': Query('''
+        SELECT Periodo, Codigo, Descripcion, Region, Var_interanual, Var_acumulada
+        FROM V_indec_ipc_derived
+        WHERE Region = :region AND Codigo = :division AND Periodo >= :period_from AND Periodo <= :period_to
+        ORDER BY Periodo
+    ''', True, {'region': 'Nacional', 'division': '0', 'period_from': 0, 'period_to': 999999}),
+
+    # Cola de derived.py (se vacía en cada refresh_derived)
+    'derived.pending': Query('''
+        SELECT source, Periodo FROM derived_pending
+    ''', False, {}),
+
+    # Fuente de derived.py: una ventana de períodos de todas las series
+    'derived.ipc_source': Query('''
+        SELECT ID_division, ID_region, Periodo, v_m_IPC
+        FROM FT_indec_ipc
+        WHERE Periodo >= :period_from AND Periodo <= :period_to
+    ''', False, {'period_from': 202301, 'period_to': 202412}),
+
+    'employment.all': Query('''
+        SELECT f.Country_Code, c.Country_Name, f.Year, f.Value
+        FROM FT_world_indicator f
+        JOIN DIM_world_country c ON c.Country_Code = f.Country_Code
+        WHERE f.Indicator_Code = :indicator AND f.Year >= :year_from AND f.Year <= :year_to
+        ORDER BY f.Country_Code, f.Year
+    ''', True, {'indicator': 'SL.UEM.TOTL.ZS', 'year_from': 0, 'year_to': 9999}),
+
+    'employment.by_country': Query('''
+        SELECT f.Country_Code, c.Country_Name, f.Year, f.Value
+        FROM FT_world_indicator f
+        JOIN DIM_world_country c ON c.Country_Code = f.Country_Code
+        WHERE f.Indicator_Code = :indicator
+          AND f.Country_Code IN (SELECT value FROM json_each(:countries))
+          AND f.Year >= :year_from AND f.Year <= :year_to
+        ORDER BY f.Country_Code, f.Year
+    ''', True, {'indicator': 'SL.UEM.TOTL.ZS', 'countries': '["ARG"]', 'year_from': 0, 'year_to': 9999}),
+
+    # Agregados precalculados por worldbank.refresh_rollups (solo países, sin agregados regionales)
+    'employment.global': Query('''
+        SELECT r.Year, r.Mean, r.Min_Value, r.Max_Value, r.Countries, r.Median, r.P10, r.P25, r.P75, r.P90,
+               r.Min_Country, cmin.Country_Name AS Min_Country_Name, r.Max_Country, cmax.Country_Name AS Max_Country_Name
+        FROM FT_world_indicator_rollup r
+        LEFT JOIN DIM_world_country cmin ON cmin.Country_Code = r.Min_Country
+        LEFT JOIN DIM_world_country cmax ON cmax.Country_Code = r.Max_Country
+        WHERE r.Indicator_Code = :indicator AND r.Year >= :year_from AND r.Year <= :year_to
+        ORDER BY r.Year
+    ''', True, {'indicator': 'SL.UEM.TOTL.ZS', 'year_from': 0, 'year_to': 9999}),
+
+    # Gráfico a pedido: la serie de todos los países con la marca de agregado
+    'employment.chart': Query('''
+        SELECT f.Country_Code, c.Country_Name, c.Is_Aggregate, f.Year, f.Value
+        FROM FT_world_indicator f
+        JOIN DIM_world_country c ON c.Country_Code = f.Country_Code
+        WHERE f.Indicator_Code = :indicator AND f.Year >= :year_from AND f.Year <= :year_to
+    ''', True, {'indicator': 'SL.UEM.TOTL.ZS', 'year_from': 0, 'year_to': 9999}),
+
+    # Entrada de refresh_rollups: valores de los países reales (sin metadatos se cuentan todos)
+    'employment.rollup_source': Query('''
+        SELECT f.Indicator_Code, f.Country_Code, f.Year, f.Value
+        FROM FT_world_indicator f
+        LEFT JOIN DIM_world_country c ON c.Country_Code = f.Country_Code
+        WHERE f.Indicator_Code IN (SELECT value FROM json_each(:indicators)) AND COALESCE(c.Is_Aggregate, 0) = 0
+    ''', False, {'indicators': '["SL.UEM.TOTL.ZS"]'}),
+
+    # Generación de cada tabla cargada: invalida el caché de la API y las instantáneas Parquet
+    'ingest.generations': Query('''
+        SELECT table_name, generation FROM ingest_generation
+    ''', True, {}),
+
+    'ingest.generation': Query('''
+        SELECT generation, updated_at FROM ingest_generation WHERE table_name = :table
+    ''', True, {'table': 'FT_indec_ipc'}),
+
+    # /metrics: última ejecución de cada script, buscada por run_id desde pipeline_run_counts
+    'metrics.latest_runs': Query('''
+        SELECT script, run_id, started_at, seconds, status, peak_rss_bytes, stages
+        FROM pipeline_runs
+        WHERE run_id IN (SELECT MAX(last_run_id) FROM pipeline_run_counts GROUP BY script)
+        ORDER BY script
+    ''', True, {}),
+
+    'metrics.run_counts': Query('''
+        SELECT script, status, runs
+        FROM pipeline_run_counts
+        ORDER BY script, status
+    ''', True, {}),
+}
+
+_explained = set()
+_explained_lock = threading.Lock()
+
+
+def json_list(values):
+    """Lista de valores para los parámetros leídos con json_each."""
+    return json.dumps(list(values))
+
+
+def explain(conn, name, params=None):
+    """Devuelve el detalle de EXPLAIN QUERY PLAN de la consulta `name`."""
+    query = QUERIES[name]
+    return [row[3] for row in conn.execute(f'EXPLAIN QUERY PLAN {query.sql}', params or query.example)]
+
+
+def full_scans(plan):
+    """Pasos del plan que recorren una tabla o índice completo (json_each y SMALL_TABLES no cuentan)."""
+    return [step for step in plan if step.startswith('SCAN ') and 'VIRTUAL TABLE' not in step
+            and 'CONSTANT ROW' not in step and step.split()[1] not in SMALL_TABLES]
+
+
+def _log_plan(conn, name, params):
+    with _explained_lock:
+        if name in _explained:
+            return
+        _explained.add(name)
+    plan = explain(conn, name, params)
+    logger.debug('%s: %s', name, '; '.join(plan))
+    scans = full_scans(plan)
+    if scans and QUERIES[name].hot:
+        logger.warning('Escaneo completo en la consulta %s: %s', name, '; '.join(scans))
+
+
+def execute(conn, name, params=None):
+    """Ejecuta la consulta con nombre `name` con parámetros enlazados y devuelve el cursor."""
+    if DEBUG:
+        _log_plan(conn, name, params)
+    return conn.execute(QUERIES[name].sql, params or {})
+
+
+def fetch_all(conn, name, params=None):
+    return execute(conn, name, params).fetchall()
+
+
+def read_frame(conn, name, params=None):
+    """Como `fetch_all`, pero devuelve un DataFrame (pd.read_sql_query con la misma sentencia)."""
+    if DEBUG:
+        _log_plan(conn, name, params)
+    return pd.read_sql_query(QUERIES[name].sql, conn, params=params or {})
+
+
+def check_plans(conn):
+    """Devuelve {consulta: pasos con escaneo completo} para las consultas calientes."""
+    problems = {}
+    for name, query in QUERIES.items():
+        scans = full_scans(explain(conn, name))
+        if query.hot and scans:
+            problems[name] = scans
+    return problems
+
+
+if __name__ == '__main__':
+    # Revisión de planes: sale con código 1 si alguna consulta caliente escanea una tabla completa
+    from database import DB_PATH, connect
+
+    conn = connect(sys.argv[1] if len(sys.argv) > 1 else DB_PATH)
+    for name in QUERIES:
+        print(f"{name}: {'; '.join(explain(conn, name))}")
+    problems = check_plans(conn)
+    for name, scans in problems.items():
+        print(f"Escaneo completo en {name}: {'; '.join(scans)}")
+    sys.exit(1 if problems else 0)
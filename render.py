@@ -0,0 +1,78 @@
+import hashlib
+import io
+import json
+import os
+
+import pandas as pd
+
+# Huellas de los gráficos ya generados (una por imagen)
+RENDER_CACHE_DIR = os.path.join('.cache', 'render')
+
+# Formatos de salida soportados y resolución por defecto
+FORMATS = ('png', 'webp', 'svg')
+DEFAULT_FORMAT = 'png'
+DEFAULT_DPI = 150
+MIMETYPES = {'png': 'image/png', 'webp': 'image/webp', 'svg': 'image/svg+xml'}
+
+
+def get_pyplot():
+    """Importa pyplot con el backend Agg (sin ventana), también en workers y en la API."""
+    import matplotlib
+    matplotlib.use('Agg')
+    import matplotlib.pyplot as plt
+    return plt
+
+
+def output_path(image_path, fmt=None):
+    """Ajusta la extensión de `image_path` al formato pedido."""
+    fmt = fmt or DEFAULT_FORMAT
+    if fmt not in FORMATS:
+        raise ValueError(f"Formato de imagen no soportado: {fmt} (opciones: {', '.join(FORMATS)})")
+    return f'{os.path.splitext(image_path)[0]}.{fmt}'
+
+
+def render_key(data, params):
+    """Hash de los datos a graficar y de los parámetros del gráfico."""
+    digest = hashlib.sha256()
+    frames = data if isinstance(data, (list, tuple)) else [data]
+    for frame in frames:
+        digest.update(pd.util.hash_pandas_object(frame, index=True).values.tobytes())
+        digest.update(','.join(map(str, frame.columns)).encode('utf-8'))
+    digest.update(json.dumps(params, sort_keys=True, default=str).encode('utf-8'))
+    return digest.hexdigest()
+
+
+def _key_path(image_path):
+    name = hashlib.sha1(os.path.abspath(image_path).encode('utf-8')).hexdigest()[:16]
+    return os.path.join(RENDER_CACHE_DIR, f'{os.path.basename(image_path)}.{name}.key')
+
+
+def is_fresh(image_path, key):
+    """True si `image_path` existe y fue generado con exactamente estos datos y parámetros."""
+    key_path = _key_path(image_path)
+    if not (os.path.exists(image_path) and os.path.exists(key_path)):
+        return False
+    with open(key_path, 'r', encoding='utf-8') as file:
+        return file.read().strip() == key
+
+
+def save_figure(plt, image_path, key, dpi=DEFAULT_DPI):
+    """Guarda la figura actual, la cierra y registra su huella."""
+    image_folder = os.path.dirname(image_path)
+    if image_folder:
+        os.makedirs(image_folder, exist_ok=True)
+    fmt = os.path.splitext(image_path)[1].lstrip('.')
+    plt.savefig(image_path, format=fmt, dpi=dpi, bbox_inches='tight')
+    plt.close()
+
+    os.makedirs(RENDER_CACHE_DIR, exist_ok=True)
+    with open(_key_path(image_path), 'w', encoding='utf-8') as file:
+        file.write(key)
+
+
+def figure_bytes(plt, fmt=DEFAULT_FORMAT, dpi=DEFAULT_DPI):
+    """Devuelve la figura actual en memoria (sin archivo ni huella) y la cierra."""
+    buffer = io.BytesIO()
+    plt.savefig(buffer, format=fmt, dpi=dpi, bbox_inches='tight')
+    plt.close()
+    return buffer.getvalue()
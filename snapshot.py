@@ -0,0 +1,140 @@
+import hashlib
+import json
+import os
+import shutil
+
+import pandas as pd
+
+from queries import fetch_all
+
+# Instantáneas columnares (Parquet) de las tablas de hechos, una carpeta por generación:
+#   databases/snapshots/<base>/<tabla>/gen-<n>/<partición>=<valor>/*.parquet
+#   databases/snapshots/<base>/<tabla>/CURRENT   (generación vigente, escrita de forma atómica)
+SNAPSHOT_FOLDER = 'snapshots'
+
+# Tabla -> (consulta que genera la instantánea, columnas de partición). Solo las tablas que
+# tienen lecturas anchas: las consultas angostas (una serie, un rango de fechas) son más
+# rápidas con la búsqueda por índice de SQLite que abriendo los archivos Parquet.
+SNAPSHOTS = {
+    # Incluye FT_world_employment: es la partición Indicator_Code=SL.UEM.TOTL.ZS
+    'FT_world_indicator': ('''
+        SELECT f.Indicator_Code, f.Country_Code, c.Country_Name, c.Is_Aggregate, f.Year, f.Value
+        FROM FT_world_indicator f
+        JOIN DIM_world_country c ON c.Country_Code = f.Country_Code
+    ''', ['Indicator_Code']),
+}
+
+
+def get_pyarrow():
+    """Importa pyarrow.parquet si está instalado; sin él se sigue leyendo desde SQLite."""
+    try:
+        import pyarrow.parquet as pq
+    except ImportError:
+        return None
+    return pq
+
+
+def snapshot_dir(conn):
+    """Carpeta de instantáneas de la base de `conn` (None para bases en memoria)."""
+    db_file = conn.execute('PRAGMA database_list').fetchone()[2]
+    if not db_file:
+        return None
+    name = os.path.splitext(os.path.basename(db_file))[0]
+    return os.path.join(os.path.dirname(db_file), SNAPSHOT_FOLDER, name)
+
+
+def _version(conn, table):
+    # La fecha distingue generaciones con el mismo número si la base se recreó; el hash de la
+    # consulta invalida las instantáneas escritas con otras columnas
+    rows = fetch_all(conn, 'ingest.generation', {'table': table})
+    query = hashlib.sha256(SNAPSHOTS[table][0].encode('utf-8')).hexdigest()[:12]
+    if not rows:
+        return {'generation': 0, 'updated_at': None, 'query': query}
+    return {'generation': rows[0][0], 'updated_at': rows[0][1], 'query': query}
+
+
+def _read_current(table_dir):
+    try:
+        with open(os.path.join(table_dir, 'CURRENT'), 'r', encoding='utf-8') as file:
+            return json.load(file)
+    except (OSError, ValueError):
+        return None
+
+
+def _write_current(table_dir, current):
+    tmp_path = os.path.join(table_dir, f'CURRENT.{os.getpid()}.tmp')
+    with open(tmp_path, 'w', encoding='utf-8') as file:
+        json.dump(current, file)
+    os.replace(tmp_path, os.path.join(table_dir, 'CURRENT'))
+
+
+def refresh_snapshot(conn, table):
+    """Escribe la instantánea Parquet de `table` si la vigente no corresponde a su generación actual.
+
+    Llamar después de confirmar la carga. Devuelve la carpeta escrita, o None si ya estaba
+    al día, si la base es en memoria o si pyarrow no está instalado.
+    """
+    pq = get_pyarrow()
+    base_dir = snapshot_dir(conn)
+    if pq is None or base_dir is None:
+        return None
+    import pyarrow as pa
+
+    table_dir = os.path.join(base_dir, table)
+    query, partition_cols = SNAPSHOTS[table]
+
+    # Versión y datos se leen en la misma transacción de lectura (WAL: una vista consistente)
+    conn.execute('BEGIN')
+    try:
+        version = _version(conn, table)
+        if _read_current(table_dir) == version:
+            return None
+        df = pd.read_sql_query(query, conn)
+    finally:
+        conn.execute('COMMIT')
+
+    target = os.path.join(table_dir, f"gen-{version['generation']}")
+    tmp_dir = f'{target}.{os.getpid()}.tmp'
+    shutil.rmtree(tmp_dir, ignore_errors=True)
+    pq.write_to_dataset(pa.Table.from_pandas(df, preserve_index=False), tmp_dir, partition_cols=partition_cols)
+
+    shutil.rmtree(target, ignore_errors=True)
+    os.replace(tmp_dir, target)
+    _write_current(table_dir, version)
+
+    # Se conserva la generación anterior por si un lector todavía la está abriendo
+    keep = {os.path.basename(target), f"gen-{version['generation'] - 1}"}
+    for name in os.listdir(table_dir):
+        if name.startswith('gen-') and name not in keep:
+            shutil.rmtree(os.path.join(table_dir, name), ignore_errors=True)
+    return target
+
+
+def read_snapshot(conn, table, columns=None, filters=None):
+    """Lee la instantánea de `table` con memory map, o None si no existe o quedó vieja.
+
+    `filters` usa la sintaxis de pyarrow (p. ej. [('Region', 'in', ['GBA'])]); los filtros
+    sobre columnas de partición evitan abrir las carpetas que no corresponden.
+    """
+    pq = get_pyarrow()
+    base_dir = snapshot_dir(conn)
+    if pq is None or base_dir is None:
+        return None
+
+    table_dir = os.path.join(base_dir, table)
+    current = _read_current(table_dir)
+    if current is None or current != _version(conn, table):
+        return None
+
+    path = os.path.join(table_dir, f"gen-{current['generation']}")
+    try:
+        df = pq.read_table(path, columns=columns, filters=filters, memory_map=True).to_pandas()
+    except (OSError, ValueError):
+        # Generación borrada por una escritura concurrente: el llamador vuelve a SQLite
+        return None
+
+    # Las columnas de partición vuelven como categorías: se restauran a su tipo original
+    for col in SNAPSHOTS[table][1]:
+        if col in df.columns and isinstance(df[col].dtype, pd.CategoricalDtype):
+            df[col] = df[col].astype(df[col].cat.categories.dtype)
+    return df
@@ -0,0 +1,289 @@
+import os
+import zipfile
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+import numpy as np
+import pandas as pd
+
+from database import DB_PATH, bump_generation, get_connection
+from fetch_cache import CACHE_DIR, fetch, mark_processed
+from queries import json_list, read_frame
+from snapshot import refresh_snapshot
+
+# Descarga en CSV de un indicador del Banco Mundial (en español)
+URL_TEMPLATE = 'https://api.worldbank.org/v2/es/indicator/{code}?downloadformat=csv'
+
+# Descargas simultáneas por defecto contra api.worldbank.org
+DEFAULT_WORKERS = 8
+
+# Columnas de identificación del CSV ancho del Banco Mundial
+ID_COLUMNS = ['Country Name', 'Country Code', 'Indicator Name', 'Indicator Code']
+
+INSERT_INDICATOR = '''
+INSERT INTO FT_world_indicator (Indicator_Code, Country_Code, Year, Value)
+VALUES (?, ?, ?, ?)
+'''
+
+# Columnas del Metadata_Country que se guardan en DIM_world_country (el Banco Mundial publica 'IncomeGroup')
+METADATA_COLUMNS = {'Country Code': 'Country Code', 'Region': 'Region', 'IncomeGroup': 'Income_Group',
+                    'Income_Group': 'Income_Group'}
+
+# Percentiles de FT_world_indicator_rollup (la mediana es el 0.5)
+ROLLUP_QUANTILES = {'P10': 0.10, 'P25': 0.25, 'Median': 0.50, 'P75': 0.75, 'P90': 0.90}
+ROLLUP_COLUMNS = ['Indicator_Code', 'Year', 'Countries', 'Mean', 'Median', 'P10', 'P25', 'P75', 'P90',
+                  'Min_Country', 'Min_Value', 'Max_Country', 'Max_Value']
+
+# Un indicador listo para escribir: lo arma prepare_indicator (en los workers de ingest_indicators) y
+# store_indicator lo escribe. rollups es None si el ZIP no trae Metadata_Country
+PreparedIndicator = namedtuple('PreparedIndicator', ['codes', 'countries', 'metadata', 'indicators', 'values', 'rollups'])
+
+# Tipos explícitos al leer el CSV: códigos repetidos como categorías. Los valores van en float64:
+# float32 tiene 24 bits de mantisa y trunca población o PIB (45376763 -> 45376764)
+ID_DTYPES = {'Country Name': 'string', 'Country Code': 'category', 'Indicator Name': 'category', 'Indicator Code': 'category'}
+
+
+def is_data_member(name):
+    """True para el CSV de datos dentro del ZIP (los otros son Metadata_Country y Metadata_Indicator)."""
+    return name.endswith('.csv') and not os.path.basename(name).startswith('Metadata')
+
+
+def _read_country_metadata(z):
+    """Región y grupo de ingreso de cada código del Metadata_Country del ZIP, o None si no viene."""
+    member = next((name for name in z.namelist() if os.path.basename(name).startswith('Metadata_Country')), None)
+    if member is None:
+        return None
+    with z.open(member) as file:
+        metadata = pd.read_csv(file, encoding='utf-8-sig', usecols=lambda column: column in METADATA_COLUMNS,
+                               dtype='string')
+    metadata = metadata.rename(columns=METADATA_COLUMNS)
+    if not {'Country Code', 'Region'} <= set(metadata.columns):
+        return None
+    return metadata.reindex(columns=['Country Code', 'Region', 'Income_Group']).set_index('Country Code')
+
+
+def read_indicator_zip(zip_path):
+    """Lee el CSV de datos directamente desde el ZIP, sin extraerlo a disco.
+
+    Solo se parsean las columnas de identificación y las de años (se descarta la
+    columna vacía final del formato del Banco Mundial). Si el ZIP trae Metadata_Country
+    se agregan Region, Income_Group e Is_Aggregate (sin región: agregado regional o de ingreso).
+    """
+    with zipfile.ZipFile(zip_path) as z:
+        member = next(name for name in z.namelist() if is_data_member(name))
+        with z.open(member) as file:
+            header = pd.read_csv(file, skiprows=4, nrows=0).columns
+        years = [col for col in header if str(col).strip().isdigit()]
+        with z.open(member) as file:
+            df = pd.read_csv(
+                file,
+                skiprows=4,
+                usecols=ID_COLUMNS + years,
+                dtype={**ID_DTYPES, **{year: 'float64' for year in years}},
+            )
+        metadata = _read_country_metadata(z)
+
+    if metadata is not None:
+        codes = df['Country Code'].astype(str)
+        df['Region'] = codes.map(metadata['Region']).astype('string')
+        df['Income_Group'] = codes.map(metadata['Income_Group']).astype('string')
+        # Los códigos que no figuran en los metadatos quedan sin clasificar
+        df['Is_Aggregate'] = pd.array(df['Region'].isna(), dtype='boolean')
+        df.loc[~codes.isin(metadata.index), 'Is_Aggregate'] = pd.NA
+    return df
+
+
+def year_columns(df):
+    """Devuelve las columnas de años presentes en el CSV (no un rango fijo)."""
+    return [col for col in df.columns if str(col).strip().isdigit()]
+
+
+def melt_indicator(df):
+    """Pasa el DataFrame ancho (una columna por año) a formato largo sin NaNs.
+
+    Mismas filas y orden que df.melt (año por año), pero con un reshape de numpy: melt arma
+    una copia por columna de año y era la mitad del costo de preparar un indicador.
+    """
+    years = year_columns(df)
+    values = df[years].to_numpy(dtype='float64').T.ravel()
+    present = ~np.isnan(values)
+    rows = np.tile(np.arange(len(df)), len(years))[present]
+    long_df = df[ID_COLUMNS].iloc[rows].reset_index(drop=True)
+    long_df['Year'] = np.repeat(np.array(years, dtype=int), len(df))[present]
+    long_df['Value'] = values[present]
+    return long_df
+
+
+def indicator_url(code, url_template=URL_TEMPLATE):
+    return url_template.format(code=code)
+
+
+def indicator_rollups(df):
+    """Estadísticas por indicador y año de `df` (Indicator_Code, Country_Code, Year, Value).
+
+    Cantidad de países, promedio, mediana, percentiles 10/25/75/90 y el país con el valor
+    mínimo y máximo (ante empates, el de menor código). Una fila por (indicador, año).
+    """
+    df = df.sort_values(['Indicator_Code', 'Year', 'Country_Code'], ignore_index=True)
+    groups = df.groupby(['Indicator_Code', 'Year'], sort=True)['Value']
+    rollups = groups.agg(Countries='count', Mean='mean')
+    quantiles = groups.quantile(list(ROLLUP_QUANTILES.values())).unstack()
+    quantiles.columns = list(ROLLUP_QUANTILES)
+    lowest = df.loc[groups.idxmin(), ['Indicator_Code', 'Year', 'Country_Code', 'Value']]
+    highest = df.loc[groups.idxmax(), ['Indicator_Code', 'Year', 'Country_Code', 'Value']]
+    rollups = rollups.join(quantiles)
+    rollups = rollups.join(lowest.set_index(['Indicator_Code', 'Year']).rename(
+        columns={'Country_Code': 'Min_Country', 'Value': 'Min_Value'}))
+    rollups = rollups.join(highest.set_index(['Indicator_Code', 'Year']).rename(
+        columns={'Country_Code': 'Max_Country', 'Value': 'Max_Value'}))
+    return rollups.reset_index()[ROLLUP_COLUMNS]
+
+
+def refresh_rollups(conn, codes, rollups=None):
+    """Reemplaza FT_world_indicator_rollup de los indicadores `codes`; llamar dentro de la transacción de carga.
+
+    `rollups` trae los agregados ya calculados de parte de `codes` (prepare_indicator); los demás se
+    calculan desde la base con los países reales (Is_Aggregate distinto de 1 en DIM_world_country),
+    así "Mundo" o "Zona del euro" no sesgan el promedio ni el peor y el mejor país.
+    """
+    frames = [] if rollups is None else [rollups]
+    done = set() if rollups is None else set(rollups['Indicator_Code'])
+    pending = [code for code in codes if code not in done]
+    if pending:
+        df = read_frame(conn, 'employment.rollup_source', {'indicators': json_list(pending)})
+        if not df.empty:
+            frames.append(indicator_rollups(df))
+    conn.executemany('DELETE FROM FT_world_indicator_rollup WHERE Indicator_Code = ?', [(code,) for code in codes])
+    frames = [frame for frame in frames if not frame.empty]
+    if not frames:
+        return 0
+    rollups = pd.concat(frames, ignore_index=True)
+    cursor = conn.executemany(f'''
+    INSERT INTO FT_world_indicator_rollup ({', '.join(ROLLUP_COLUMNS)})
+    VALUES ({', '.join('?' * len(ROLLUP_COLUMNS))})
+    ''', rollups.astype(object).where(rollups.notna(), None).itertuples(index=False, name=None))
+    bump_generation(conn, 'FT_world_indicator_rollup')
+    return cursor.rowcount
+
+
+def prepare_indicator(df):
+    """Pasa el CSV ancho a las filas de cada executemany de store_indicator, sin tocar la base.
+
+    Si el ZIP trae Metadata_Country también calcula los agregados anuales (los países sin
+    clasificar cuentan, como en employment.rollup_source); si no, `rollups` queda en None.
+    """
+    long_df = melt_indicator(df)
+    names = long_df.drop_duplicates('Country Code')
+    indicators = long_df.drop_duplicates('Indicator Code')
+    values = long_df[['Indicator Code', 'Country Code', 'Year', 'Value']].astype(
+        {'Indicator Code': object, 'Country Code': object})
+
+    metadata = rollups = None
+    if 'Is_Aggregate' in df:
+        columns = df[['Region', 'Income_Group', 'Is_Aggregate', 'Country Code']].astype(object)
+        metadata = list(columns.where(columns.notna(), None).itertuples(index=False, name=None))
+        aggregates = df.loc[df['Is_Aggregate'].fillna(False).astype(bool), 'Country Code'].astype(object)
+        rollups = indicator_rollups(values[~values['Country Code'].isin(aggregates)].set_axis(
+            ['Indicator_Code', 'Country_Code', 'Year', 'Value'], axis=1))
+
+    return PreparedIndicator(
+        codes=list(indicators['Indicator Code'].astype(object)),
+        countries=list(names[['Country Code', 'Country Name']].astype(object).itertuples(index=False, name=None)),
+        metadata=metadata,
+        indicators=list(indicators[['Indicator Code', 'Indicator Name']].astype(object)
+                        .itertuples(index=False, name=None)),
+        values=list(values.itertuples(index=False, name=None)),
+        rollups=rollups,
+    )
+
+
+def store_indicator(conn, prepared):
+    """Escribe un PreparedIndicator en FT_world_indicator y sus dimensiones; llamar dentro de una transacción.
+
+    FT_world_indicator_rollup queda a cargo del llamador (refresh_rollups con prepared.rollups).
+    """
+    # Sin pisar los metadatos de una carga anterior si este CSV no los trae
+    conn.executemany(
+        '''
+        INSERT INTO DIM_world_country (Country_Code, Country_Name) VALUES (?, ?)
+        ON CONFLICT (Country_Code) DO UPDATE SET Country_Name = excluded.Country_Name
+        ''',
+        prepared.countries)
+    if prepared.metadata is not None:
+        conn.executemany(
+            'UPDATE DIM_world_country SET Region = ?, Income_Group = ?, Is_Aggregate = ? WHERE Country_Code = ?',
+            prepared.metadata)
+    conn.executemany(
+        'INSERT OR REPLACE INTO DIM_world_indicator (Indicator_Code, Indicator_Name) VALUES (?, ?)',
+        prepared.indicators)
+
+    # El CSV trae la serie completa: se reemplaza en lugar de duplicarla en cada ejecución
+    conn.executemany('DELETE FROM FT_world_indicator WHERE Indicator_Code = ?', [(code,) for code in prepared.codes])
+    conn.executemany(INSERT_INDICATOR, prepared.values)
+    bump_generation(conn, 'FT_world_indicator')
+    return len(prepared.values)
+
+
+def load_indicators(conn, df):
+    """Reemplaza los indicadores del CSV en FT_world_indicator con un executemany en una transacción.
+
+    Los nombres y metadatos de países e indicadores van a DIM_world_country y
+    DIM_world_indicator, y en la misma transacción se recalcula FT_world_indicator_rollup.
+    """
+    prepared = prepare_indicator(df)
+    with conn:
+        store_indicator(conn, prepared)
+        refresh_rollups(conn, prepared.codes, prepared.rollups)
+    return len(prepared.values)
+
+
+def _fetch_and_prepare(code, url_template, cache_dir, force):
+    result = fetch(indicator_url(code, url_template), cache_dir=cache_dir)
+    if not result.ok:
+        raise RuntimeError(f"Error al descargar {code}: HTTP {result.status_code}")
+    if not result.changed and not force:
+        return result, None
+    return result, prepare_indicator(read_indicator_zip(result.path))
+
+
+def ingest_indicators(codes, db_path=DB_PATH, max_workers=DEFAULT_WORKERS, url_template=URL_TEMPLATE,
+                      cache_dir=CACHE_DIR, force=False):
+    """Descarga, parsea y prepara `codes` en paralelo (pool acotado) y los carga en FT_world_indicator.
+
+    Los workers hacen el melt y los agregados anuales; este hilo solo escribe, una transacción
+    por indicador a medida que terminan. Al final van los agregados de todo el lote en una
+    transacción y la instantánea Parquet. Devuelve {código: filas cargadas, 0 si no cambió, o la excepción}.
+    """
+    conn = get_connection(db_path)
+    summary = {}
+    loaded = []
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futures = {executor.submit(_fetch_and_prepare, code, url_template, cache_dir, force): code for code in codes}
+        for future in as_completed(futures):
+            code = futures[future]
+            try:
+                result, prepared = future.result()
+            except Exception as exc:
+                summary[code] = exc
+                continue
+            if prepared is None:
+                summary[code] = 0
+                mark_processed(result)
+                continue
+            with conn:
+                summary[code] = store_indicator(conn, prepared)
+            loaded.append((result, prepared))
+
+    if loaded:
+        # Un solo refresh_rollups para el lote; los ZIPs sin Metadata_Country se calculan desde la base
+        rollups = [prepared.rollups for _, prepared in loaded if prepared.rollups is not None]
+        with conn:
+            refresh_rollups(conn, [code for _, prepared in loaded for code in prepared.codes],
+                            pd.concat(rollups, ignore_index=True) if rollups else None)
+        # Recién con los agregados escritos: si se corta antes, la próxima ejecución vuelve a cargar
+        for result, _ in loaded:
+            mark_processed(result)
+
+    # Una sola instantánea Parquet al final, no una por indicador
+    refresh_snapshot(conn, 'FT_world_indicator')
+    return summary